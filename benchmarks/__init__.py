@@ -0,0 +1,6 @@
+"""
+Headless benchmarks for the Factorio bot: a fake RCON server, stand-ins for
+the discord.py objects the bot touches, and load scenarios.
+
+Run with ``python -m benchmarks`` (``--help`` lists scenarios and options).
+"""
@@ -0,0 +1,89 @@
+"""
+python -m benchmarks [scenario ...] [options]
+
+Runs the scenarios against fake RCON servers and fake Discord objects and
+prints throughput, p50/p99 latency and memory for each. With --json the
+results are also written to a file, to compare runs before and after a change.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Headless Factorio bot benchmarks")
+    parser.add_argument('scenarios', nargs='*', help="polling, buttons, offline, startup, pollsim, logparse, savemeta, chat (default: all)")
+    parser.add_argument('--servers', type=int, default=20, help="Fake servers in the polling scenario")
+    parser.add_argument('--duration', type=float, default=10, help="Seconds to run (offline: seconds until recovery)")
+    parser.add_argument('--interval', type=float, default=1.0, help="Panel poll interval in seconds")
+    parser.add_argument('--latency', type=float, default=0.005, help="RCON response time in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random RCON response time, up to this")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Chance the server drops a command's connection")
+    parser.add_argument('--players', type=int, default=10, help="Players online on each fake server")
+    parser.add_argument('--discord-latency', type=float, default=0.05, help="Discord API round trip in seconds")
+    parser.add_argument('--clicks', type=int, default=200, help="Save button clicks in the buttons scenario")
+    parser.add_argument('--rate', type=float, default=20, help="Clicks per second in the buttons scenario")
+    parser.add_argument('--save-seconds', type=float, default=0.5, help="How long a fake /save takes")
+    parser.add_argument('--users', type=int, default=10, help="Users asking for the status in the offline scenario")
+    parser.add_argument('--stale', type=int, default=30, help="Old panels in the channel in the startup scenario")
+    parser.add_argument('--rounds', type=int, default=20, help="Repetitions of each startup case and of cached lookups in savemeta")
+    parser.add_argument('--sim-hours', type=float, default=24, help="Simulated hours in the pollsim scenario")
+    parser.add_argument('--chat-rate', type=float, default=20, help="Chat messages per second each way in the chat scenario")
+    parser.add_argument('--log-mb', type=float, default=100, help="Size of the synthetic server log in the logparse scenario")
+    parser.add_argument('--saves', type=int, default=10, help="Synthetic saves in the savemeta scenario")
+    parser.add_argument('--save-mb', type=float, default=100, help="Size of each synthetic save in the savemeta scenario")
+    parser.add_argument('--trace-memory', action='store_true', help="Report tracemalloc peaks (slows everything down)")
+    parser.add_argument('--json', metavar='FILE', help="Also write the results to FILE")
+    return parser.parse_args()
+
+
+async def run_all(args: argparse.Namespace) -> list:
+    from factorio_bot.server.sessions import session_store
+    from factorio_bot.utils.state_store import state_store
+    from .report import ScenarioRun, format_result
+    from .scenarios import SCENARIOS
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Unknown scenario: {', '.join(unknown)} (pick from {', '.join(SCENARIOS)})")
+
+    await session_store.start()
+    results = []
+    try:
+        for name in names:
+            with ScenarioRun(name, args.trace_memory) as run:
+                await SCENARIOS[name](run, args)
+            result = run.result()
+            results.append(result)
+            print(format_result(result), flush=True)
+    finally:
+        await session_store.close()
+        await state_store.close()
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    # Everything the bot writes goes to a scratch directory; set before the bot's modules read it
+    scratch = tempfile.mkdtemp(prefix='factorio_bot_bench_')
+    os.environ.update({
+        'HISTORY_DIR': os.path.join(scratch, 'history'),
+        'SESSIONS_DB': os.path.join(scratch, 'sessions.db'),
+        'STATE_DB': os.path.join(scratch, 'bot_state.db'),
+        'SAVE_METADATA_CACHE': os.path.join(scratch, 'save_metadata.json'),
+        'BACKUP_DIR': os.path.join(scratch, 'backups'),
+        'LOG_DIR': os.path.join(scratch, 'logs'),
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'WARNING'),
+    })
+    results = asyncio.run(run_all(args))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
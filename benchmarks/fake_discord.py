@@ -0,0 +1,230 @@
+import asyncio
+import itertools
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+import discord
+from factorio_bot.bot import FactorioBot
+from factorio_bot.server.context import ServerContext
+
+_ids = itertools.count(1_000_000)
+
+
+class FakeMessage:
+    """A sent message; edits take `latency` seconds, like a Discord round trip"""
+
+    def __init__(
+        self,
+        channel: 'FakeChannel',
+        content: Optional[str] = None,
+        embed: Any = None,
+        latency: float = 0.0,
+        author: Any = None
+    ):
+        self.id = next(_ids)
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.embed = embed
+        self.latency = latency
+        self.edits = 0
+        self.deleted = False
+
+    @property
+    def embeds(self) -> List[Any]:
+        return [self.embed] if self.embed is not None else []
+
+    async def edit(self, content: Optional[str] = None, embed: Any = None, view: Any = None, **_) -> 'FakeMessage':
+        await self.channel.call('edit')
+        if self.deleted:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+        self.edits += 1
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embed = embed
+        return self
+
+    async def delete(self) -> None:
+        await self.channel.call('delete')
+        self.deleted = True
+        self.channel.messages.pop(self.id, None)
+
+
+class FakeWebhook:
+    """
+    Channel webhook that records what it posts. Posts beyond Discord's
+    webhook limit (5 per 2 seconds) are counted in `rate_limited`.
+    """
+
+    def __init__(self, channel: 'FakeChannel', name: str, user: Any = None):
+        self.channel = channel
+        self.name = name
+        self.user = user
+        self.posts: List[str] = []
+        self.posted_at: List[float] = []
+        self.rate_limited = 0
+
+    async def send(self, content: Optional[str] = None, **_) -> None:
+        await self.channel.call('webhook')
+        now = time.monotonic()
+        if len(self.posted_at) >= 5 and now - self.posted_at[-5] < 2.0 - 1e-3:
+            self.rate_limited += 1
+        self.posted_at.append(now)
+        self.posts.append(content)
+
+
+class FakeChannel:
+    """
+    Text channel that keeps what is sent to it. Every API call takes
+    `latency` seconds and is counted in `calls`. Without `can_bulk_delete`
+    (no Manage Messages permission) purge() raises Forbidden, as Discord does.
+    """
+
+    def __init__(
+        self,
+        channel_id: Optional[int] = None,
+        latency: float = 0.0,
+        user: Any = None,
+        can_bulk_delete: bool = True
+    ):
+        self.id = channel_id or next(_ids)
+        self.latency = latency
+        self.user = user  # author of messages sent through this object (the bot)
+        self.can_bulk_delete = can_bulk_delete
+        self.messages: Dict[int, FakeMessage] = {}  # oldest first
+        self.calls: Dict[str, int] = {}
+        self._webhooks: List[FakeWebhook] = []
+
+    @property
+    def sent(self) -> int:
+        return self.calls.get('send', 0)
+
+    async def call(self, endpoint: str) -> None:
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        await asyncio.sleep(self.latency)
+
+    async def send(self, content: Optional[str] = None, embed: Any = None, **_) -> FakeMessage:
+        await self.call('send')
+        message = FakeMessage(self, content, embed, self.latency, self.user)
+        self.messages[message.id] = message
+        return message
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        await self.call('fetch_message')
+        try:
+            return self.messages[message_id]
+        except KeyError:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message") from None
+
+    async def webhooks(self) -> List[FakeWebhook]:
+        await self.call('webhooks')
+        return list(self._webhooks)
+
+    async def create_webhook(self, name: str, **_) -> FakeWebhook:
+        await self.call('create_webhook')
+        webhook = FakeWebhook(self, name, self.user)
+        self._webhooks.append(webhook)
+        return webhook
+
+    async def history(self, limit: int = 100):
+        """Newest first, one API call per 100 messages"""
+        newest = list(reversed(self.messages.values()))[:limit]
+        for index, message in enumerate(newest):
+            if index % 100 == 0:
+                await self.call('history')
+            yield message
+
+    async def purge(self, limit: int = 100, check: Any = None, **_) -> List[FakeMessage]:
+        """Bulk delete matching messages: one call per 100 (a single message is deleted on its own)"""
+        if not self.can_bulk_delete:
+            raise discord.Forbidden(SimpleNamespace(status=403, reason="Forbidden"), "Missing Permissions")
+        matching = [message async for message in self.history(limit) if check is None or check(message)]
+        for start in range(0, len(matching), 100):
+            batch = matching[start:start + 100]
+            await self.call('bulk_delete' if len(batch) > 1 else 'delete')
+            for message in batch:
+                message.deleted = True
+                self.messages.pop(message.id, None)
+        return matching
+
+
+class _FakeResponse:
+    """interaction.response"""
+
+    def __init__(self, interaction: 'FakeInteraction'):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **_) -> None:
+        self._done = True
+
+    async def send_message(self, content: Optional[str] = None, **_) -> None:
+        self._done = True
+        self.interaction.reply(content)
+
+
+class _FakeFollowup:
+    """interaction.followup"""
+
+    def __init__(self, interaction: 'FakeInteraction'):
+        self.interaction = interaction
+
+    async def send(self, content: Optional[str] = None, **_) -> None:
+        self.interaction.reply(content)
+
+
+class FakeInteraction:
+    """
+    A button click on the panel. `answered` resolves with the first message
+    the user sees after the deferral (the handler's actual answer).
+    """
+
+    def __init__(self, client: 'FakeBot', custom_id: str, roles: tuple = ("Factorio",)):
+        self.type = discord.InteractionType.component
+        self.data = {'custom_id': custom_id}
+        self.client = client
+        self.user = SimpleNamespace(roles=[SimpleNamespace(name=role) for role in roles], display_name="tester")
+        self.response = _FakeResponse(self)
+        self.followup = _FakeFollowup(self)
+        self.created = time.perf_counter()
+        self.answered: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.replies: List[Optional[str]] = []
+
+    def reply(self, content: Optional[str]) -> None:
+        self.replies.append(content)
+        if not self.answered.done():
+            self.answered.set_result(time.perf_counter() - self.created)
+
+
+class FakeBot:
+    """
+    The parts of FactorioBot that StatusUpdater and ServerControlView use.
+    Server lookup and interaction routing are FactorioBot's own methods.
+    """
+
+    get_server = FactorioBot.get_server
+    on_interaction = FactorioBot.on_interaction
+
+    def __init__(self, servers: Dict[Optional[str], ServerContext], channel_latency: float = 0.0):
+        self.servers = servers
+        self.user = SimpleNamespace(id=next(_ids), name="Factorio Bot")
+        self.channels: Dict[int, FakeChannel] = {}
+        self.channel_latency = channel_latency
+
+    async def wait_until_ready(self) -> None:
+        return None
+
+    def get_channel(self, channel_id: int) -> FakeChannel:
+        if channel_id not in self.channels:
+            self.channels[channel_id] = FakeChannel(channel_id, self.channel_latency, self.user)
+        return self.channels[channel_id]
+
+    async def click(self, custom_id: str) -> FakeInteraction:
+        """Press a panel button and return once the handler has finished"""
+        interaction = FakeInteraction(self, custom_id)
+        await self.on_interaction(interaction)
+        return interaction
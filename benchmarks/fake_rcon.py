@@ -0,0 +1,179 @@
+import asyncio
+import json
+import random
+import re
+import struct
+import time
+from typing import Callable, Dict, List, Optional
+
+# Source RCON packet types
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+_HEADER = struct.Struct('<iii')  # size, request id, type
+
+# game.print("...") as RCONCommands.message and .chat send it; the text uses \ddd escapes only
+_PRINT = re.compile(r'game\.print\("([^"]*)"')
+_LUA_ESCAPE = re.compile(r'\\(\d{3})')
+
+
+def encode_packet(request_id: int, packet_type: int, body: str) -> bytes:
+    payload = body.encode('utf-8') + b'\x00\x00'
+    return _HEADER.pack(8 + len(payload), request_id, packet_type) + payload
+
+
+class FakeRCONServer:
+    """
+    Asyncio Source RCON server that answers like a Factorio server.
+
+    Understands /players, /save, /quit and /silent-command (the bot's status
+    probe gets a JSON reply, or a Lua error without `probe_supported` as on
+    Factorio 1.x; anything else an empty one; text printed with
+    game.print is decoded into `printed`, one entry per line). Every command is
+    answered after `latency` seconds (plus up to `jitter`); with probability
+    `failure_rate` the connection is dropped instead. /save also emits the
+    "Saving game as" and "Saving finished" log lines to log listeners, as
+    the server's stdout would.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.005,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        players: int = 0,
+        save_seconds: float = 0.5,
+        ups: float = 60.0,
+        password: str = 'password',
+        seed: Optional[int] = None,
+        probe_supported: bool = True
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.players = [f"player{i}" for i in range(players)]
+        self.save_seconds = save_seconds
+        self.ups = ups
+        self.password = password
+        self.probe_supported = probe_supported
+        self.random = random.Random(seed)
+        self.port: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: List[asyncio.StreamWriter] = []
+        self._log_listeners: List[Callable[[str], None]] = []
+        self._started = time.monotonic()
+
+        # Counters
+        self.connections = 0
+        self.commands: Dict[str, int] = {}
+        self.failures = 0
+        self.printed: List[str] = []
+        self.longest_command = 0  # bytes
+
+    def add_log_listener(self, callback: Callable[[str], None]) -> None:
+        """Subscribe callback(line) to the server's log output"""
+        self._log_listeners.append(callback)
+
+    @property
+    def total_commands(self) -> int:
+        return sum(self.commands.values())
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        """
+        Listen for connections (again on the same port after stop())
+        :return: The port
+        """
+        self._server = await asyncio.start_server(self._handle, host, port or self.port or 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        """Close the listener and every open connection, like a crashed server"""
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for writer in self._writers:
+            writer.close()
+        self._writers.clear()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.append(writer)
+        tasks = set()
+        try:
+            while True:
+                size = struct.unpack('<i', await reader.readexactly(4))[0]
+                data = await reader.readexactly(size)
+                request_id, packet_type = struct.unpack_from('<ii', data)
+                body = data[8:-2].decode('utf-8', errors='replace')
+                if packet_type == SERVERDATA_AUTH:
+                    accepted = request_id if body == self.password else -1
+                    writer.write(encode_packet(accepted, SERVERDATA_AUTH_RESPONSE, ''))
+                    continue
+                # Answered concurrently, like several commands in flight on one socket
+                task = asyncio.create_task(self._reply(writer, request_id, body))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            if writer in self._writers:
+                self._writers.remove(writer)
+            writer.close()
+
+    async def _reply(self, writer: asyncio.StreamWriter, request_id: int, command: str) -> None:
+        await asyncio.sleep(self.latency + self.random.uniform(0, self.jitter))
+        name = command.split(' ', 1)[0]
+        self.commands[name] = self.commands.get(name, 0) + 1
+        self.longest_command = max(self.longest_command, len(command.encode('utf-8')))
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            self.failures += 1
+            writer.close()
+            return
+        writer.write(encode_packet(request_id, SERVERDATA_RESPONSE_VALUE, self.respond(command)))
+
+    def respond(self, command: str) -> str:
+        """The server's answer to one command"""
+        name, _, argument = command.partition(' ')
+        if name == '/players':
+            lines = [f"Players ({len(self.players)}):"] + [f"  {player} (online)" for player in self.players]
+            return "\n".join(lines)
+        if name == '/save':
+            asyncio.get_running_loop().create_task(self._save(argument or 'world'))
+            return ""
+        printed = _PRINT.search(argument) if name == '/silent-command' else None
+        if printed:
+            text = _LUA_ESCAPE.sub(lambda m: chr(int(m[1])), printed[1])
+            self.printed.extend(text.split('\n'))
+            return ""
+        if name == '/silent-command' and 'table_to_json' in argument:
+            if not self.probe_supported:
+                return "Cannot execute command. Error: [string \"...\"]:1: attempt to call field 'table_to_json' (a nil value)"
+            return json.dumps({
+                'players': self.players,
+                'tick': self.tick,
+                'ticks_played': self.tick,
+                'speed': 1,
+                'paused': False,
+                'evolution': 0.42,
+                'research': 'automation',
+                'research_progress': 0.5,
+            })
+        return ""
+
+    @property
+    def tick(self) -> int:
+        return int((time.monotonic() - self._started) * self.ups)
+
+    def _log(self, message: str) -> None:
+        line = f"{time.monotonic() - self._started:12.3f} Info {message}"
+        for callback in self._log_listeners:
+            callback(line)
+
+    async def _save(self, name: str) -> None:
+        self._log(f"AppManagerStates.cpp:1876: Saving game as /factorio/saves/{name}.zip")
+        await asyncio.sleep(self.save_seconds)
+        self._log("AppManagerStates.cpp:1890: Saving finished")
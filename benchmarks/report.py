@@ -0,0 +1,147 @@
+import math
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of unsorted values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident memory of this process, where the platform tells us"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return None
+
+
+class Recorder:
+    """Latencies and outcomes of one kind of operation"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def add(self, seconds: float, ok: bool = True) -> None:
+        if ok:
+            self.latencies.append(seconds)
+        else:
+            self.errors += 1
+
+    def wrap(self, func):
+        """Time every call of a coroutine function"""
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception:
+                self.add(time.perf_counter() - start, ok=False)
+                raise
+            self.add(time.perf_counter() - start)
+            return result
+        return wrapper
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            'count': len(self.latencies),
+            'errors': self.errors,
+            'per_second': len(self.latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': _ms(percentile(self.latencies, 0.50)),
+            'p99_ms': _ms(percentile(self.latencies, 0.99)),
+            'max_ms': _ms(max(self.latencies, default=None)),
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+class ScenarioRun:
+    """
+    Wall time, memory and recorders of one scenario.
+    With trace_memory, tracemalloc reports the peak Python allocation
+    (slower, so latencies from such a run aren't comparable).
+    """
+
+    def __init__(self, name: str, trace_memory: bool = False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.recorders: Dict[str, Recorder] = {}
+        self.counters: Dict[str, Any] = {}
+        self.elapsed = 0.0
+        self._started = 0.0
+        self._rss_before: Optional[int] = None
+        self.rss_after: Optional[int] = None
+        self.traced_peak: Optional[int] = None
+
+    def recorder(self, name: str) -> Recorder:
+        if name not in self.recorders:
+            self.recorders[name] = Recorder(name)
+        return self.recorders[name]
+
+    def __enter__(self) -> 'ScenarioRun':
+        if self.trace_memory:
+            tracemalloc.start()
+        self._rss_before = rss_bytes()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.elapsed = time.perf_counter() - self._started
+        self.rss_after = rss_bytes()
+        if self.trace_memory:
+            self.traced_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def result(self) -> Dict[str, Any]:
+        memory = {'rss_mb': _mb(self.rss_after)}
+        if self._rss_before is not None and self.rss_after is not None:
+            memory['rss_growth_mb'] = _mb(self.rss_after - self._rss_before)
+        if self.traced_peak is not None:
+            memory['traced_peak_mb'] = _mb(self.traced_peak)
+        return {
+            'scenario': self.name,
+            'seconds': round(self.elapsed, 2),
+            'operations': {name: r.summary(self.elapsed) for name, r in self.recorders.items()},
+            'counters': self.counters,
+            'memory': memory,
+        }
+
+
+def _mb(size: Optional[int]) -> Optional[float]:
+    return None if size is None else round(size / 1024 ** 2, 1)
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    """Human-readable table of one scenario result"""
+    lines = [f"== {result['scenario']} ({result['seconds']}s)"]
+    lines.append(f"   {'operation':<22}{'count':>8}{'errors':>8}{'per s':>9}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for name, op in result['operations'].items():
+        lines.append(
+            f"   {name:<22}{op['count']:>8}{op['errors']:>8}{op['per_second']:>9.1f}"
+            f"{_cell(op['p50_ms'])}{_cell(op['p99_ms'])}{_cell(op['max_ms'])}"
+        )
+    if result['counters']:
+        lines.append("   " + ", ".join(f"{key} {value}" for key, value in result['counters'].items()))
+    lines.append("   memory: " + ", ".join(f"{key} {value}" for key, value in result['memory'].items()))
+    return "\n".join(lines)
+
+
+def _cell(value: Optional[float]) -> str:
+    return f"{'-':>9}" if value is None else f"{value:>9.1f}"
@@ -0,0 +1,544 @@
+import asyncio
+import os
+import random
+import struct
+import tempfile
+import time
+import zipfile
+from argparse import Namespace
+from bisect import bisect_left
+from functools import partial
+from types import SimpleNamespace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from factorio_bot.config import Config, ServerSettings
+from factorio_bot.constants import ButtonIDs, CommandPriority
+from factorio_bot.server.context import ServerContext
+from factorio_bot.server.log_follower import follow_lines, iter_file_lines, parse_events, parse_line
+from factorio_bot.tasks.chat_bridge import ChatBridge
+from factorio_bot.tasks.panel_bootstrap import bootstrap_panel
+from factorio_bot.tasks.poll_scheduler import PollScheduler
+from factorio_bot.tasks.status_updater import StatusUpdater
+from factorio_bot.ui.embeds import generate_placeholder_embed
+from factorio_bot.utils.save_catalog import SaveEntry
+from factorio_bot.utils.save_metadata import SaveMetadataCache, read_metadata
+from .fake_discord import FakeBot, FakeChannel, FakeMessage
+from .fake_rcon import FakeRCONServer
+from .report import Recorder, ScenarioRun
+
+
+async def _sample_loop_lag(recorder: Recorder, interval: float = 0.05) -> None:
+    """How late the loop wakes a sleeping task, for the whole scenario"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        recorder.add(max(0.0, loop.time() - expected))
+
+
+async def _start_fleet(args: Namespace, count: int, **fake_options) -> tuple[List[FakeRCONServer], Dict[str, ServerContext]]:
+    """`count` fake servers and a remote fleet entry for each"""
+    fakes, servers = [], {}
+    for i in range(count):
+        fake = FakeRCONServer(
+            latency=args.latency,
+            jitter=args.jitter,
+            players=args.players,
+            seed=i,
+            **fake_options
+        )
+        port = await fake.start()
+        name = f"bench{i}"
+        server = ServerContext(ServerSettings(name, '127.0.0.1', port, fake.password, channel_id=i + 1))
+        fake.add_log_listener(partial(server.tracker.feed_line, source='stdout'))
+        fakes.append(fake)
+        servers[name] = server
+    return fakes, servers
+
+
+async def _attach_panels(bot: FakeBot, run: ScenarioRun, interval: float) -> List[StatusUpdater]:
+    """A panel message and a status updater per server, first polls spread over one interval"""
+    updaters = []
+    servers = list(bot.servers.values())
+    for i, server in enumerate(servers):
+        server.status_message = await bot.get_channel(server.channel_id).send("panel")
+        updater = StatusUpdater(bot, server, start_delay=i * interval / len(servers))
+        updater.update_status = run.recorder('status update').wrap(updater.update_status)
+        server.status_updater = updater
+        updaters.append(updater)
+    return updaters
+
+
+async def _shutdown(fakes: List[FakeRCONServer], servers: Dict[str, ServerContext]) -> None:
+    await asyncio.gather(*(server.close() for server in servers.values()))
+    for fake in fakes:
+        await fake.stop()
+
+
+def _use_poll_interval(interval: float) -> None:
+    Config.STATUS_UPDATE_INTERVAL = interval
+    Config.STATUS_OFFLINE_MAX_INTERVAL = interval * 4
+
+
+async def polling(run: ScenarioRun, args: Namespace) -> None:
+    """Many servers polled on their panel schedule, with RCON latency and failures"""
+    _use_poll_interval(args.interval)
+    fakes, servers = await _start_fleet(args, args.servers, failure_rate=args.failure_rate)
+    bot = FakeBot(servers, args.discord_latency)
+    lag = asyncio.create_task(_sample_loop_lag(run.recorder('loop lag')))
+    updaters = await _attach_panels(bot, run, args.interval)
+
+    await asyncio.sleep(args.duration)
+
+    lag.cancel()
+    run.counters.update({
+        'servers': len(servers),
+        'rcon commands': sum(fake.total_commands for fake in fakes),
+        'rcon connections': sum(fake.connections for fake in fakes),
+        'dropped by server': sum(fake.failures for fake in fakes),
+        'panel edits': sum(updater.editor.edits_sent for updater in updaters),
+    })
+    await _shutdown(fakes, servers)
+
+
+async def buttons(run: ScenarioRun, args: Namespace) -> None:
+    """
+    Save clicks arriving at `rate` per second while the panel polls and
+    users ask for the status; saves in flight are shared
+    """
+    _use_poll_interval(args.interval)
+    fakes, servers = await _start_fleet(args, 1, save_seconds=args.save_seconds)
+    bot = FakeBot(servers, args.discord_latency)
+    server = next(iter(servers.values()))
+    lag = asyncio.create_task(_sample_loop_lag(run.recorder('loop lag')))
+    await _attach_panels(bot, run, args.interval)
+
+    clicks = run.recorder('save click')
+    status = run.recorder('status command')
+
+    async def click() -> None:
+        interaction = await bot.click(f"{ButtonIDs.MANUAL_SAVE.value}:{server.name}")
+        answered = interaction.answered.result() if interaction.answered.done() else None
+        clicks.add(answered or 0.0, ok=bool(interaction.replies) and "Error" not in (interaction.replies[-1] or ""))
+
+    async def ask_status() -> None:
+        await status.wrap(server.monitor.get_status_async)(priority=CommandPriority.USER)
+
+    tasks = []
+    for i in range(args.clicks):
+        tasks.append(asyncio.create_task(click()))
+        if i % 4 == 0:
+            tasks.append(asyncio.create_task(ask_status()))
+        await asyncio.sleep(1 / args.rate)
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    lag.cancel()
+    run.counters.update({
+        'saves sent': fakes[0].commands.get('/save', 0),
+        'clicks joined': server.tracker.joined,
+        'rcon commands': fakes[0].total_commands,
+    })
+    await _shutdown(fakes, servers)
+
+
+async def offline(run: ScenarioRun, args: Namespace) -> None:
+    """
+    Users asking for the status of a server whose RCON port is closed,
+    until it comes back after `duration` seconds
+    """
+    fakes, servers = await _start_fleet(args, 1)
+    fake, server = fakes[0], next(iter(servers.values()))
+    await fake.stop()
+    lag = asyncio.create_task(_sample_loop_lag(run.recorder('loop lag')))
+
+    back_online: Optional[float] = None
+    recovered: Optional[float] = None
+
+    async def user() -> None:
+        nonlocal recovered
+        while recovered is None:
+            start = time.perf_counter()
+            result = await server.monitor.get_status_async(max_age=0, priority=CommandPriority.USER)
+            name = 'status (online)' if result.online else 'status (offline)'
+            run.recorder(name).add(time.perf_counter() - start)
+            if result.online and back_online is not None:
+                recovered = time.perf_counter() - back_online
+            await asyncio.sleep(0.1)
+
+    users = [asyncio.create_task(user()) for _ in range(args.users)]
+    await asyncio.sleep(args.duration)
+    await fake.start()
+    back_online = time.perf_counter()
+    await asyncio.wait(users, timeout=Config.RCON_PROBE_INTERVAL * 4)
+
+    lag.cancel()
+    breaker = server.rcon.get_breaker()
+    run.counters.update({
+        'recovered after s': None if recovered is None else round(recovered, 2),
+        'connection attempts': fake.connections,
+        'breaker': breaker.state.name.lower(),
+    })
+    for task in users:
+        task.cancel()
+    await _shutdown(fakes, servers)
+
+
+async def startup(run: ScenarioRun, args: Namespace) -> None:
+    """
+    Time until the control panel is up in a channel holding `stale` old
+    panels among other messages: with the persisted panel still there, with
+    it gone, and with it gone and no permission to bulk delete
+    """
+    bot_user = SimpleNamespace(id=1, name="Factorio Bot")
+    someone = SimpleNamespace(id=2, name="player")
+    cases = (('found', True, True), ('purged', False, True), ('no bulk delete', False, False))
+    for case, keep_panel, can_bulk_delete in cases:
+        recorder = run.recorder(f"panel ({case})")
+        calls = 0
+        for _ in range(args.rounds):
+            channel = FakeChannel(latency=args.discord_latency, user=bot_user, can_bulk_delete=can_bulk_delete)
+            panel_id = None
+            for _ in range(args.stale):
+                # Old panels between ordinary chat; the newest one is the persisted panel
+                panel = FakeMessage(channel, None, generate_placeholder_embed(), args.discord_latency, bot_user)
+                chat = FakeMessage(channel, "gg", None, args.discord_latency, someone)
+                channel.messages.update({panel.id: panel, chat.id: chat})
+                panel_id = panel.id if keep_panel else None
+
+            start = time.perf_counter()
+            await bootstrap_panel(channel, bot_user, panel_id)
+            recorder.add(time.perf_counter() - start)
+            calls += sum(channel.calls.values())
+        run.counters[f"api calls ({case})"] = round(calls / args.rounds, 1)
+
+
+# The bot's default intervals (.env.example); the live scenarios shrink Config's to run in real time
+SIM_STEADY = 25.0
+SIM_FAST = 3.0
+SIM_FAST_WINDOW = 120.0
+SIM_OFFLINE_MAX = 120.0
+# How long the server takes to come up after Start and to go down after Stop
+SIM_START_SECONDS = 40.0
+SIM_STOP_SECONDS = 5.0
+
+
+def _simulated_day(hours: float, seed: int = 0) -> tuple[List[tuple[float, Optional[bool]]], List[tuple[float, bool, bool]]]:
+    """
+    Button clicks and the state changes they (or crashes) cause over `hours`:
+    online for 1-4 h with save clicks, then a Stop click or (every third
+    time) a crash, offline for 0.5-3 h, then a Start click
+    :return: (clicks as (time, expected state), state changes as (time, online, clicked)), starting online
+    """
+    rng = random.Random(seed)
+    span = hours * 3600
+    clicks, changes = [], []
+    t = 0.0
+    while t < span:
+        crash = len(changes) % 6 == 4
+        up_until = t + rng.uniform(3600, 4 * 3600)
+        save = t + rng.uniform(600, 1800)
+        while save < up_until:
+            clicks.append((save, None))
+            save += rng.uniform(600, 1800)
+        if crash:
+            t = up_until
+        else:
+            clicks.append((up_until, False))
+            t = up_until + SIM_STOP_SECONDS
+        changes.append((t, False, not crash))
+        start = t + rng.uniform(1800, 3 * 3600)
+        clicks.append((start, True))
+        t = start + SIM_START_SECONDS
+        changes.append((t, True, True))
+    return [c for c in clicks if c[0] < span], [c for c in changes if c[0] < span]
+
+
+def _simulate_polls(
+    online_at: Callable[[float], bool],
+    clicks: List[tuple[float, Optional[bool]]],
+    span: float,
+    scheduler: Optional[PollScheduler]
+) -> List[tuple[float, bool]]:
+    """
+    Poll times and results over `span` simulated seconds: every SIM_STEADY
+    seconds without a scheduler (the old fixed loop), otherwise as
+    StatusUpdater does, polling right away on each click
+    """
+    polls = []
+    pending = list(clicks)
+    t = 0.0
+    while t < span:
+        online = online_at(t)
+        polls.append((t, online))
+        if scheduler is None:
+            t += SIM_STEADY
+            continue
+        scheduler.record(online, t)
+        wake = t + scheduler.next_delay(t)
+        if pending and pending[0][0] <= wake:
+            clicked, expect_online = pending.pop(0)
+            scheduler.boost(clicked, expect_online)
+            wake = clicked
+        t = wake
+    return polls
+
+
+async def pollsim(run: ScenarioRun, args: Namespace) -> None:
+    """
+    `sim_hours` of simulated time with starts, stops, crashes and save
+    clicks: polls sent and how long each state change takes to reach the
+    panel, for the old fixed loop and the adaptive scheduler. The
+    operations are detection latencies (simulated, so 'per s' is meaningless)
+    """
+    span = args.sim_hours * 3600
+    clicks, changes = _simulated_day(args.sim_hours)
+    change_times = [t for t, _, _ in changes]
+
+    def online_at(t: float) -> bool:
+        index = bisect_left(change_times, t + 1e-9) - 1
+        return True if index < 0 else changes[index][1]
+
+    schedulers = {
+        'fixed': None,
+        'adaptive': PollScheduler(
+            steady=SIM_STEADY,
+            fast=SIM_FAST,
+            offline_max=SIM_OFFLINE_MAX,
+            fast_window=SIM_FAST_WINDOW,
+            rng=random.Random(0).random
+        ),
+    }
+    for name, scheduler in schedulers.items():
+        polls = _simulate_polls(online_at, clicks, span, scheduler)
+        poll_times = [t for t, _ in polls]
+        for changed, _, clicked in changes:
+            index = bisect_left(poll_times, changed)
+            if index < len(poll_times):
+                cause = 'button' if clicked else 'crash'
+                run.recorder(f"{cause} ({name})").add(poll_times[index] - changed)
+        run.counters[f"polls ({name})"] = len(polls)
+        run.counters[f"offline polls ({name})"] = sum(not online for _, online in polls)
+    run.counters.update({'state changes': len(changes), 'clicks': len(clicks)})
+
+
+def _write_server_log(path: str, size: int, seed: int = 0) -> int:
+    """
+    A factorio-current.log of about `size` bytes: engine output with 10% joins, leaves and chat
+    :return: The number of lines
+    """
+    rng = random.Random(seed)
+    engine = [
+        "{uptime:10.3f} Info ServerMultiplayerManager.cpp:808: updateTick({tick}) received stateChanged peerID({peer})",
+        "{uptime:10.3f} Verbose ServerSynchronizer.cpp:627: nextHeartbeatSequenceNumber({tick}) adding record for player({peer})",
+        "{uptime:10.3f} Info AppManagerStates.cpp:1876: Saving game as /factorio/saves/world.zip",
+    ]
+    events = [
+        "2024-05-01 18:22:{second:02d} [JOIN] player{peer} joined the game",
+        "2024-05-01 18:22:{second:02d} [LEAVE] player{peer} left the game",
+        "2024-05-01 18:22:{second:02d} [CHAT] player{peer}: building more iron smelting, need {tick} plates",
+    ]
+    lines = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while f.tell() < size:
+            chunk = []
+            for _ in range(10_000):
+                template = rng.choice(events) if rng.random() < 0.1 else rng.choice(engine)
+                chunk.append(template.format(uptime=lines / 60, tick=lines, peer=rng.randrange(40), second=lines % 60))
+                lines += 1
+            f.write("\n".join(chunk) + "\n")
+    return lines
+
+
+async def logparse(run: ScenarioRun, args: Namespace) -> None:
+    """
+    Throughput of the server log pipeline over a synthetic log of `log_mb`
+    megabytes: reading alone, the generator parser, and the async follower
+    the bot runs (which reads 64 KiB chunks in a worker thread), with the
+    loop lag while it catches up
+    """
+    with tempfile.TemporaryDirectory(prefix='factorio_log_') as directory:
+        path = os.path.join(directory, 'factorio-current.log')
+        lines = await asyncio.to_thread(_write_server_log, path, int(args.log_mb * 1024 ** 2))
+        size = os.path.getsize(path)
+
+        def read_only() -> int:
+            return sum(1 for _ in iter_file_lines(path))
+
+        def parse() -> int:
+            return sum(1 for _ in parse_events(iter_file_lines(path)))
+
+        async def follow() -> int:
+            seen = events = 0
+            async for line in follow_lines(path, 0.1, from_end=False):
+                events += parse_line(line) is not None
+                seen += 1
+                if seen == lines:
+                    return events
+
+        for name, stage in (('read only', read_only), ('parse', parse), ('follow + parse', follow)):
+            start = time.perf_counter()
+            if asyncio.iscoroutinefunction(stage):
+                lag = asyncio.create_task(_sample_loop_lag(run.recorder('loop lag (follow)'), 0.01))
+                found = await stage()
+                lag.cancel()
+            else:
+                found = stage()
+            elapsed = time.perf_counter() - start
+            run.recorder(name).add(elapsed)
+            run.counters[f"{name} MB/s"] = round(size / 1024 ** 2 / elapsed, 1)
+        run.counters.update({'log MB': round(size / 1024 ** 2, 1), 'lines': lines, 'player events': found})
+
+
+def _level_header(mods: List[str]) -> bytes:
+    """A level-init.dat header in the layout parse_level_header reads"""
+    def string(text: str) -> bytes:
+        raw = text.encode('utf-8')
+        return bytes([len(raw)]) + raw
+
+    header = struct.pack('<HHHH', 2, 0, 28, 0) + b'\x00'
+    header += string('') + string('freeplay') + string('base') + b'\x00\x00\x00' + string('')
+    header += b'\x00' * 4 + struct.pack('<BHHH', 0, 2, 0, 28) + struct.pack('<H', 0) + b'\x00'
+    header += bytes([len(mods)])
+    for mod in mods:
+        header += string(mod) + b'\x01\x02\x03' + struct.pack('<I', 0)
+    return header
+
+
+def _write_save(path: str, size: int, seed: int) -> None:
+    """
+    A save of about `size` bytes: header entries plus level.dat chunks of
+    incompressible map data (stored, as compressed map data would gain nothing)
+    """
+    rng = random.Random(seed)
+    world = f"world{seed}"
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr(f"{world}/level-init.dat", _level_header(['base', 'elevated-rails', 'quality', 'space-age']))
+        archive.writestr(f"{world}/control.lua", "-- freeplay\nlocal handler = require(\"event_handler\")\n")
+        chunk = 0
+        while chunk * 4 * 1024 ** 2 < size:
+            archive.writestr(f"{world}/level.dat{chunk}", rng.randbytes(4 * 1024 ** 2))
+            chunk += 1
+
+
+async def savemeta(run: ScenarioRun, args: Namespace) -> None:
+    """
+    Save picker metadata for `saves` synthetic saves of `save_mb` megabytes:
+    reading every zip entry (what opening whole saves would cost), reading
+    only the central directory and header entries, and cached lookups
+    """
+    with tempfile.TemporaryDirectory(prefix='factorio_saves_') as directory:
+        paths = [os.path.join(directory, f"save{i}.zip") for i in range(args.saves)]
+        for i, path in enumerate(paths):
+            await asyncio.to_thread(_write_save, path, int(args.save_mb * 1024 ** 2), i)
+        entries = [
+            SaveEntry(Path(path), os.path.getsize(path), os.path.getmtime(path))
+            for path in paths
+        ]
+
+        def read_everything(path: str) -> None:
+            with zipfile.ZipFile(path) as archive:
+                for name in archive.namelist():
+                    archive.read(name)
+
+        for name, read in (('every entry', read_everything), ('headers only', read_metadata)):
+            recorder = run.recorder(name)
+            for entry in entries:
+                start = time.perf_counter()
+                await asyncio.to_thread(read, entry.path)
+                recorder.add(time.perf_counter() - start)
+
+        cache = SaveMetadataCache(Path(directory) / 'save_metadata.json')
+        start = time.perf_counter()
+        found = await cache.get_many(entries)
+        run.recorder('cache (cold)').add(time.perf_counter() - start)
+        warm = run.recorder('cache (warm)')
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            await cache.get_many(entries)
+            warm.add(time.perf_counter() - start)
+
+        summary = next(iter(found.values())).summary if found else None
+        run.counters.update({
+            'saves': len(entries),
+            'save MB': round(entries[0].size / 1024 ** 2, 1) if entries else 0,
+            'with metadata': len(found),
+            'picker line': summary,
+        })
+
+
+# Chat that has to survive the trip: Lua quoting, escapes, control characters, emoji and CJK
+CHAT_SAMPLES = [
+    'hello "world"',
+    'back\\slash \\" and \\\\',
+    '")game.print("pwned")--',
+    'tab\there \x01 bell\x07',
+    'iron plates 🚂🏭⚙️',
+    '鉄板をもっと作って',
+    "**not bold** @everyone",
+]
+
+
+async def chat(run: ScenarioRun, args: Namespace) -> None:
+    """
+    `chat_rate` messages per second in each direction through the chat
+    bridge for `duration` seconds, then until both queues have drained.
+    Checks that every line arrives once, in order, and that webhook posts
+    stay within Discord's limit
+    """
+    Config.CHAT_WEBHOOK_URL = None
+    fakes, servers = await _start_fleet(args, 1)
+    fake, server = fakes[0], next(iter(servers.values()))
+    bot = FakeBot(servers, args.discord_latency)
+    lag = asyncio.create_task(_sample_loop_lag(run.recorder('loop lag')))
+
+    bridge = ChatBridge(bot, server.rcon, channel_id=1)
+    queued = {'game': [], 'discord': []}
+    for relay, lines in ((bridge.to_game_relay, queued['game']), (bridge.to_discord_relay, queued['discord'])):
+        relay.put = partial(lambda put, lines, line: (lines.append(line), put(line)), relay.put, lines)
+    await bridge.start()
+    webhook = bridge.webhook
+
+    author = SimpleNamespace(bot=False, display_name='tester')
+    sent = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.duration:
+        text = f"{sent} {CHAT_SAMPLES[sent % len(CHAT_SAMPLES)]}"
+        bridge.on_discord_message(SimpleNamespace(author=author, webhook_id=None, clean_content=text, attachments=[]))
+        bridge.on_game_chat(f"player{sent % 7}", text)
+        sent += 1
+        await asyncio.sleep(1 / args.chat_rate)
+
+    # Let the queues drain; past ~23 lines/s Discord's webhook limit sets the pace
+    stopped = time.perf_counter()
+    while bridge.to_game_relay.queue or bridge.to_discord_relay.queue:
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(0.5)
+    drained = time.perf_counter() - stopped
+
+    lag.cancel()
+    bridge.stop()
+    posted = [line for post in webhook.posts for line in post.split('\n')]
+    run.recorder('drain').add(drained)
+    run.counters.update({
+        'messages each way': sent,
+        'rcon commands': fake.commands.get('/silent-command', 0),
+        'largest command bytes': fake.longest_command,
+        'webhook posts': len(webhook.posts),
+        'over rate limit': webhook.rate_limited,
+        'game in order': fake.printed == queued['game'],
+        'discord in order': posted == queued['discord'],
+        'dropped': bridge.to_game_relay.dropped + bridge.to_discord_relay.dropped,
+    })
+    await _shutdown(fakes, servers)
+
+
+SCENARIOS = {
+    'polling': polling,
+    'buttons': buttons,
+    'offline': offline,
+    'startup': startup,
+    'pollsim': pollsim,
+    'logparse': logparse,
+    'savemeta': savemeta,
+    'chat': chat,
+}
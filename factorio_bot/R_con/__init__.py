@@ -1,7 +1,10 @@
 """
 RCON module for Factorio server communication
 """
-from .client import RCONClient
+from .client import RCONClient, RCONEndpoint
 from .commands import RCONCommands
+from .pool import RCONPool
+from .breaker import CircuitBreaker
+from .scheduler import RCONScheduler
 
-__all__ = ['RCONClient', 'RCONCommands']
\ No newline at end of file
+__all__ = ['RCONClient', 'RCONEndpoint', 'RCONCommands', 'RCONPool', 'CircuitBreaker', 'RCONScheduler']
\ No newline at end of file
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from ..constants import BreakerState
+from ..exceptions import RCONError
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Fails RCON calls fast once the server looks offline.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    calls are rejected immediately. Every `probe_interval` seconds a cheap
+    TCP connect to the RCON port is tried; if it succeeds the next call is
+    let through as a trial (half-open) and closes the breaker on success.
+    Other calls keep failing fast until the trial has an outcome.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        failure_threshold: int,
+        probe_interval: float,
+        probe_timeout: float
+    ):
+        self.host = host
+        self.port = port
+        self.failure_threshold = max(1, failure_threshold)
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+
+        self.state = BreakerState.CLOSED
+        self.changed_at = datetime.now()
+        self.failures = 0
+        self._last_probe = 0.0
+        self._trial_in_flight = False
+
+    def _transition(self, state: BreakerState) -> None:
+        if state is self.state:
+            return
+        logger.info(f"RCON circuit {self.state.value} -> {state.value}")
+        self.state = state
+        self.changed_at = datetime.now()
+
+    async def probe(self) -> bool:
+        """Check whether anything is listening on the RCON port"""
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port),
+                self.probe_timeout
+            )
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+    async def before_call(self) -> None:
+        """
+        Gate an RCON call
+        :raises RCONError: If the breaker is open and the server still looks down
+        """
+        if self.state is BreakerState.CLOSED:
+            return
+        if self.state is BreakerState.HALF_OPEN:
+            if self._trial_in_flight:
+                raise RCONError("RCON circuit half-open, waiting for the trial call")
+            self._trial_in_flight = True
+            return
+
+        now = time.monotonic()
+        if now - self._last_probe >= self.probe_interval:
+            self._last_probe = now
+            if await self.probe() and self.state is BreakerState.OPEN:
+                self._transition(BreakerState.HALF_OPEN)
+                self._trial_in_flight = True
+                return
+        raise RCONError("RCON circuit open, server appears to be offline")
+
+    def abandon_trial(self) -> None:
+        """A call ended without an outcome (e.g. cancelled); let the next one be the trial"""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._trial_in_flight = False
+        self._transition(BreakerState.CLOSED)
+
+    def record_failure(self) -> None:
+        self._trial_in_flight = False
+        self.failures += 1
+        if self.state is BreakerState.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state is not BreakerState.OPEN:
+                self._last_probe = time.monotonic()
+            self._transition(BreakerState.OPEN)
@@ -1,17 +1,137 @@
 from rcon.source import Client
-from typing import Optional
+from typing import Any, Optional
 import asyncio
+import time
 from ..config import Config
 from ..exceptions import RCONError
-from ..constants import RCON_TIMEOUT
+from ..constants import RCON_TIMEOUT, CommandPriority
+from .pool import RCONPool
+from .breaker import CircuitBreaker
+from .scheduler import RCONScheduler
+from ..utils.metrics import metrics
+
+class RCONEndpoint:
+    """
+    Pooled, circuit-broken RCON access to one server, with commands
+    scheduled by priority in front of the pool.
+    RCONClient uses one for the configured server; fleet mode creates one per server.
+    """
+
+    def __init__(self, host: str, port: int, password: str, pool_size: int):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.pool_size = pool_size
+        self._pool: Optional[RCONPool] = None
+        self._pool_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._breaker: Optional[CircuitBreaker] = None
+        self._scheduler: Optional[RCONScheduler] = None
+        self._scheduler_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.label = f"{host}:{port}"
+        self.timer = metrics.timer('rcon_command', "RCON command", endpoint=self.label)
+        metrics.gauge(
+            'rcon_queue_depth', "RCON commands waiting to be sent",
+            lambda: sum(self._scheduler.depth.values()) if self._scheduler else None,
+            endpoint=self.label
+        )
+
+    def get_pool(self) -> RCONPool:
+        """Return the connection pool bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._pool is None or self._pool_loop is not loop:
+            self._pool = RCONPool(
+                self.host,
+                self.port,
+                self.password,
+                size=self.pool_size,
+                timeout=RCON_TIMEOUT
+            )
+            self._pool_loop = loop
+        return self._pool
+
+    def get_breaker(self) -> CircuitBreaker:
+        """Return the circuit breaker guarding the pool"""
+        if self._breaker is None:
+            self._breaker = CircuitBreaker(
+                self.host,
+                self.port,
+                failure_threshold=Config.RCON_BREAKER_THRESHOLD,
+                probe_interval=Config.RCON_PROBE_INTERVAL,
+                probe_timeout=Config.RCON_PROBE_TIMEOUT
+            )
+        return self._breaker
+
+    def get_scheduler(self) -> RCONScheduler:
+        """Return the priority queue bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._scheduler is None or self._scheduler_loop is not loop:
+            self._scheduler = RCONScheduler(self._execute, Config.RCON_MAX_IN_FLIGHT)
+            self._scheduler_loop = loop
+            for priority, histogram in self._scheduler.waits.items():
+                metrics.add_histogram(
+                    'rcon_queue_wait_seconds', "Time RCON commands wait in the priority queue", histogram,
+                    endpoint=self.label, priority=priority.name.lower()
+                )
+        return self._scheduler
+
+    async def send_async(
+        self,
+        command: str,
+        timeout: int = RCON_TIMEOUT,
+        priority: CommandPriority = CommandPriority.USER,
+        deadline: Optional[float] = None,
+        key: Optional[str] = None,
+        timed: bool = False
+    ) -> Any:
+        """
+        Execute an RCON command over the persistent connection pool.
+        Fails immediately while the circuit breaker is open.
+        :param priority: Scheduling class; more urgent commands are sent first
+        :param deadline: Seconds from now by which the response is needed, queueing included (default: timeout)
+        :param key: For background commands: a newer command with the same key replaces a queued one
+        :param timed: Return (response, monotonic send time, answer time) instead of just the response
+        :raises RCONError: If communication fails or the deadline passes
+        """
+        return await self.get_scheduler().submit(command, timeout, priority, deadline, key, timed)
+
+    def promote(self, key: str, priority: CommandPriority) -> None:
+        """Raise the priority of a queued keyed command"""
+        self.get_scheduler().promote(key, priority)
+
+    async def _execute(self, command: str, timeout: float) -> Optional[str]:
+        breaker = self.get_breaker()
+        await breaker.before_call()
+        start = time.perf_counter()
+        try:
+            response = await self.get_pool().execute(command, timeout)
+        except RCONError:
+            self.timer.observe(time.perf_counter() - start, error=True)
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.abandon_trial()
+            raise
+        self.timer.observe(time.perf_counter() - start)
+        breaker.record_success()
+        return response.strip() if response else None
+
+    async def close(self) -> None:
+        """Close all pooled connections"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+            self._pool_loop = None
+
 
 class RCONClient:
     """Thread-safe RCON client wrapper with error handling"""
-    
+
+    _endpoint: Optional[RCONEndpoint] = None
+
     @staticmethod
     def send(command: str, timeout: int = RCON_TIMEOUT) -> Optional[str]:
         """
-        Execute an RCON command
+        Execute an RCON command on a one-off blocking connection
         :param command: The command to send
         :param timeout: Connection timeout in seconds
         :return: Server response or None if command expects no response
@@ -29,7 +149,60 @@ class RCONClient:
         except Exception as e:
             raise RCONError(f"RCON command failed: {e}") from e
 
+    @classmethod
+    def get_endpoint(cls) -> RCONEndpoint:
+        """Return the endpoint for the configured server"""
+        if cls._endpoint is None:
+            cls._endpoint = RCONEndpoint(
+                Config.RCON_HOST,
+                Config.RCON_PORT,
+                Config.RCON_PASSWORD,
+                Config.RCON_POOL_SIZE
+            )
+        return cls._endpoint
+
+    @classmethod
+    def get_pool(cls) -> RCONPool:
+        """Return the connection pool bound to the running event loop"""
+        return cls.get_endpoint().get_pool()
+
+    @classmethod
+    def get_breaker(cls) -> CircuitBreaker:
+        """Return the circuit breaker guarding the pool"""
+        return cls.get_endpoint().get_breaker()
+
+    @classmethod
+    def get_scheduler(cls) -> RCONScheduler:
+        """Return the priority queue bound to the running event loop"""
+        return cls.get_endpoint().get_scheduler()
+
+    @staticmethod
+    async def send_async(
+        command: str,
+        timeout: int = RCON_TIMEOUT,
+        priority: CommandPriority = CommandPriority.USER,
+        deadline: Optional[float] = None,
+        key: Optional[str] = None,
+        timed: bool = False
+    ) -> Any:
+        """
+        Execute an RCON command over the persistent connection pool.
+        Fails immediately while the circuit breaker is open.
+        :param priority: Scheduling class; more urgent commands are sent first
+        :param deadline: Seconds from now by which the response is needed, queueing included (default: timeout)
+        :param key: For background commands: a newer command with the same key replaces a queued one
+        :param timed: Return (response, monotonic send time, answer time) instead of just the response
+        :raises RCONError: If communication fails or the deadline passes
+        """
+        return await RCONClient.get_endpoint().send_async(command, timeout, priority, deadline, key, timed)
+
     @staticmethod
-    async def send_async(command: str, timeout: int = RCON_TIMEOUT) -> Optional[str]:
-        """Async wrapper for RCON commands"""
-        return await asyncio.to_thread(RCONClient.send, command, timeout)
\ No newline at end of file
+    def promote(key: str, priority: CommandPriority) -> None:
+        """Raise the priority of a queued keyed command"""
+        RCONClient.get_endpoint().promote(key, priority)
+
+    @classmethod
+    async def close(cls) -> None:
+        """Close all pooled connections"""
+        if cls._endpoint is not None:
+            await cls._endpoint.close()
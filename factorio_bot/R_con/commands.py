@@ -1,6 +1,14 @@
-from typing import Dict, Literal
+from typing import Dict, List, Literal
 from enum import Enum
 
+# Quotes, backslashes and control characters become decimal escapes;
+# everything else (including UTF-8) is valid inside a Lua string as-is
+_LUA_ESCAPES = {code: f"\\{code:03d}" for code in (*range(32), ord('"'), ord('\\'), 127)}
+
+def lua_quote(text: str) -> str:
+    """Quote text as a Lua string literal that nothing in it can break out of"""
+    return '"' + text.translate(_LUA_ESCAPES) + '"'
+
 class RCONCommands:
     """Predefined RCON commands for Factorio"""
     
@@ -19,6 +27,30 @@ class RCONCommands:
         """List connected players"""
         return "/players"
     
+    @staticmethod
+    def status_probe() -> str:
+        """
+        Collect players, tick, evolution and research in one round trip.
+        The server answers with a single JSON object.
+        """
+        return (
+            "/silent-command "
+            "local names = {} "
+            "for _, p in pairs(game.connected_players) do names[#names + 1] = p.name end "
+            "local force = game.forces.player "
+            "local research = force.current_research "
+            "rcon.print(helpers.table_to_json{"
+            "players = names, "
+            "tick = game.tick, "
+            "ticks_played = game.ticks_played, "
+            "speed = game.speed, "
+            "paused = game.tick_paused, "
+            "evolution = game.forces.enemy.get_evolution_factor(game.surfaces.nauvis), "
+            "research = research and research.name or nil, "
+            "research_progress = research and force.research_progress or nil"
+            "})"
+        )
+
     @staticmethod
     def server_info() -> str:
         """DEPRECATED - World name now comes from save file"""
@@ -27,7 +59,12 @@ class RCONCommands:
     @staticmethod
     def message(msg: str) -> str:
         """Broadcast message to all players"""
-        return f'/silent-command game.print("{msg}")'
+        return f'/silent-command game.print({lua_quote(msg)})'
+
+    @staticmethod
+    def chat(lines: List[str]) -> str:
+        """Print several chat lines with a single game.print"""
+        return f'/silent-command game.print({lua_quote(chr(10).join(lines))}, {{color = {{0.55, 0.6, 1}}}})'
     
     @staticmethod
     def ban_player(username: str, reason: str = "") -> str:
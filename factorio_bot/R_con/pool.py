@@ -0,0 +1,222 @@
+import asyncio
+import itertools
+import logging
+import struct
+from typing import Dict, List, Optional
+from ..exceptions import RCONError
+
+logger = logging.getLogger(__name__)
+
+# Source RCON packet types
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+_HEADER = struct.Struct('<iii')  # size, request id, type
+_MAX_REQUEST_ID = 2**31 - 1
+
+
+def encode_packet(request_id: int, packet_type: int, body: str) -> bytes:
+    """Build a Source RCON packet"""
+    payload = body.encode('utf-8') + b'\x00\x00'
+    return _HEADER.pack(8 + len(payload), request_id, packet_type) + payload
+
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple[int, int, str]:
+    """
+    Read one Source RCON packet from the stream
+    :return: (request id, packet type, body)
+    """
+    size = struct.unpack('<i', await reader.readexactly(4))[0]
+    data = await reader.readexactly(size)
+    request_id, packet_type = struct.unpack_from('<ii', data)
+    body = data[8:-2].decode('utf-8', errors='replace')
+    return request_id, packet_type, body
+
+
+class RCONConnection:
+    """
+    A single authenticated RCON socket.
+    Responses are matched to requests by ID, so several commands
+    can be in flight at once.
+    """
+
+    def __init__(self, host: str, port: int, password: str, timeout: float):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+
+    @property
+    def is_open(self) -> bool:
+        # The writer goes first: the read loop is still finishing while it waits for the socket to close
+        return self._writer is not None and self._reader_task is not None and not self._reader_task.done()
+
+    @property
+    def pending(self) -> int:
+        """Number of commands waiting for a response"""
+        return len(self._pending)
+
+    def _next_id(self) -> int:
+        request_id = next(self._ids)
+        if request_id >= _MAX_REQUEST_ID:
+            self._ids = itertools.count(1)
+            request_id = next(self._ids)
+        return request_id
+
+    async def connect(self) -> None:
+        """
+        Open the socket and authenticate
+        :raises RCONError: If the server is unreachable or rejects the password
+        """
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port),
+                self.timeout
+            )
+            auth_id = self._next_id()
+            self._writer.write(encode_packet(auth_id, SERVERDATA_AUTH, self.password))
+            await self._writer.drain()
+
+            # Some servers send an empty RESPONSE_VALUE before the auth result
+            while True:
+                request_id, packet_type, _ = await asyncio.wait_for(
+                    read_packet(self._reader), self.timeout
+                )
+                if packet_type == SERVERDATA_AUTH_RESPONSE:
+                    break
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            await self._close_transport()
+            raise RCONError(f"RCON connection failed: {e!r}") from e
+
+        if request_id == -1:
+            await self._close_transport()
+            raise RCONError("RCON authentication failed")
+
+        self._reader_task = asyncio.create_task(self._read_loop())
+        logger.debug(f"RCON connection opened to {self.host}:{self.port}")
+
+    async def _read_loop(self) -> None:
+        """Dispatch incoming packets to their waiting requests"""
+        error: Exception = RCONError("RCON connection closed")
+        try:
+            while True:
+                request_id, _, body = await read_packet(self._reader)
+                future = self._pending.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result(body)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            error = RCONError(f"RCON connection lost: {e!r}")
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+            await self._close_transport()
+
+    async def execute(self, command: str, timeout: Optional[float] = None) -> str:
+        """
+        Send a command and wait for its response
+        :raises ConnectionError: If the socket was closed before the command was sent
+        :raises RCONError: If no response arrives in time or the socket dies mid-flight
+        """
+        if not self.is_open:
+            raise ConnectionResetError("RCON connection is not open")
+
+        request_id = self._next_id()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self._writer.write(encode_packet(request_id, SERVERDATA_EXECCOMMAND, command))
+            await self._writer.drain()
+        except OSError:
+            self._pending.pop(request_id, None)
+            raise
+
+        try:
+            return await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError as e:
+            raise RCONError(f"RCON command timed out: {command}") from e
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _close_transport(self) -> None:
+        if self._writer is None:
+            return
+        writer, self._writer = self._writer, None
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    async def close(self) -> None:
+        """Close the socket and fail any outstanding requests"""
+        if self._reader_task and not self._reader_task.done():
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+        await self._close_transport()
+
+
+class RCONPool:
+    """
+    Keeps up to `size` authenticated RCON connections alive and spreads
+    commands across them. Dead connections are replaced on demand.
+    """
+
+    def __init__(self, host: str, port: int, password: str, size: int, timeout: float):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._connections: List[RCONConnection] = []
+        self._connect_lock = asyncio.Lock()
+
+    async def _acquire(self) -> RCONConnection:
+        """Pick the least busy connection, opening a new one if all are busy"""
+        self._connections = [c for c in self._connections if c.is_open]
+        least_busy = min(self._connections, key=lambda c: c.pending, default=None)
+        if least_busy is not None and (
+            least_busy.pending == 0 or len(self._connections) >= self.size
+        ):
+            return least_busy
+
+        async with self._connect_lock:
+            self._connections = [c for c in self._connections if c.is_open]
+            if len(self._connections) >= self.size:
+                return min(self._connections, key=lambda c: c.pending)
+            connection = RCONConnection(self.host, self.port, self.password, self.timeout)
+            await connection.connect()
+            self._connections.append(connection)
+            return connection
+
+    async def execute(self, command: str, timeout: Optional[float] = None) -> str:
+        """
+        Run a command on a pooled connection
+        :raises RCONError: If the command could not be delivered or answered
+        """
+        for attempt in range(2):
+            connection = await self._acquire()
+            try:
+                return await connection.execute(command, timeout)
+            except OSError as e:
+                # Never reached the server, safe to retry on a fresh socket
+                await connection.close()
+                if attempt:
+                    raise RCONError(f"RCON command failed: {e!r}") from e
+                logger.info("RCON connection dropped, reconnecting")
+
+    async def close(self) -> None:
+        """Close every pooled connection"""
+        connections, self._connections = self._connections, []
+        await asyncio.gather(*(c.close() for c in connections))
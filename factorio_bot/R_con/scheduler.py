@@ -0,0 +1,221 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from ..constants import CommandPriority
+from ..exceptions import RCONError
+from ..utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Longest command text written to the log (chat batches can be kilobytes)
+LOGGED_COMMAND_LENGTH = 200
+
+
+class _Job:
+    __slots__ = ('command', 'timeout', 'priority', 'deadline', 'key', 'future', 'queued_at', 'timer', 'dropped')
+
+    def __init__(self, command: str, timeout: float, priority: CommandPriority, deadline: float, key: Optional[str]):
+        self.command = command
+        self.timeout = timeout
+        self.priority = priority
+        self.deadline = deadline
+        self.key = key
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.queued_at = time.monotonic()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.dropped = False  # superseded: left in the heap but never sent
+
+    @property
+    def waiting(self) -> bool:
+        return not self.dropped and not self.future.done()
+
+
+class RCONScheduler:
+    """
+    Orders RCON commands by priority in front of a connection pool.
+
+    At most `max_in_flight` commands run at once; the rest wait in a heap
+    ordered by (priority, arrival). A command that is still queued when
+    its deadline passes fails without being sent. Background commands
+    with a key supersede an older queued command with the same key: the
+    old one is never sent and its caller gets the newer one's response.
+    """
+
+    def __init__(self, execute: Callable[[str, float], Awaitable[Optional[str]]], max_in_flight: int):
+        """:param execute: Sends one command with a timeout (the endpoint's breaker-guarded pool call)"""
+        self.execute = execute
+        self.max_in_flight = max(1, max_in_flight)
+        self._heap: List[tuple[int, int, _Job]] = []
+        self._keyed: Dict[str, _Job] = {}
+        self._seq = itertools.count()
+        self.in_flight = 0
+
+        # Counters
+        self.submitted = 0
+        self.expired = 0
+        self.superseded = 0
+        self.cancelled = 0
+        self.max_depth = 0
+        self.waits = {priority: Histogram() for priority in CommandPriority}
+
+    @property
+    def depth(self) -> Dict[CommandPriority, int]:
+        """Commands waiting per priority"""
+        depth = dict.fromkeys(CommandPriority, 0)
+        for _, _, job in self._heap:
+            if job.waiting:
+                depth[job.priority] += 1
+        return depth
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'submitted': self.submitted,
+            'in_flight': self.in_flight,
+            'queued': {p.name.lower(): n for p, n in self.depth.items()},
+            'max_depth': self.max_depth,
+            'expired': self.expired,
+            'superseded': self.superseded,
+            'cancelled': self.cancelled,
+            'wait': {p.name.lower(): h.as_dict() for p, h in self.waits.items()},
+        }
+
+    async def submit(
+        self,
+        command: str,
+        timeout: float,
+        priority: CommandPriority = CommandPriority.USER,
+        deadline: Optional[float] = None,
+        key: Optional[str] = None,
+        timed: bool = False
+    ) -> Any:
+        """
+        Queue a command and wait for its response
+        :param deadline: Seconds from now by which the response is needed (default: timeout)
+        :param key: Background commands only: a newer command with this key replaces a queued one
+        :param timed: Return (response, monotonic send time, answer time) of the command actually sent
+        :raises RCONError: If the deadline passes or the command fails
+        """
+        self.submitted += 1
+        job = _Job(command, timeout, priority, time.monotonic() + (deadline or timeout), key)
+
+        if key is not None and priority is CommandPriority.BACKGROUND:
+            older = self._keyed.get(key)
+            if older is not None and older.waiting:
+                self.superseded += 1
+                older.dropped = True
+                self._settle(older)
+                job.future.add_done_callback(lambda done: _chain(done, older.future))
+            self._keyed[key] = job
+
+        job.timer = asyncio.get_running_loop().call_at(job.deadline, self._expire, job)
+        heapq.heappush(self._heap, (priority, next(self._seq), job))
+        self._dispatch()
+        self.max_depth = max(self.max_depth, sum(self.depth.values()))
+
+        try:
+            # Shield so a caller giving up doesn't cancel a superseded caller's answer
+            response, sent, answered = await asyncio.shield(job.future)
+            return (response, sent, answered) if timed else response
+        except asyncio.CancelledError:
+            if not job.future.done():
+                self.cancelled += 1
+                job.future.cancel()
+            raise
+
+    def promote(self, key: str, priority: CommandPriority) -> None:
+        """Move a queued keyed command up to `priority` (someone more urgent is waiting for it)"""
+        job = self._keyed.get(key)
+        if job is None or not job.waiting or job.priority <= priority:
+            return
+        job.priority = priority
+        self._heap = [(j.priority, seq, j) for _, seq, j in self._heap]
+        heapq.heapify(self._heap)
+
+    def _expire(self, job: _Job) -> None:
+        if not job.future.done():
+            self.expired += 1
+            self._settle(job)
+            job.future.set_exception(RCONError(f"RCON command missed its deadline in the queue: {job.command}"))
+
+    def _settle(self, job: _Job) -> None:
+        """Cancel the job's deadline timer and forget its key (it is being sent or never will be)"""
+        if job.timer is not None:
+            job.timer.cancel()
+        if job.key is not None and self._keyed.get(job.key) is job:
+            del self._keyed[job.key]
+
+    def _start(self, job: _Job) -> None:
+        self._settle(job)
+        job.timer = None
+        wait = time.monotonic() - job.queued_at
+        self.waits[job.priority].observe(wait)
+        self.in_flight += 1
+        asyncio.create_task(self._run(job, wait))
+
+    async def _run(self, job: _Job, wait: float) -> None:
+        sent = time.monotonic()
+        try:
+            timeout = min(job.timeout, job.deadline - sent)
+            if timeout <= 0:
+                # Reached the front on its deadline, before the timer fired: never send it
+                self.expired += 1
+                raise RCONError(f"RCON command missed its deadline in the queue: {job.command}")
+            result = await self.execute(job.command, timeout)
+            answered = time.monotonic()
+        except Exception as e:
+            _log_command(job, wait, time.monotonic() - sent, e)
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            _log_command(job, wait, answered - sent, None)
+            if not job.future.done():
+                # Timed per job: concurrent probes with the same key each get their own round trip
+                job.future.set_result((result, sent, answered))
+        finally:
+            self.in_flight -= 1
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._heap and self.in_flight < self.max_in_flight:
+            _, _, job = heapq.heappop(self._heap)
+            # Expired, superseded or cancelled while queued
+            if job.waiting:
+                self._start(job)
+
+
+def _log_command(job: _Job, wait: float, duration: float, error: Optional[Exception]) -> None:
+    """
+    One DEBUG record per command sent; the fields become keys in JSON log lines.
+    Failures are reported by the callers, so an outage doesn't log twice.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    command = job.command[:LOGGED_COMMAND_LENGTH]
+    outcome = 'error' if error else 'ok'
+    logger.debug(
+        f"RCON {command!r} {outcome} in {duration * 1000:.0f} ms (queued {wait * 1000:.0f} ms)"
+        + (f": {error}" if error else ""),
+        extra={
+            'command': command,
+            'priority': job.priority.name.lower(),
+            'wait': round(wait, 4),
+            'duration': round(duration, 4),
+            'outcome': outcome,
+        }
+    )
+
+
+def _chain(source: asyncio.Future, target: asyncio.Future) -> None:
+    """Give a superseded caller the superseding command's outcome"""
+    if target.done():
+        return
+    if source.cancelled():
+        target.set_exception(RCONError("The command that replaced this one was cancelled"))
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
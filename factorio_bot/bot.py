@@ -1,22 +1,39 @@
 import asyncio
+import time
 import discord
 from discord.ext import commands
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Set
 
 # Local imports
 from .R_con.client import RCONClient
-from .R_con.commands import RCONCommands
 from .server.monitor import ServerMonitor
 from .server.controller import ServerController
+from .server.supervisor import supervisor
+from .server.log_follower import LogFollower
+from .server.save_tracker import save_tracker
+from .server.context import ServerContext, default_server
+from .server.history import status_history
+from .server.sessions import session_store
+from .server.models import LogEvent
 from .ui.views import ServerControlView
-from .ui.embeds import generate_status_embed
+from .ui.embeds import format_duration, generate_history_embed, generate_status_embed
 from .tasks.status_updater import StatusUpdater
-from .utils.logging_utils import logger
+from .tasks.chat_bridge import ChatBridge
+from .tasks.panel_bootstrap import bootstrap_panel
+from .tasks.loop_lag import LoopLagMonitor
+from .tasks.metrics_server import MetricsServer
+from .utils.logging_utils import logger, setup_logger
 from .utils.decorators import requires_admin, handle_errors
 from .config import Config
 from .exceptions import FactorioBotError
+from .constants import CommandPriority, LogEventType
 from .utils.persistence import load_state, save_state
+from .utils.state_store import state_store
+from .utils.save_catalog import save_catalog
+from .utils.backup import BackupStore, backup_store
+from .utils.metrics import metrics
 
 class FactorioBot(commands.Bot):
     """Main bot class for Factorio server management"""
@@ -31,16 +48,94 @@ class FactorioBot(commands.Bot):
             help_command=None
         )
         
-        self.status_updater: Optional[StatusUpdater] = None
-        self.status_message: Optional[discord.Message] = None
         self.panel_lock = asyncio.Lock()
+        # Startup runs once per process, however often the gateway reconnects;
+        # a startup that failed before the panels were up is retried on the next on_ready
+        self._created = time.monotonic()
+        self._bootstrapped = False
+        self._bootstrapping = False
+        self._state_loaded = False
+        # Channel notices sent from sync callbacks, referenced until done
+        self._notices: Set[asyncio.Task] = set()
+        self.panel_ready: Optional[float] = None
+        metrics.gauge('panel_ready_seconds', "Seconds from startup until the control panel was posted or found",
+                      lambda: self.panel_ready)
+        self.log_follower = LogFollower(Config.SERVER_LOG_FILE, Config.LOG_POLL_INTERVAL)
+        self.log_follower.add_listener(self._on_log_event)
+        self.log_follower.add_line_listener(partial(save_tracker.feed_line, source='log'))
+        self.log_follower.add_live_listener(self._on_log_live)
+        self.loop_lag = LoopLagMonitor(Config.LOOP_LAG_INTERVAL)
+        self.metrics_server = MetricsServer(metrics, Config.METRICS_HOST, Config.METRICS_PORT) if Config.METRICS_PORT else None
         
         # Verify configuration
         Config.validate()
+
+        # One server from .env, or every server in the fleet file
+        self.fleet_mode = Config.FLEET_FILE is not None
+        if self.fleet_mode:
+            self.servers: Dict[Optional[str], ServerContext] = {
+                settings.name: ServerContext(settings)
+                for settings in Config.load_fleet(Config.FLEET_FILE)
+            }
+        else:
+            self.servers = {None: default_server}
+
+        # In-game chat from the configured server's log, relayed both ways (single-server mode)
+        self.chat_bridge = None
+        if Config.CHAT_CHANNEL_ID and not self.fleet_mode:
+            self.chat_bridge = ChatBridge(self, RCONClient, Config.CHAT_CHANNEL_ID)
         
         # Register events and commands
         self._register_events()
         self._register_commands()
+        for server in self.servers.values():
+            server.supervisor.add_listener('ready', partial(self._on_server_ready, server))
+            server.supervisor.add_listener('exit', partial(self._on_server_exit, server))
+            server.supervisor.add_listener('line', partial(server.tracker.feed_line, source='stdout'))
+            server.monitor.add_lag_listener(partial(self._on_lag, server))
+
+    # The configured server's panel (single-server mode)
+
+    @property
+    def status_updater(self) -> Optional[StatusUpdater]:
+        return default_server.status_updater
+
+    @status_updater.setter
+    def status_updater(self, updater: Optional[StatusUpdater]) -> None:
+        default_server.status_updater = updater
+
+    @property
+    def status_message(self) -> Optional[discord.Message]:
+        return default_server.status_message
+
+    @status_message.setter
+    def status_message(self, message: Optional[discord.Message]) -> None:
+        default_server.status_message = message
+
+    def get_server(self, name: Optional[str]) -> Optional[ServerContext]:
+        """Server by fleet name (None in single-server mode)"""
+        return self.servers.get(name)
+
+    @staticmethod
+    def _backup_store(server: ServerContext) -> BackupStore:
+        """
+        :raises FactorioBotError: If the server's saves aren't on this machine
+        """
+        if server.backups is None:
+            raise FactorioBotError(f"{server.name} has no local saves, so no backups")
+        return server.backups
+
+    def _resolve_server(self, name: Optional[str]) -> ServerContext:
+        """
+        Pick the server a command refers to
+        :raises FactorioBotError: If the name is unknown, or missing while there are several servers
+        """
+        if name is None and len(self.servers) == 1:
+            return next(iter(self.servers.values()))
+        server = self.servers.get(name)
+        if server is None:
+            raise FactorioBotError(f"Pick a server: {', '.join(str(n) for n in self.servers)}")
+        return server
 
     def _register_events(self) -> None:
         """Register all Discord event listeners"""
@@ -53,41 +148,301 @@ class FactorioBot(commands.Bot):
             view = ServerControlView()
             await view._handle_interaction(interaction)
 
+    async def on_message(self, message: discord.Message) -> None:
+        """Relay chat channel messages to the game, then handle commands"""
+        if (
+            self.chat_bridge
+            and message.channel.id == Config.CHAT_CHANNEL_ID
+            and not message.content.startswith(Config.COMMAND_PREFIX)
+        ):
+            self.chat_bridge.on_discord_message(message)
+        await self.process_commands(message)
+
     def _register_commands(self) -> None:
         """Register all text commands"""
         @self.command(name='status')
-        async def status(ctx: commands.Context):
-            """Manual status check"""
-            status = ServerMonitor.get_status()
-            await ctx.send(embed=generate_status_embed(status))
+        @handle_errors()
+        async def status(ctx: commands.Context, server_name: str = None):
+            """Manual status check (fleet mode: !status <server>)"""
+            server = self._resolve_server(server_name)
+            status = await server.monitor.get_status_async(priority=CommandPriority.USER)
+            if server.status_updater:
+                server.status_updater.observe(status)
+            await ctx.send(embed=generate_status_embed(status, server.name))
+
+        @self.command(name='stats')
+        @handle_errors()
+        async def stats(ctx: commands.Context, server_name: str = None):
+            """Player count and availability trends (fleet mode: !stats <server>)"""
+            server = self._resolve_server(server_name)
+            await ctx.send(embed=generate_history_embed(server.history, server.name))
+
+        @self.command(name='playtime')
+        @handle_errors()
+        async def playtime(ctx: commands.Context, player: str, server_name: str = None):
+            """Total playtime of a player (fleet mode: !playtime <player> <server>)"""
+            server = self._resolve_server(server_name)
+            stats = await server.sessions.playtime(player)
+            if stats is None:
+                await ctx.send(f"❓ No sessions recorded for {player}.")
+                return
+            seen = "online now" if stats.player in server.sessions.online else f"last seen <t:{int(stats.last_seen)}:R>"
+            await ctx.send(
+                f"⏱️ **{stats.player}** has played {format_duration(stats.seconds)} "
+                f"over {stats.sessions} sessions ({seen})"
+            )
+
+        @self.command(name='top')
+        @handle_errors()
+        async def top(ctx: commands.Context, days: int = None, server_name: str = None):
+            """Most playtime, all time or over the last N days: !top [days] (fleet mode: !top [days] <server>)"""
+            server = self._resolve_server(server_name)
+            ranking = await server.sessions.top(days)
+            lines = [
+                f"{rank:>2}. {player:<20} {format_duration(seconds)}"
+                for rank, (player, seconds) in enumerate(ranking, 1)
+            ]
+            period = f"last {days} days" if days else "all time"
+            await ctx.send(f"**Top players ({period}):**\n```{chr(10).join(lines) or 'None'}```")
+
+        @self.command(name='peak')
+        @handle_errors()
+        async def peak(ctx: commands.Context, days: int = None, server_name: str = None):
+            """Most players online at once: !peak [days] (fleet mode: !peak [days] <server>)"""
+            server = self._resolve_server(server_name)
+            record = await server.sessions.peak(days)
+            period = f"in the last {days} days" if days else "ever"
+            if record is None:
+                await ctx.send(f"❓ No players recorded {period}.")
+                return
+            await ctx.send(f"📈 Peak {period}: {record[0]} players on <t:{int(record[1])}:f>")
 
         @self.command(name='save')
         @requires_admin()
         @handle_errors()
-        async def save(ctx: commands.Context, filename: str = None):
-            """Manual save"""
-            result = ServerController.save_game(filename)
-            await ctx.send(f"💾 {result or 'Game saved!'}")
+        async def save(ctx: commands.Context, *args: str):
+            """Manual save: !save [filename] (fleet mode: !save <server> [filename])"""
+            if self.fleet_mode:
+                server = self._resolve_server(args[0] if args else None)
+                args = args[1:]
+            else:
+                server = default_server
+            result = await ServerController.save_game(args[0] if args else None, server)
+            if server.status_updater:
+                server.status_updater.boost()
+            name = result.path.name if result.path else 'Game'
+            await ctx.send(f"💾 {name} saved in {result.duration:.1f}s")
 
         @self.command(name='players')
-        async def players(ctx: commands.Context):
-            """List players"""
-            players = RCONClient.send(RCONCommands.players())
+        @handle_errors()
+        async def players(ctx: commands.Context, server_name: str = None):
+            """List players (fleet mode: !players <server>)"""
+            status = await self._resolve_server(server_name).monitor.get_status_async(priority=CommandPriority.USER)
+            if not status.online:
+                await ctx.send("🔴 Server is offline.")
+                return
+            players = "\n".join(status.players)
             await ctx.send(f"**Players:**\n```{players or 'None'}```")
 
+        @self.command(name='rconqueue')
+        @requires_admin()
+        @handle_errors()
+        async def rconqueue(ctx: commands.Context, server_name: str = None):
+            """RCON queue depth and wait times per priority"""
+            scheduler = self._resolve_server(server_name).rcon.get_scheduler()
+            depth = scheduler.depth
+            lines = [
+                f"{priority.name.lower():<10} queued {depth[priority]:>3}  "
+                f"p50 {_ms(histogram.quantile(0.5))}  p95 {_ms(histogram.quantile(0.95))}  n={histogram.count}"
+                for priority, histogram in scheduler.waits.items()
+            ]
+            await ctx.send(
+                f"**RCON queue:** {scheduler.in_flight} in flight, max depth {scheduler.max_depth}, "
+                f"{scheduler.superseded} superseded, {scheduler.expired} expired\n```{chr(10).join(lines)}```"
+            )
+
+        @self.command(name='metrics')
+        @requires_admin()
+        @handle_errors()
+        async def metrics_summary(ctx: commands.Context):
+            """Latency of RCON, status updates, panel edits, buttons and the event loop"""
+            lines = []
+            for name, labels, histogram in metrics.histograms():
+                if not histogram.count:
+                    continue
+                name = name.removeprefix(f"{metrics.namespace}_").removesuffix('_seconds')
+                if labels:
+                    name += f"[{','.join(labels.values())}]"
+                top = histogram.buckets[-1]
+                lines.append(
+                    f"{name:<36} n={histogram.count:<6} p50 {_ms(histogram.quantile(0.5), top):<8} "
+                    f"p99 {_ms(histogram.quantile(0.99), top):<8} max {histogram.max * 1000:.0f}ms"
+                )
+            text = "\n".join(lines) or "No samples yet"
+            if len(text) > 1900:
+                text = text[:1900].rsplit("\n", 1)[0] + "\n…"
+            await ctx.send(f"**Metrics**\n```{text}```")
+
+        @self.command(name='backups')
+        @handle_errors()
+        async def backups(ctx: commands.Context, server_name: str = None):
+            """List save backups (fleet mode: !backups <server>)"""
+            store = self._backup_store(self._resolve_server(server_name))
+            snapshots = await asyncio.to_thread(store.list_snapshots)
+            stats = await asyncio.to_thread(store.stats)
+            lines = [
+                f"{s['id']}  {s['size'] / 1024 ** 2:.1f} MB"
+                for s in snapshots[:15]
+            ]
+            await ctx.send(
+                f"**Backups:** {stats.snapshots} snapshots, "
+                f"{stats.logical_bytes / 1024 ** 2:.0f} MB stored in "
+                f"{stats.stored_bytes / 1024 ** 2:.0f} MB ({stats.dedup_ratio:.1f}x)\n"
+                f"```{chr(10).join(lines) or 'None'}```"
+            )
+
+        @self.command(name='restore')
+        @requires_admin()
+        @handle_errors()
+        async def restore(ctx: commands.Context, *args: str):
+            """Restore a backup into the saves folder: !restore <snapshot> [name] (fleet mode: !restore <server> <snapshot> [name])"""
+            if self.fleet_mode:
+                server = self._resolve_server(args[0] if args else None)
+                args = args[1:]
+            else:
+                server = default_server
+            if not args:
+                raise FactorioBotError("Which snapshot? See !backups")
+            snapshot = args[0]
+            result = await self._backup_store(server).restore(snapshot, args[1] if len(args) > 1 else None)
+            await ctx.send(
+                f"♻️ Restored `{snapshot}` as `{result.path.name}` "
+                f"({result.size / 1024 ** 2:.1f} MB in {result.seconds:.1f}s)"
+            )
+
+    def _on_server_ready(self, server: ServerContext) -> None:
+        """Refresh the panel as soon as the server is in game"""
+        server.monitor.cache.invalidate()
+        if server.status_updater:
+            server.status_updater.boost(expect_online=True)
+
+    def _on_server_exit(self, server: ServerContext, code: int, crashed: bool) -> None:
+        """Refresh the panel and report crashes"""
+        server.monitor.cache.invalidate()
+        if server.status_updater:
+            server.status_updater.boost(expect_online=False)
+        channel = self.get_channel(server.channel_id)
+        if crashed and channel:
+            name = f"{server.name} " if server.name else ""
+            self._notify(channel, f"💥 Factorio server {name}crashed (exit code {code})")
+
+    def _notify(self, channel: discord.abc.Messageable, message: str) -> None:
+        """Post a message from a synchronous callback, in the background"""
+        task = asyncio.create_task(self._send_notice(channel, message))
+        self._notices.add(task)
+        task.add_done_callback(self._notices.discard)
+
+    @staticmethod
+    async def _send_notice(channel: discord.abc.Messageable, message: str) -> None:
+        try:
+            await channel.send(message)
+        except discord.HTTPException as e:
+            logger.error(f"Could not post to {channel}: {e} ({message!r})")
+
+    def _on_lag(self, server: ServerContext, ups: float, lagging: bool) -> None:
+        """Report UPS staying low, and its recovery"""
+        channel = self.get_channel(server.channel_id)
+        if not channel:
+            return
+        name = f"{server.name} " if server.name else ""
+        if lagging:
+            message = (
+                f"🐢 Factorio server {name}is running at {ups:.0f} UPS "
+                f"(below {Config.UPS_ALERT_THRESHOLD:.0f} for {Config.UPS_ALERT_AFTER / 60:.0f} min)"
+            )
+        else:
+            message = f"✅ Factorio server {name}is back to {ups:.0f} UPS"
+        self._notify(channel, message)
+
+    def _on_log_live(self, live: bool) -> None:
+        """Poll at the reconciliation rate only while player events really stream in from the log"""
+        if not Config.FOLLOW_SERVER_LOG or not self.status_updater:
+            return
+        self.status_updater.set_online_interval(
+            Config.STATUS_RECONCILE_INTERVAL if live else Config.STATUS_UPDATE_INTERVAL
+        )
+
+    def _on_log_event(self, event: LogEvent) -> None:
+        """Push joins/leaves from the server log straight to the panel, and chat to the bridge"""
+        if event.type is LogEventType.CHAT and self.chat_bridge:
+            self.chat_bridge.on_game_chat(event.player, event.message)
+        status = ServerMonitor.apply_event(event)
+        if status and self.status_updater:
+            self.status_updater.push_status(status)
+
     async def on_ready(self) -> None:
         """Bot startup handler"""
         logger.info(f'Logged in as {self.user}')
-        
-        # Load persisted state
-        load_state()
-        
-        # Ensure single control panel exists
-        await self._ensure_single_panel()
-        
+        # Gateway reconnects fire on_ready again; everything below is already running (or starting)
+        if self._bootstrapped or self._bootstrapping:
+            return
+        self._bootstrapping = True
+        try:
+            await self._bootstrap()
+        finally:
+            self._bootstrapping = False
+
+    async def _bootstrap(self) -> None:
+        """Post or find the panels, then start the background tasks"""
+        connected = time.monotonic()
+
+        self.loop_lag.start()
+        if self.metrics_server:
+            await self.metrics_server.start()
+
+        # Load persisted state once: panels, world names and servers left running
+        if not self._state_loaded:
+            load_state()
+            for server in self.servers.values():
+                server.restore_state()
+            self._state_loaded = True
+
+        # Panels first: a placeholder only needs Discord, the first poll fills it in.
+        # If this raises (missing channel, Discord hiccup) the next on_ready tries again
+        if self.fleet_mode:
+            await self._ensure_fleet_panels()
+        else:
+            await self._ensure_single_panel()
+        self._bootstrapped = True
+        self.panel_ready = time.monotonic() - self._created
+        logger.info(
+            f"Control panel ready {self.panel_ready:.2f}s after startup "
+            f"({time.monotonic() - connected:.2f}s after connecting)"
+        )
+
+        await asyncio.gather(*(server.history.start() for server in self.servers.values()))
+        await session_store.start()
+
+        if self.fleet_mode:
+            await self._start_fleet()
+            return
+
         # Start status updater
         self.status_updater = StatusUpdater(self)
 
+        # Index saves off the event loop and watch for new ones
+        await save_catalog.start()
+
+        if self.chat_bridge:
+            await self.chat_bridge.start()
+
+        # Live player events; polling drops to a reconciliation rate once the log streams (_on_log_live)
+        if Config.FOLLOW_SERVER_LOG:
+            self.log_follower.start()
+        elif self.chat_bridge:
+            # In-game chat is only in the log
+            self.log_follower.start()
+
     async def _ensure_single_panel(self) -> None:
         """Guarantee exactly one control panel exists"""
         async with self.panel_lock:
@@ -95,43 +450,75 @@ class FactorioBot(commands.Bot):
             if not channel:
                 raise FactorioBotError("Invalid channel ID")
 
-            # Try to find existing panel
-            if Config.PANEL_MESSAGE_ID:
-                try:
-                    self.status_message = await channel.fetch_message(Config.PANEL_MESSAGE_ID)
-                    return
-                except discord.NotFound:
-                    pass
-
-            # Clean up any existing panels
-            async for message in channel.history(limit=100):
-                if message.author == self.user and message.embeds:
-                    try:
-                        await message.delete()
-                    except discord.NotFound:
-                        continue
-
-            # Create new panel
-            status = ServerMonitor.get_status()
-            self.status_message = await channel.send(
-                embed=generate_status_embed(status),
-                view=ServerControlView()
+            self.status_message = await bootstrap_panel(channel, self.user, Config.PANEL_MESSAGE_ID)
+            if self.status_message.id != Config.PANEL_MESSAGE_ID:
+                Config.PANEL_MESSAGE_ID = self.status_message.id
+                save_state()
+
+    async def _ensure_fleet_panels(self) -> None:
+        """Find or post every fleet panel"""
+        await asyncio.gather(*(self._ensure_fleet_panel(server) for server in self.servers.values()))
+        save_state()
+
+    async def _start_fleet(self) -> None:
+        """Poll all servers on staggered schedules"""
+        servers = list(self.servers.values())
+        # Spread the first polls over one interval so the servers don't poll in lockstep
+        for index, server in enumerate(servers):
+            server.status_updater = StatusUpdater(
+                self,
+                server,
+                start_delay=index * Config.STATUS_UPDATE_INTERVAL / len(servers)
             )
-            Config.PANEL_MESSAGE_ID = self.status_message.id
-            save_state()
+            if server.catalog:
+                await server.catalog.start()
+        logger.info(f"Fleet mode: managing {len(servers)} servers")
+
+    async def _ensure_fleet_panel(self, server: ServerContext) -> None:
+        """Find a fleet server's panel, or post a new one (other panels in the channel are left alone)"""
+        channel = self.get_channel(server.channel_id)
+        if not channel:
+            logger.error(f"Invalid channel ID for {server.name}")
+            return
+
+        server.status_message = await bootstrap_panel(channel, self.user, server.panel_id, server.name, purge=False)
+        server.panel_id = server.status_message.id
 
     async def close(self) -> None:
         """Clean shutdown"""
         logger.info("Shutting down...")
-        if self.status_updater:
-            self.status_updater.stop()
+        await asyncio.gather(*(server.close() for server in self.servers.values()))
+        supervisor.stop()
+        self.log_follower.stop()
+        if self.chat_bridge:
+            self.chat_bridge.stop()
+        save_catalog.stop()
+        self.loop_lag.stop()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        status_history.stop()
+        await session_store.close()
+        await state_store.close()
+        backup_store.close()
+        await RCONClient.close()
         await super().close()
 
+def _ms(seconds: Optional[float], top: float = 10.0) -> str:
+    """
+    Histogram bucket bound for display
+    :param top: The histogram's highest bound, shown for the open bucket
+    """
+    if seconds is None:
+        return "-"
+    return f">{top:g}s" if seconds == float('inf') else f"≤{seconds * 1000:g}ms"
+
 def run_bot():
     """Bot entry point"""
     try:
         bot = FactorioBot()
-        bot.run(Config.TOKEN)
+        # discord.py's own logs go through the same queue instead of a second console handler
+        setup_logger('discord', 'INFO')
+        bot.run(Config.TOKEN, log_handler=None)
     except Exception as e:
         logger.critical(f"Bot crashed: {e}", exc_info=True)
         raise
\ No newline at end of file
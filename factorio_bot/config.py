@@ -1,11 +1,30 @@
+import json
 import os
 import platform
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 load_dotenv( Path(__file__).parent.parent / ".env")
 
+@dataclass
+class ServerSettings:
+    """Connection and path settings for one server in fleet mode"""
+    name: str
+    rcon_host: str
+    rcon_port: int
+    rcon_password: str
+    channel_id: int
+    game_port: Optional[int] = None
+    server_path: Optional[Path] = None  # None: remote server, no start button
+    save_dir: Optional[Path] = None
+
+    @property
+    def local(self) -> bool:
+        return self.server_path is not None
+
+
 class Config:
 # Discord
     TOKEN: str = os.getenv("DISCORD_TOKEN")
@@ -17,42 +36,146 @@ class Config:
     RCON_HOST: str = os.getenv("RCON_HOST", "127.0.0.1")
     RCON_PORT: int = int(os.getenv("RCON_PORT", "27015"))
     RCON_PASSWORD: str = os.getenv("RCON_PASSWORD", "password")
+    RCON_POOL_SIZE: int = int(os.getenv("RCON_POOL_SIZE", "2"))
+    # Circuit breaker: failures before failing fast, and how often/how long to probe the RCON port
+    RCON_BREAKER_THRESHOLD: int = int(os.getenv("RCON_BREAKER_THRESHOLD", "3"))
+    RCON_PROBE_INTERVAL: float = float(os.getenv("RCON_PROBE_INTERVAL", "5"))
+    RCON_PROBE_TIMEOUT: float = float(os.getenv("RCON_PROBE_TIMEOUT", "0.5"))
+    # Commands sent at once; the rest queue by priority (admin actions, then user commands, then polling)
+    RCON_MAX_IN_FLIGHT: int = int(os.getenv("RCON_MAX_IN_FLIGHT", "2"))
     
     # Bot Settings
     COMMAND_PREFIX: str = os.getenv("COMMAND_PREFIX", "!")
     STATUS_UPDATE_INTERVAL: int = int(os.getenv("STATUS_UPDATE_INTERVAL", "25"))
+    # How long (in seconds) a status is shared between !status, !players and the panel
+    STATUS_CACHE_TTL: float = float(os.getenv("STATUS_CACHE_TTL", "5"))
+    # Adaptive polling: fast interval after button actions, for at most STATUS_FAST_WINDOW seconds,
+    # and the longest backoff while the server is offline
+    STATUS_FAST_INTERVAL: float = float(os.getenv("STATUS_FAST_INTERVAL", "3"))
+    STATUS_FAST_WINDOW: float = float(os.getenv("STATUS_FAST_WINDOW", "120"))
+    STATUS_OFFLINE_MAX_INTERVAL: float = float(os.getenv("STATUS_OFFLINE_MAX_INTERVAL", "120"))
+    # Follow factorio-current.log for live join/leave events; polling then only reconciles
+    FOLLOW_SERVER_LOG: bool = os.getenv("FOLLOW_SERVER_LOG", "true").lower() in ("1", "true", "yes")
+    LOG_POLL_INTERVAL: float = float(os.getenv("LOG_POLL_INTERVAL", "0.5"))
+    STATUS_RECONCILE_INTERVAL: float = float(os.getenv("STATUS_RECONCILE_INTERVAL", "120"))
+    # Panel edits: burst size, seconds per regained edit, and how long an unchanged panel may go unedited
+    PANEL_EDIT_BURST: int = int(os.getenv("PANEL_EDIT_BURST", "2"))
+    PANEL_EDIT_INTERVAL: float = float(os.getenv("PANEL_EDIT_INTERVAL", "5"))
+    PANEL_MAX_STALENESS: int = int(os.getenv("PANEL_MAX_STALENESS", "300"))
+    # UPS is measured from game.tick on every poll and smoothed over about this many seconds
+    UPS_SMOOTHING: float = float(os.getenv("UPS_SMOOTHING", "60"))
+    # Alert in the channel when UPS stays below the threshold (0 disables) for this many seconds
+    UPS_ALERT_THRESHOLD: float = float(os.getenv("UPS_ALERT_THRESHOLD", "45"))
+    UPS_ALERT_AFTER: float = float(os.getenv("UPS_ALERT_AFTER", "300"))
+
+    # Chat bridge between the game and this channel (0 disables); in-game chat goes through a webhook
+    # (CHAT_WEBHOOK_URL, or one the bot creates) at most CHAT_WEBHOOK_BURST messages per burst, one more
+    # every CHAT_WEBHOOK_INTERVAL seconds; Discord messages reach the game at most once per CHAT_FLUSH_INTERVAL
+    CHAT_CHANNEL_ID: int = int(os.getenv("CHAT_CHANNEL_ID", "0"))
+    CHAT_WEBHOOK_URL: Optional[str] = os.getenv("CHAT_WEBHOOK_URL") or None
+    CHAT_WEBHOOK_BURST: int = int(os.getenv("CHAT_WEBHOOK_BURST", "5"))
+    CHAT_WEBHOOK_INTERVAL: float = float(os.getenv("CHAT_WEBHOOK_INTERVAL", "2"))
+    CHAT_FLUSH_INTERVAL: float = float(os.getenv("CHAT_FLUSH_INTERVAL", "0.5"))
 
     # Game port (obviously)
     GAME_PORT : int = int(os.getenv("GAME_PORT", "34197"))
 
     
+    # Restart the server automatically if it crashes
+    SERVER_AUTO_RESTART: bool = os.getenv("SERVER_AUTO_RESTART", "false").lower() in ("1", "true", "yes")
+    SERVER_RESTART_MAX: int = int(os.getenv("SERVER_RESTART_MAX", "5"))
+    SERVER_RESTART_BACKOFF: float = float(os.getenv("SERVER_RESTART_BACKOFF", "10"))
+    # Longest wait (in seconds) for a save to finish before giving up
+    SAVE_TIMEOUT: float = float(os.getenv("SAVE_TIMEOUT", "300"))
+
     # Paths (with validation)
     SERVER_PATH: Path = Path(os.getenv("SERVER_PATH", ".")).absolute()
     SERVER_BAT: Path = SERVER_PATH / "server.bat"
     SAVE_GAMES_DIR: Path = (SERVER_PATH / os.getenv("SAVE_GAMES_DIR", "saves")).absolute()
+    # Fallback rescan interval for the save catalog (in seconds)
+    SAVE_CATALOG_POLL_INTERVAL: float = float(os.getenv("SAVE_CATALOG_POLL_INTERVAL", "30"))
+    SERVER_LOG_FILE: Path = (SERVER_PATH / os.getenv("SERVER_LOG_FILE", "factorio-current.log")).absolute()
+
+    # Fleet mode: a JSON file listing several servers, each with its own panel
+    FLEET_FILE: Optional[Path] = Path(os.getenv("FLEET_FILE")).absolute() if os.getenv("FLEET_FILE") else None
+
+    # Deduplicating save backups taken after every save
+    BACKUP_ENABLED: bool = os.getenv("BACKUP_ENABLED", "true").lower() in ("1", "true", "yes")
+    BACKUP_DIR: Path = Path(os.getenv("BACKUP_DIR", "backups")).absolute()
+    BACKUP_WORKERS: int = int(os.getenv("BACKUP_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # Retention per save: the newest N snapshots, plus one per day for this many days
+    BACKUP_KEEP_LAST: int = int(os.getenv("BACKUP_KEEP_LAST", "10"))
+    BACKUP_KEEP_DAILY: int = int(os.getenv("BACKUP_KEEP_DAILY", "7"))
+
+    # Player count, online and UPS history for !stats, downsampled to minutes and hours on disk
+    HISTORY_DIR: Path = Path(os.getenv("HISTORY_DIR", "history")).absolute()
+    # Show a 24h player sparkline on the panel
+    PANEL_PLAYER_TREND: bool = os.getenv("PANEL_PLAYER_TREND", "false").lower() in ("1", "true", "yes")
+    # Player sessions for !playtime, !top and !peak, written in batches every SESSIONS_FLUSH_INTERVAL seconds
+    SESSIONS_DB: Path = Path(os.getenv("SESSIONS_DB", "sessions.db")).absolute()
+    SESSIONS_FLUSH_INTERVAL: float = float(os.getenv("SESSIONS_FLUSH_INTERVAL", "10"))
+    # Panels, world names and the server process, kept across bot restarts; changes are written
+    # together STATE_FLUSH_DELAY seconds after the first one
+    STATE_DB: Path = Path(os.getenv("STATE_DB", "bot_state.db")).absolute()
+    STATE_FLUSH_DELAY: float = float(os.getenv("STATE_FLUSH_DELAY", "0.5"))
+    # World name, version, mods and size of each save for the Start picker, read once per file
+    SAVE_METADATA_CACHE: Path = Path(os.getenv("SAVE_METADATA_CACHE", "save_metadata.json")).absolute()
+
+    # Bot logs: directory, level, 'text' or 'json' (one JSON object per line), and gzip rotated files
+    LOG_DIR: Path = Path(os.getenv("LOG_DIR", "logs")).absolute()
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text").lower()
+    LOG_COMPRESS: bool = os.getenv("LOG_COMPRESS", "true").lower() in ("1", "true", "yes")
+
+    # Prometheus endpoint at http://METRICS_HOST:METRICS_PORT/metrics (0 disables; !metrics works regardless)
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+    # How often (in seconds) the event loop's wake-up delay is sampled
+    LOOP_LAG_INTERVAL: float = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
 
     @classmethod
     def get_all_saves(cls) -> list[tuple[Path, str]]:
-        """Get all saves with formatted display strings"""
-        saves = []
-        for save in sorted(
-            cls.SAVE_GAMES_DIR.glob("*.zip*"),  # Includes .zip.autosave
-            key=lambda f: f.stat().st_mtime,
-            reverse=True  # Newest first
-        ):
-            timestamp = datetime.fromtimestamp(save.stat().st_mtime)
-            saves.append((
-                save,
-                f"{save.stem} ({timestamp:%Y-%m-%d %H:%M})"
+        """Get all saves with formatted display strings, newest first"""
+        # Imported here: the catalog module itself depends on Config
+        from .utils.save_catalog import save_catalog
+        return save_catalog.get_all_saves()
+
+    @classmethod
+    def load_fleet(cls, path: Path) -> List[ServerSettings]:
+        """
+        Read the fleet file. Missing keys fall back to the single-server settings.
+        :raises ValueError: If the file is malformed or names repeat
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        servers = []
+        for entry in data.get('servers', []):
+            server_path = Path(entry['server_path']).absolute() if entry.get('server_path') else None
+            save_dir = entry.get('save_dir', 'saves')
+            servers.append(ServerSettings(
+                name=entry['name'],
+                rcon_host=entry.get('rcon_host', cls.RCON_HOST),
+                rcon_port=int(entry['rcon_port']),
+                rcon_password=entry.get('rcon_password', cls.RCON_PASSWORD),
+                channel_id=int(entry.get('channel_id', cls.CHANNEL_ID)),
+                game_port=int(entry['game_port']) if 'game_port' in entry else None,
+                server_path=server_path,
+                save_dir=(server_path / save_dir).absolute() if server_path else None
             ))
-        return saves
+
+        names = [server.name for server in servers]
+        if not servers or len(set(names)) != len(names):
+            raise ValueError(f"{path} must list servers with unique names")
+        return servers
 
     @classmethod
-    def get_factorio_binary(cls) -> Path:
+    def get_factorio_binary(cls, server_path: Optional[Path] = None) -> Path:
+        server_path = server_path or cls.SERVER_PATH
         if platform.system() == "Windows":
-            exe = cls.SERVER_PATH / "bin/x64/factorio.exe"
+            exe = server_path / "bin/x64/factorio.exe"
         else:
-            exe = cls.SERVER_PATH / "bin/x64/factorio"
+            exe = server_path / "bin/x64/factorio"
 
         if not exe.exists():
             raise FileNotFoundError(f"Factorio binary not found at {exe}")
@@ -75,3 +198,5 @@ class Config:
         cls.SAVE_GAMES_DIR.mkdir(exist_ok=True)
 
     PANEL_MESSAGE_ID: Optional[int] = None
+    # Panel message per fleet server name
+    FLEET_PANEL_IDS: Dict[str, int] = {}
@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 class ButtonIDs(Enum):
     START_SERVER = "start_server"
@@ -10,5 +10,21 @@ class StatusEmoji(Enum):
     OFFLINE = "🔴"
     STARTING = "🟡"
 
+class BreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+class LogEventType(Enum):
+    JOIN = "JOIN"
+    LEAVE = "LEAVE"
+    CHAT = "CHAT"
+
+class CommandPriority(IntEnum):
+    """RCON scheduling classes, most urgent first"""
+    ADMIN = 0       # start/stop/save
+    USER = 1        # commands and chat
+    BACKGROUND = 2  # status polling
+
 RCON_TIMEOUT = 10  # seconds
 STATUS_UPDATE_INTERVAL = 25  # seconds
\ No newline at end of file
@@ -8,4 +8,8 @@ class RCONError(FactorioBotError):
 
 class ServerControlError(FactorioBotError):
     """Server start/stop operation failed"""
+    pass
+
+class BackupError(FactorioBotError):
+    """Save backup or restore failed"""
     pass
\ No newline at end of file
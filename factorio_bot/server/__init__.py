@@ -4,5 +4,9 @@ Server management module for Factorio operations
 from .monitor import ServerMonitor
 from .controller import ServerController
 from .models import ServerStatus
+from .supervisor import ServerSupervisor
+from .log_follower import LogFollower
+from .save_tracker import SaveTracker
+from .history import StatusHistory
 
-__all__ = ['ServerMonitor', 'ServerController', 'ServerStatus']
\ No newline at end of file
+__all__ = ['ServerMonitor', 'ServerController', 'ServerStatus', 'ServerSupervisor', 'LogFollower', 'SaveTracker', 'StatusHistory']
\ No newline at end of file
@@ -0,0 +1,132 @@
+import discord
+from typing import Any, Optional
+from ..config import Config, ServerSettings
+from ..R_con import RCONClient, RCONEndpoint
+from ..utils.backup import BackupStore, backup_store
+from ..utils.save_catalog import SaveCatalog, save_catalog
+from ..utils.state_store import state_store
+from .history import StatusHistory
+from .sessions import SessionTracker, session_store
+from .monitor import ServerMonitor, StatusSource
+from .save_tracker import SaveTracker, save_tracker
+from .supervisor import ServerSupervisor, supervisor
+
+
+class ServerContext:
+    """
+    Everything the bot keeps per Factorio server: RCON access, status
+    cache, process supervisor, save tracking and the Discord panel.
+
+    Without settings it wraps the shared objects for the server configured
+    in .env; fleet mode builds one per entry in FLEET_FILE.
+    """
+
+    def __init__(self, settings: Optional[ServerSettings] = None):
+        self.settings = settings
+        self._world_name: Optional[str] = None
+        self.status_message: Optional[discord.Message] = None
+        self.status_updater: Optional[Any] = None  # StatusUpdater, set by the bot
+
+        if settings is None:
+            self.rcon = RCONClient
+            self.supervisor = supervisor
+            self.catalog = save_catalog
+            self.tracker = save_tracker
+            self.backups = backup_store
+            self.monitor = ServerMonitor.source
+            self.history = self.monitor.history
+            self.sessions = self.monitor.sessions
+            return
+
+        self.rcon = RCONEndpoint(
+            settings.rcon_host,
+            settings.rcon_port,
+            settings.rcon_password,
+            Config.RCON_POOL_SIZE
+        )
+        self.supervisor = ServerSupervisor(settings)
+        self.catalog = SaveCatalog(settings.save_dir, Config.SAVE_CATALOG_POLL_INTERVAL) if settings.local else None
+        self.tracker = SaveTracker(Config.SAVE_TIMEOUT, self.rcon, self.supervisor, settings.save_dir, self.catalog)
+        self.backups = BackupStore(
+            Config.BACKUP_DIR / settings.name,
+            Config.BACKUP_WORKERS,
+            Config.BACKUP_KEEP_LAST,
+            Config.BACKUP_KEEP_DAILY,
+            settings.save_dir,
+            self.catalog
+        ) if settings.local else None
+        self.history = StatusHistory(Config.HISTORY_DIR / settings.name)
+        self.sessions = SessionTracker(session_store, settings.name)
+        self.monitor = StatusSource(
+            self.rcon,
+            lambda: self.world_name or "Unknown World",
+            lambda: self.supervisor.uptime,
+            Config.STATUS_CACHE_TTL,
+            self.history,
+            self.sessions
+        )
+
+    @property
+    def name(self) -> Optional[str]:
+        """Fleet server name (None for the configured server)"""
+        return self.settings.name if self.settings else None
+
+    @property
+    def channel_id(self) -> int:
+        return self.settings.channel_id if self.settings else Config.CHANNEL_ID
+
+    @property
+    def world_name(self) -> Optional[str]:
+        return Config.CURRENT_WORLD_NAME if self.settings is None else self._world_name
+
+    @world_name.setter
+    def world_name(self, value: Optional[str]) -> None:
+        if self.settings is None:
+            Config.CURRENT_WORLD_NAME = value
+        else:
+            self._world_name = value
+        state_store.set(self._state_key('world'), value)
+
+    def _state_key(self, kind: str) -> str:
+        return kind if self.settings is None else f'{kind}:{self.settings.name}'
+
+    def restore_state(self) -> None:
+        """Pick up the world and server process recorded by the last run, without asking the server"""
+        world = state_store.get(self._state_key('world'))
+        if self.settings is None:
+            Config.CURRENT_WORLD_NAME = world
+        else:
+            self._world_name = world
+        self.supervisor.restore()
+
+    @property
+    def panel_id(self) -> Optional[int]:
+        """Persisted panel message ID"""
+        if self.settings is None:
+            return Config.PANEL_MESSAGE_ID
+        return Config.FLEET_PANEL_IDS.get(self.settings.name)
+
+    @panel_id.setter
+    def panel_id(self, value: Optional[int]) -> None:
+        if self.settings is None:
+            Config.PANEL_MESSAGE_ID = value
+        elif value is None:
+            Config.FLEET_PANEL_IDS.pop(self.settings.name, None)
+        else:
+            Config.FLEET_PANEL_IDS[self.settings.name] = value
+
+    async def close(self) -> None:
+        if self.status_updater:
+            self.status_updater.stop()
+        self.sessions.close_all()
+        if self.settings is None:
+            return  # the shared objects are closed by the bot
+        self.supervisor.stop()
+        self.history.stop()
+        if self.catalog:
+            self.catalog.stop()
+        await self.rcon.close()
+
+
+# The server configured in .env
+default_server = ServerContext()
@@ -1,53 +1,64 @@
-import subprocess
-import platform
 from pathlib import Path
+from typing import Optional
 from ..config import Config
-from ..R_con import RCONClient, RCONCommands
+from ..R_con import RCONCommands
 from ..exceptions import ServerControlError
+from ..constants import CommandPriority
+from .context import ServerContext, default_server
+from .models import SaveResult
 
-class ServerController:
-    @staticmethod
-    def start_server(save_file: Path) -> bool:
-        try:
-            factorio = Config.get_factorio_binary()
-
-            cmd = [
-                str(Config.get_factorio_binary()),
-                "--start-server", str(save_file),
-                "--rcon-port", str(Config.RCON_PORT),
-                "--rcon-password", Config.RCON_PASSWORD,
-                "--port", str(Config.GAME_PORT)
-            ]
+# How long to wait for the server to exit before backing up its last save
+EXIT_WAIT_SECONDS = 60
 
+class ServerController:
+    """Start/stop/save actions; `server` selects a fleet server (default: the configured one)"""
 
-            kwargs = {}
-            if platform.system() == "Windows":
-                kwargs.update({
-                    'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP,
-                    'shell' : True
-                    })
+    @staticmethod
+    def _backup(server: ServerContext, result: SaveResult, after_exit: bool = False) -> None:
+        if Config.BACKUP_ENABLED and server.backups is not None:
+            # The server may write the save again on exit
+            after = server.supervisor.wait_exit(EXIT_WAIT_SECONDS) if after_exit else None
+            server.backups.schedule(result.path, after)
 
-            subprocess.Popen(cmd, **kwargs)
-            
+    @staticmethod
+    async def start_server(save_file: Path, server: Optional[ServerContext] = None) -> bool:
+        """Launch the server under the supervisor"""
+        server = server or default_server
+        try:
+            await server.supervisor.start(save_file)
+            server.monitor.cache.invalidate()
             return True
         except Exception as e:
             raise ServerControlError(f"Start failed:{e}") from e
         
     @staticmethod
-    def stop_server() -> bool:
+    async def stop_server(server: Optional[ServerContext] = None) -> bool:
         """Graceful server shutdown"""
+        server = server or default_server
         try:
-            RCONClient.send(RCONCommands.save())
-            RCONClient.send(RCONCommands.stop())
-            Config.CURRENT_WORLD_NAME = None
+            # Only quit once the save is confirmed on disk
+            result = await server.tracker.save()
+            server.supervisor.expect_exit()
+            await server.rcon.send_async(RCONCommands.stop(), priority=CommandPriority.ADMIN)
+            server.world_name = None
+            server.monitor.cache.invalidate()
+            ServerController._backup(server, result, after_exit=True)
             return True
         except Exception as e:
             raise ServerControlError(f"Failed to stop server: {e}") from e
     
     @staticmethod
-    def save_game(filename: str = None) -> str:
-        """Trigger a manual save"""
+    async def save_game(filename: str = None, server: Optional[ServerContext] = None) -> SaveResult:
+        """
+        Save and wait for the write to finish.
+        Concurrent requests for the same file share one save.
+        """
+        server = server or default_server
         try:
-            return RCONClient.send(RCONCommands.save(filename))
+            result = await server.tracker.save(filename)
+            server.monitor.cache.invalidate()
+            # Callers that joined get the same result; the store skips the repeats
+            ServerController._backup(server, result)
+            return result
         except Exception as e:
-            raise ServerControlError(f"Save failed: {e}") from e
\ No newline at end of file
+            raise ServerControlError(f"Save failed: {e}") from e
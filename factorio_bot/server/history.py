@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Optional
+from ..config import Config
+from .models import ServerStatus
+
+logger = logging.getLogger(__name__)
+
+# Memory per metric is fixed by the ring capacities, however long the bot runs:
+#   1 min  10,080 rows x 20 B (7 days)      = 197 KiB
+#   1 h     2,160 rows x 20 B (90 days)     =  42 KiB
+# i.e. ~239 KiB per metric, ~0.7 MiB per server for players, online and UPS.
+# Single samples only live in the open minute's bucket.
+# Each month of history adds 720 hourly rows = 14 KiB per metric to the
+# .1h file on disk; the .1m file is trimmed back to 7 days once it holds 14.
+MINUTE_CAPACITY = 7 * 24 * 60
+HOUR_CAPACITY = 90 * 24
+
+# How often pending rollups are appended to disk
+FLUSH_INTERVAL = 60.0
+
+MINUTE = 60
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+
+class RollupRing:
+    """
+    Fixed-capacity ring of (bucket start, min, max, sum, count) rows,
+    stored column-wise in typed arrays (20 bytes per row)
+    """
+
+    ROW = struct.Struct('<IfffI')
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.start = array('I', bytes(4 * capacity))
+        self.min = array('f', bytes(4 * capacity))
+        self.max = array('f', bytes(4 * capacity))
+        self.sum = array('f', bytes(4 * capacity))
+        self.count = array('I', bytes(4 * capacity))
+        self.size = 0
+        self._head = 0  # next slot to write
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, start: int, low: float, high: float, total: float, count: int) -> None:
+        i = self._head
+        self.start[i], self.min[i], self.max[i], self.sum[i], self.count[i] = start, low, high, total, count
+        self._head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _slot(self, index: int) -> int:
+        """Physical slot of the index-th oldest row"""
+        return (self._head - self.size + index) % self.capacity
+
+    def rows_since(self, since: int) -> List[tuple[int, float, float, float, int]]:
+        """Rows with start >= since, oldest first (binary search, no full scan)"""
+        starts = _RingView(self)
+        first = bisect_left(starts, since)
+        rows = []
+        for index in range(first, self.size):
+            i = self._slot(index)
+            rows.append((self.start[i], self.min[i], self.max[i], self.sum[i], self.count[i]))
+        return rows
+
+    def to_bytes(self) -> bytes:
+        """All rows in file format, oldest first"""
+        return b''.join(self.ROW.pack(*row) for row in self.rows_since(0))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self.start, self.min, self.max, self.sum, self.count))
+
+
+class _RingView:
+    """Sequence view of a ring's start times in logical order, for bisect"""
+
+    def __init__(self, ring: RollupRing):
+        self.ring = ring
+
+    def __len__(self) -> int:
+        return self.ring.size
+
+    def __getitem__(self, index: int) -> int:
+        return self.ring.start[self.ring._slot(index)]
+
+
+class _Bucket:
+    """Rollup being accumulated for the current minute or hour"""
+
+    __slots__ = ('start', 'min', 'max', 'sum', 'count')
+
+    def __init__(self):
+        self.reset(-1)
+
+    def reset(self, start: int) -> None:
+        self.start = start
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.sum = 0.0
+        self.count = 0
+
+    def add(self, low: float, high: float, total: float, count: int) -> None:
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+        self.sum += total
+        self.count += count
+
+    def row(self) -> tuple[int, float, float, float, int]:
+        return self.start, self.min, self.max, self.sum, self.count
+
+
+class MetricHistory:
+    """
+    One metric downsampled samples -> 1 min -> 1 h.
+    Closed minute and hour rows are queued for appending to disk.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.minutes = RollupRing(MINUTE_CAPACITY)
+        self.hours = RollupRing(HOUR_CAPACITY)
+        self._minute = _Bucket()
+        self._hour = _Bucket()
+        self.pending: Dict[str, List[tuple]] = {'1m': [], '1h': []}
+
+    @property
+    def nbytes(self) -> int:
+        return self.minutes.nbytes + self.hours.nbytes
+
+    def add(self, timestamp: int, value: float) -> None:
+        minute = timestamp - timestamp % MINUTE
+        if minute != self._minute.start:
+            self._close_minute()
+            self._minute.reset(minute)
+        self._minute.add(value, value, value, 1)
+
+    def _close_minute(self) -> None:
+        if not self._minute.count:
+            return
+        row = self._minute.row()
+        self.minutes.append(*row)
+        self.pending['1m'].append(row)
+
+        hour = row[0] - row[0] % HOUR
+        if hour != self._hour.start:
+            self._close_hour()
+            self._hour.reset(hour)
+        self._hour.add(*row[1:])
+
+    def _close_hour(self) -> None:
+        if not self._hour.count:
+            return
+        row = self._hour.row()
+        self.hours.append(*row)
+        self.pending['1h'].append(row)
+
+    def points(self, span: int, step: int, now: Optional[int] = None) -> List[Optional[float]]:
+        """
+        Mean value per `step` seconds over the last `span` seconds, oldest first.
+        Reads the hourly tier when `step` is a whole number of hours, the minute
+        tier otherwise, plus the buckets still being filled. None marks gaps.
+        """
+        now = int(time.time()) if now is None else now
+        origin = now - now % step - span + step
+        ring = self.hours if step % HOUR == 0 else self.minutes
+        sums = [0.0] * (span // step)
+        counts = [0] * (span // step)
+
+        rows = ring.rows_since(origin - origin % (HOUR if ring is self.hours else MINUTE))
+        rows += self._open_rows(ring is self.hours)
+        for start, _, _, total, count in rows:
+            index = (start - origin) // step
+            if count and 0 <= index < len(sums):
+                sums[index] += total
+                counts[index] += count
+        return [s / c if c else None for s, c in zip(sums, counts)]
+
+    def _open_rows(self, with_hour: bool) -> List[tuple[int, float, float, float, int]]:
+        """Buckets still being filled; the open minute is not yet part of the open hour"""
+        buckets = (self._hour, self._minute) if with_hour else (self._minute,)
+        return [bucket.row() for bucket in buckets if bucket.count]
+
+    def summary(self, span: int, now: Optional[int] = None) -> Optional[tuple[float, float, float]]:
+        """(min, mean, max) over the last `span` seconds from the hourly tier"""
+        now = int(time.time()) if now is None else now
+        since = now - span
+        rows = self.hours.rows_since(since - since % HOUR) + self._open_rows(True)
+        if not rows:
+            return None
+        count = sum(row[4] for row in rows)
+        return min(row[1] for row in rows), sum(row[3] for row in rows) / count, max(row[2] for row in rows)
+
+    # Persistence
+
+    def _path(self, directory: Path, tier: str) -> Path:
+        return directory / f"{self.name}.{tier}"
+
+    def load(self, directory: Path) -> None:
+        """Read the newest rows of each tier back into the rings (blocking)"""
+        for tier, ring in (('1m', self.minutes), ('1h', self.hours)):
+            path = self._path(directory, tier)
+            try:
+                with open(path, 'rb') as f:
+                    size = f.seek(0, os.SEEK_END)
+                    rows = size // RollupRing.ROW.size
+                    keep = min(rows, ring.capacity)
+                    f.seek((rows - keep) * RollupRing.ROW.size)
+                    data = f.read(keep * RollupRing.ROW.size)
+            except FileNotFoundError:
+                continue
+            for row in RollupRing.ROW.iter_unpack(data):
+                ring.append(*row)
+
+    def flush(self, directory: Path) -> None:
+        """Append closed rollups to disk (blocking)"""
+        for tier, rows in self.pending.items():
+            if not rows:
+                continue
+            self.pending[tier] = []
+            path = self._path(directory, tier)
+            with open(path, 'ab') as f:
+                f.write(b''.join(RollupRing.ROW.pack(*row) for row in rows))
+                size = f.tell()
+            # Minutes older than the ring are already summarised in the hourly file
+            if tier == '1m' and size > 2 * self.minutes.capacity * RollupRing.ROW.size:
+                tmp = path.with_suffix('.tmp')
+                with open(tmp, 'wb') as f:
+                    f.write(self.minutes.to_bytes())
+                os.replace(tmp, path)
+
+
+class StatusHistory:
+    """Player count, online/offline and UPS history for one server, fed by each status poll"""
+
+    METRICS = ('players', 'online', 'ups')
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.metrics: Dict[str, MetricHistory] = {name: MetricHistory(name) for name in self.METRICS}
+        self._task: Optional[asyncio.Task] = None
+
+    def __getitem__(self, name: str) -> MetricHistory:
+        return self.metrics[name]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(metric.nbytes for metric in self.metrics.values())
+
+    def record(self, status: ServerStatus, timestamp: Optional[int] = None) -> None:
+        timestamp = int(status.last_updated.timestamp()) if timestamp is None else timestamp
+        self.metrics['online'].add(timestamp, 1.0 if status.online else 0.0)
+        # No player count while offline, so the sparkline shows a gap
+        if status.online:
+            self.metrics['players'].add(timestamp, float(status.player_count))
+        if status.ups is not None:
+            self.metrics['ups'].add(timestamp, status.ups)
+
+    def flush(self) -> None:
+        """Write pending rollups (blocking)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for metric in self.metrics.values():
+            metric.flush(self.directory)
+
+    async def start(self) -> None:
+        """Load history off the event loop and flush it periodically"""
+        if self._task is not None and not self._task.done():
+            return
+        for metric in self.metrics.values():
+            await asyncio.to_thread(metric.load, self.directory)
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await asyncio.to_thread(self.flush)
+            except OSError as e:
+                logger.error(f"Could not write status history: {e}")
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+        try:
+            self.flush()
+        except OSError as e:
+            logger.error(f"Could not write status history: {e}")
+
+
+# History of the configured server, stored next to bot_state.db
+status_history = StatusHistory(Config.HISTORY_DIR)
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import re
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Callable, Iterable, Iterator, List, Optional
+from ..constants import LogEventType
+from .models import LogEvent
+
+logger = logging.getLogger(__name__)
+
+# 2024-05-01 18:22:03 [JOIN] alice joined the game
+# 2024-05-01 18:22:10 [CHAT] alice: hello
+EVENT_PATTERN = re.compile(
+    r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) \[(JOIN|LEAVE|CHAT)\] ([^:]+?)(?: joined the game| left the game|(?: \[[^\]]*\]| \(shout\))?: (.*))$"
+)
+
+# Largest read at once; each one runs in a worker thread, so a long backlog never holds up the loop
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_line(line: str) -> Optional[LogEvent]:
+    """Parse one log line into a LogEvent, or None if it isn't a player event"""
+    # Cheap prefilter: most lines are engine output without a bracketed tag
+    if '] ' not in line:
+        return None
+    match = EVENT_PATTERN.search(line)
+    if not match:
+        return None
+    stamp, kind, player, message = match.groups()
+    return LogEvent(
+        type=LogEventType(kind),
+        player=player,
+        timestamp=datetime.fromisoformat(stamp),
+        message=message
+    )
+
+
+def parse_events(lines: Iterable[str]) -> Iterator[LogEvent]:
+    """Generator stage: lines in, player events out"""
+    for line in lines:
+        event = parse_line(line)
+        if event is not None:
+            yield event
+
+
+def iter_file_lines(path: Path) -> Iterator[str]:
+    """Generator stage: read a whole log file line by line"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            yield line.rstrip('\r\n')
+
+
+def _open_log(path: Path, from_end: bool) -> tuple[BinaryIO, int]:
+    """
+    Open the log at its start or end (blocking)
+    :return: (file, inode)
+    """
+    f = open(path, 'rb')
+    if from_end:
+        f.seek(0, os.SEEK_END)
+    return f, os.fstat(f.fileno()).st_ino
+
+
+def _stat_or_none(path: Path) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+async def follow_lines(
+    path: Path,
+    poll_interval: float,
+    from_end: bool = True,
+    on_missing: Optional[Callable[[], None]] = None
+) -> AsyncIterator[str]:
+    """
+    Yield lines appended to `path`, like `tail -F`.
+    Handles the file being missing, truncated or replaced (Factorio rotates
+    factorio-current.log to factorio-previous.log on every start).
+    File access runs in worker threads, CHUNK_SIZE bytes at a time.
+    :param on_missing: Called whenever the file turns out not to exist
+    """
+    f = None
+    inode = None
+    buffer = b''
+    try:
+        while True:
+            if f is None:
+                try:
+                    f, inode = await asyncio.to_thread(_open_log, path, from_end)
+                except FileNotFoundError:
+                    if on_missing:
+                        on_missing()
+                    from_end = False
+                    await asyncio.sleep(poll_interval)
+                    continue
+                # A file that appears or gets replaced later is read from the start
+                from_end = False
+                buffer = b''
+
+            chunk = await asyncio.to_thread(f.read, CHUNK_SIZE)
+            if chunk:
+                buffer += chunk
+                *lines, buffer = buffer.split(b'\n')
+                for line in lines:
+                    yield line.decode('utf-8', errors='replace').rstrip('\r')
+                continue
+
+            # At EOF: check for rotation or truncation before sleeping
+            stat = await asyncio.to_thread(_stat_or_none, path)
+            if stat is None or stat.st_ino != inode or stat.st_size < f.tell():
+                if stat is None and on_missing:
+                    on_missing()
+                f.close()
+                f = None
+                continue
+            await asyncio.sleep(poll_interval)
+    finally:
+        if f is not None:
+            f.close()
+
+
+class LogFollower:
+    """Streams player events (and raw lines) from the server log to listeners"""
+
+    def __init__(self, path: Path, poll_interval: float):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.events_seen = 0
+        self.live = False  # the file is open and has produced a line
+        self._listeners: List[Callable[[LogEvent], None]] = []
+        self._line_listeners: List[Callable[[str], None]] = []
+        self._live_listeners: List[Callable[[bool], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add_listener(self, callback: Callable[[LogEvent], None]) -> None:
+        self._listeners.append(callback)
+
+    def add_line_listener(self, callback: Callable[[str], None]) -> None:
+        """Subscribe to every line, e.g. to watch for engine messages"""
+        self._line_listeners.append(callback)
+
+    def add_live_listener(self, callback: Callable[[bool], None]) -> None:
+        """Subscribe callback(live) to the log starting to produce lines, or going away"""
+        self._live_listeners.append(callback)
+
+    def _set_live(self, live: bool) -> None:
+        if live == self.live:
+            return
+        self.live = live
+        logger.info(f"Server log {self.path} {'is streaming' if live else 'is missing'}")
+        for callback in self._live_listeners:
+            try:
+                callback(live)
+            except Exception as e:
+                logger.error(f"Log live listener failed: {e}", exc_info=True)
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Following server log {self.path}")
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        try:
+            async for line in follow_lines(self.path, self.poll_interval, on_missing=partial(self._set_live, False)):
+                if not self.live:
+                    self._set_live(True)
+                for callback in self._line_listeners:
+                    try:
+                        callback(line)
+                    except Exception as e:
+                        logger.error(f"Log line listener failed: {e}", exc_info=True)
+                event = parse_line(line)
+                if event is None:
+                    continue
+                self.events_seen += 1
+                for callback in self._listeners:
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        logger.error(f"Log event listener failed: {e}", exc_info=True)
+        finally:
+            self._set_live(False)
@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 from typing import List, Optional
 from datetime import datetime
-from ..constants import StatusEmoji
+from pathlib import Path
+from ..constants import StatusEmoji, BreakerState, LogEventType
 
 @dataclass
 class ServerStatus:
@@ -11,6 +12,18 @@ class ServerStatus:
     players: List[str]
     last_updated: datetime
     uptime: Optional[float] = None  # in seconds
+    game_tick: Optional[int] = None
+    ticks_played: Optional[int] = None
+    game_speed: Optional[float] = None
+    paused: Optional[bool] = None
+    evolution_factor: Optional[float] = None  # 0.0 - 1.0
+    current_research: Optional[str] = None
+    research_progress: Optional[float] = None  # 0.0 - 1.0
+    breaker_state: Optional[BreakerState] = None
+    breaker_changed: Optional[datetime] = None
+    ups: Optional[float] = None  # smoothed updates per second, None while paused or unknown
+    rcon_rtt: Optional[float] = None  # seconds for the status query round trip
+    player_trend: Optional[List[Optional[float]]] = None  # hourly means over 24h, oldest first
     
     @property
     def status_emoji(self) -> str:
@@ -18,4 +31,33 @@ class ServerStatus:
     
     @property
     def player_count(self) -> int:
-        return len(self.players)
\ No newline at end of file
+        return len(self.players)
+
+    @property
+    def playtime(self) -> Optional[float]:
+        """Map playtime in seconds (60 ticks per second)"""
+        return self.ticks_played / 60 if self.ticks_played is not None else None
+
+@dataclass
+class LogEvent:
+    """A player event read from the server log"""
+    type: LogEventType
+    player: str
+    timestamp: Optional[datetime] = None
+    message: Optional[str] = None  # chat text
+
+@dataclass
+class PlayerTime:
+    """A player's total playtime on one server"""
+    player: str
+    seconds: float
+    sessions: int
+    last_seen: float  # unix time
+
+@dataclass
+class SaveResult:
+    """A save the server has finished writing"""
+    path: Optional[Path]
+    duration: float  # seconds the server spent saving
+    confirmed_by: str  # 'log' or 'file'
+    joined: int = 0  # extra callers that shared this save
\ No newline at end of file
@@ -1,49 +1,383 @@
-from typing import Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from datetime import datetime
+import asyncio
+import dataclasses
+import json
+import time
+from functools import partial
 from ..config import Config
 from ..R_con import RCONClient, RCONCommands
-from .models import ServerStatus
+from .models import ServerStatus, LogEvent
 from ..exceptions import RCONError
+from ..constants import CommandPriority, LogEventType
+from .supervisor import supervisor
+from .history import DAY, HOUR, StatusHistory, status_history
+from .tick_rate import LagAlert, TickRate
+from ..utils.metrics import metrics, timed
+from .sessions import SessionTracker, session_store
 import logging
 
 logger = logging.getLogger(__name__)
 
+# RCON queue key of the status probe, so a newer poll replaces a queued one
+STATUS_KEY = 'status'
+
+status_fetch_timer = metrics.timer('status_fetch', "Status query (probe, fallback and bookkeeping)")
+
+class StatusCache:
+    """
+    Short-lived cache for the server status.
+    Concurrent callers share a single in-flight query (single-flight).
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._status: Optional[ServerStatus] = None
+        self._fetched_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+        self._generation = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.invalidations = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Cache counters for monitoring"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared': self.shared,
+            'invalidations': self.invalidations,
+        }
+
+    async def get(
+        self,
+        fetch: Callable[[], Awaitable[ServerStatus]],
+        max_age: Optional[float] = None
+    ) -> ServerStatus:
+        """
+        Return a cached status no older than `max_age` seconds (default: TTL),
+        otherwise join or start a query
+        """
+        max_age = self.ttl if max_age is None else max_age
+        if self._status is not None and time.monotonic() - self._fetched_at < max_age:
+            self.hits += 1
+            return self._status
+
+        if self._inflight is None:
+            self.misses += 1
+            self._inflight = asyncio.create_task(self._refresh(fetch))
+        else:
+            self.shared += 1
+        # Shield so one caller giving up doesn't cancel the query for everyone
+        return await asyncio.shield(self._inflight)
+
+    async def _refresh(self, fetch: Callable[[], Awaitable[ServerStatus]]) -> ServerStatus:
+        generation = self._generation
+        task = asyncio.current_task()
+        try:
+            status = await fetch()
+        finally:
+            if self._inflight is task:
+                self._inflight = None
+        # Don't cache a result that was started before an invalidation
+        if generation == self._generation:
+            self._status = status
+            self._fetched_at = time.monotonic()
+        return status
+
+    def peek(self) -> Optional[ServerStatus]:
+        """Return the cached status regardless of its age"""
+        return self._status
+
+    def replace(self, status: ServerStatus) -> None:
+        """Swap in an updated copy of the cached status without extending its TTL"""
+        self._status = status
+
+    def invalidate(self) -> None:
+        """Drop the cached status so the next caller queries the server"""
+        self.invalidations += 1
+        self._generation += 1
+        self._status = None
+        self._inflight = None
+
 class ServerMonitor:
     """Handles server status checks and health monitoring"""
+
+    # Set below, once StatusSource is defined
+    source: 'StatusSource'
+    cache: StatusCache
     
     @staticmethod
     def get_world_name() -> str:
         """Get the current world name from config"""
         return Config.CURRENT_WORLD_NAME or "Unknown World"
 
+    @staticmethod
+    def parse_players(players_raw: Optional[str]) -> List[str]:
+        """Parse the output of /players into a list of player lines"""
+        return [
+            line.strip() 
+            for line in players_raw.split('\n') 
+            if line.strip() and not line.startswith('---')
+        ] if players_raw else []
+
+    @staticmethod
+    def parse_status_probe(probe_raw: Optional[str]) -> Dict[str, Any]:
+        """
+        Parse the JSON printed by RCONCommands.status_probe
+        :raises ValueError: If the response is not a JSON object
+        """
+        data = json.loads(probe_raw or "")
+        if not isinstance(data, dict):
+            raise ValueError(f"Unexpected status probe response: {probe_raw!r}")
+        # table_to_json encodes an empty Lua table as {} rather than []
+        players = data.get('players') or []
+        data['players'] = list(players.values()) if isinstance(players, dict) else list(players)
+        return data
+
+    @staticmethod
+    def _online_status(players: List[str], **details: Any) -> ServerStatus:
+        return ServerStatus(
+            online=True,
+            world_name=ServerMonitor.get_world_name(),  # Use our simplified method
+            players=players,
+            last_updated=datetime.now(),
+            **details
+        )
+
+    @staticmethod
+    def _probe_status(probe: Dict[str, Any]) -> ServerStatus:
+        return ServerMonitor._online_status(
+            probe['players'],
+            game_tick=probe.get('tick'),
+            ticks_played=probe.get('ticks_played'),
+            game_speed=probe.get('speed'),
+            paused=probe.get('paused'),
+            evolution_factor=probe.get('evolution'),
+            current_research=probe.get('research'),
+            research_progress=probe.get('research_progress')
+        )
+
+    @staticmethod
+    def _offline_status() -> ServerStatus:
+        return ServerStatus(
+            online=False,
+            world_name="Server Offline",
+            players=[],
+            last_updated=datetime.now()
+        )
+
     @staticmethod
     def get_status() -> ServerStatus:
         """
-        Fetch current server status via RCON
+        Fetch current server status via RCON (blocking)
         Returns: ServerStatus object with current state
         """
         try:
-            # Get basic info
             players_raw = RCONClient.send(RCONCommands.players())
-            
-            # Parse player list
-            players = [
-                line.strip() 
-                for line in players_raw.split('\n') 
-                if line.strip() and not line.startswith('---')
-            ] if players_raw else []
-            
-            return ServerStatus(
-                online=True,
-                world_name=ServerMonitor.get_world_name(),  # Use our simplified method
-                players=players,
-                last_updated=datetime.now()
+            return ServerMonitor._online_status(ServerMonitor.parse_players(players_raw))
+        except RCONError:
+            return ServerMonitor._offline_status()
+
+    @staticmethod
+    def apply_event(event: LogEvent) -> Optional[ServerStatus]:
+        """
+        Apply a join/leave from the server log to the cached status
+        :return: The updated status, or None if there was nothing to update
+        """
+        return ServerMonitor.source.apply_event(event)
+
+    @staticmethod
+    async def get_status_async(
+        max_age: Optional[float] = None,
+        priority: CommandPriority = CommandPriority.BACKGROUND
+    ) -> ServerStatus:
+        """
+        Fetch current server status via RCON without blocking the event loop.
+        Served from the shared cache when it is fresh enough.
+        :param max_age: Oldest acceptable cached status in seconds (default: STATUS_CACHE_TTL)
+        :param priority: RCON priority (USER for commands, BACKGROUND for polling)
+        Returns: ServerStatus object with current state
+        """
+        return await ServerMonitor.source.get_status_async(max_age, priority)
+
+
+class StatusSource:
+    """
+    Cached status queries against one server.
+    ServerMonitor uses one for the configured server; fleet mode creates one per server.
+    """
+
+    def __init__(
+        self,
+        rcon: Any,
+        world_name: Callable[[], str],
+        uptime: Callable[[], Optional[float]],
+        cache_ttl: float,
+        history: Optional[StatusHistory] = None,
+        sessions: Optional[SessionTracker] = None
+    ):
+        """
+        :param rcon: Anything with send_async(), get_breaker() and get_scheduler() (RCONClient or an RCONEndpoint)
+        :param world_name: Returns the world name to show while online
+        :param uptime: Returns the server process uptime, if the bot started it
+        :param history: Records every status fetched or updated from the log
+        :param sessions: Turns the same statuses into player sessions
+        """
+        self.rcon = rcon
+        self.world_name = world_name
+        self.uptime = uptime
+        self.cache = StatusCache(cache_ttl)
+        self.history = history
+        self.sessions = sessions
+        self.tick_rate = TickRate(Config.UPS_SMOOTHING)
+        self.lag_alert = LagAlert(Config.UPS_ALERT_THRESHOLD, Config.UPS_ALERT_AFTER)
+        self._lag_listeners: List[Callable[[float, bool], None]] = []
+        # Breaker change time when the probe last came back as plain text (no helpers.table_to_json:
+        # Factorio 1.x or a modded server); polls use /players alone until the connection changes
+        self._probe_unsupported_at: Optional[datetime] = None
+
+    def add_lag_listener(self, callback: Callable[[float, bool], None]) -> None:
+        """Subscribe callback(ups, lagging) to low-UPS alerts and their recovery"""
+        self._lag_listeners.append(callback)
+
+    def apply_event(self, event: LogEvent) -> Optional[ServerStatus]:
+        """
+        Apply a join/leave from the server log to the cached status
+        :return: The updated status, or None if there was nothing to update
+        """
+        status = self.cache.peek()
+        if status is None or not status.online or event.type is LogEventType.CHAT:
+            return None
+
+        players = [p for p in status.players if p != event.player]
+        if event.type is LogEventType.JOIN:
+            players.append(event.player)
+        if players == status.players:
+            return None
+
+        updated = dataclasses.replace(status, players=players, last_updated=datetime.now())
+        self.cache.replace(updated)
+        if self.history:
+            self.history.record(updated)
+        if self.sessions:
+            self.sessions.observe(updated)
+        return updated
+
+    def _with_breaker(self, status: ServerStatus) -> ServerStatus:
+        breaker = self.rcon.get_breaker()
+        status.breaker_state = breaker.state
+        status.breaker_changed = breaker.changed_at
+        return status
+
+    async def get_status_async(
+        self,
+        max_age: Optional[float] = None,
+        priority: CommandPriority = CommandPriority.BACKGROUND
+    ) -> ServerStatus:
+        """
+        Fetch the status, served from the cache when it is fresh enough
+        :param max_age: Oldest acceptable cached status in seconds (default: the cache TTL)
+        :param priority: RCON priority (USER for commands, BACKGROUND for polling)
+        """
+        # A command joining a queued poll shouldn't wait at polling priority
+        if priority is not CommandPriority.BACKGROUND:
+            self.rcon.promote(STATUS_KEY, priority)
+        return await self.cache.get(partial(self._fetch_status, priority), max_age)
+
+    @timed(status_fetch_timer)
+    async def _fetch_status(self, priority: CommandPriority = CommandPriority.BACKGROUND) -> ServerStatus:
+        """Query the server, including the RCON circuit breaker state and process uptime"""
+        status = self._with_breaker(await self._query_status(priority))
+        if status.online:
+            status.world_name = self.world_name()
+            status.uptime = self.uptime()
+        self._check_lag(status)
+        if self.sessions:
+            self.sessions.observe(status)
+        if self.history:
+            self.history.record(status)
+            if Config.PANEL_PLAYER_TREND:
+                status.player_trend = self.history['players'].points(DAY, HOUR)
+        return status
+
+    @property
+    def probe_supported(self) -> bool:
+        """False while the server is known to answer the status probe with an error"""
+        return self._probe_unsupported_at != self.rcon.get_breaker().changed_at
+
+    async def _query_status(self, priority: CommandPriority) -> ServerStatus:
+        """
+        Uses a single Lua probe, falling back to /players if it fails.
+        The probe's round trip is timed and its tick feeds the UPS estimate.
+        A newer poll replaces one still waiting in the RCON queue.
+        A server that can't run the probe gets only /players until it goes
+        offline or the breaker changes state, then the probe is tried again.
+        """
+        try:
+            if not self.probe_supported:
+                return await self._query_players(priority)
+            # Timed from when the probe left the queue, not from when it was queued
+            probe_raw, sent, answered = await self.rcon.send_async(
+                RCONCommands.status_probe(), priority=priority, key=STATUS_KEY, timed=True
             )
-            
+            try:
+                status = ServerMonitor._probe_status(ServerMonitor.parse_status_probe(probe_raw))
+            except ValueError:
+                # Lua errors come back as plain text, fall back to /players
+                if self._probe_unsupported_at is None:
+                    logger.warning(f"Status probe failed, using /players until the server reconnects: {probe_raw}")
+                self._probe_unsupported_at = self.rcon.get_breaker().changed_at
+            else:
+                status.rcon_rtt = answered - sent
+                if status.game_tick is None or status.paused:
+                    self.tick_rate.reset()
+                else:
+                    # Read halfway through the round trip; auto-pause stops the clock with nobody online
+                    status.ups = self.tick_rate.sample(
+                        status.game_tick,
+                        (sent + answered) / 2,
+                        idle_allowed=not status.players
+                    )
+                return status
+            return await self._query_players(priority)
         except RCONError:
-            return ServerStatus(
-                online=False,
-                world_name="Server Offline",
-                players=[],
-                last_updated=datetime.now()
-            )
\ No newline at end of file
+            self.tick_rate.reset()
+            # The server may come back as a different version
+            self._probe_unsupported_at = None
+            return ServerMonitor._offline_status()
+
+    async def _query_players(self, priority: CommandPriority) -> ServerStatus:
+        """Online status from /players alone (no tick, UPS or research)"""
+        sent = time.monotonic()
+        players_raw = await self.rcon.send_async(RCONCommands.players(), priority=priority)
+        status = ServerMonitor._online_status(ServerMonitor.parse_players(players_raw))
+        status.rcon_rtt = time.monotonic() - sent
+        return status
+
+    def _check_lag(self, status: ServerStatus) -> None:
+        """Tell listeners when UPS has stayed low for UPS_ALERT_AFTER seconds, and when it recovers"""
+        lagging = self.lag_alert.update(status.ups, time.monotonic())
+        if lagging is None:
+            return
+        for callback in self._lag_listeners:
+            try:
+                callback(status.ups, lagging)
+            except Exception as e:
+                logger.error(f"Lag listener failed: {e}", exc_info=True)
+
+
+# The configured server's status, shared by the panel and commands
+ServerMonitor.source = StatusSource(
+    RCONClient,
+    ServerMonitor.get_world_name,
+    lambda: supervisor.uptime,
+    Config.STATUS_CACHE_TTL,
+    status_history,
+    SessionTracker(session_store)
+)
+ServerMonitor.cache = ServerMonitor.source.cache
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+from ..config import Config
+from ..R_con import RCONClient, RCONCommands
+from ..exceptions import ServerControlError
+from ..constants import CommandPriority
+from ..utils.save_catalog import SaveCatalog, save_catalog
+from .models import SaveResult
+from .supervisor import ServerSupervisor, supervisor
+
+logger = logging.getLogger(__name__)
+
+#    812.345 Info AppManagerStates.cpp:1876: Saving game as /opt/factorio/saves/world.zip
+#    812.349 Info AppManager.cpp:291: Saving to _autosave1 (non-blocking).
+#    815.102 Info AppManagerStates.cpp:1890: Saving finished
+SAVE_START_PATTERN = re.compile(r"^\s*(\d+\.\d+) .*Saving (?:game as|to) (.+?)(?: \([\w-]+\))?\.?$")
+SAVE_DONE_PATTERN = re.compile(r"^\s*(\d+\.\d+) .*Saving finished")
+
+# How often to stat the save while waiting for it to settle
+SETTLE_INTERVAL = 1.0
+
+
+class _SaveJob:
+    """One /save on the server, shared by every caller that asked for it"""
+
+    def __init__(self, filename: Optional[str]):
+        self.filename = filename
+        self.joined = 0
+        # Log sources that reported this save starting; only they may finish it
+        self.started_sources: Set[str] = set()
+        self.log_started: Optional[float] = None
+        self.log_path: Optional[Path] = None
+        self.log_done: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.task: Optional[asyncio.Task] = None
+
+
+class SaveTracker:
+    """
+    Runs saves one at a time and tells callers when they have finished.
+
+    Callers asking for a save of the same file while one is pending or
+    running join it instead of queueing another full save. Completion is
+    taken from the "Saving finished" log line (server stdout or the
+    followed log file) or, failing that, from the file's size and mtime
+    settling.
+    """
+
+    def __init__(
+        self,
+        timeout: float,
+        rcon: Any = RCONClient,
+        supervisor: ServerSupervisor = supervisor,
+        save_dir: Optional[Path] = None,
+        catalog: SaveCatalog = save_catalog
+    ):
+        """
+        :param rcon: Anything with send_async() (RCONClient or an RCONEndpoint)
+        :param save_dir: Where saves are written (default: SAVE_GAMES_DIR)
+        """
+        self.timeout = timeout
+        self.rcon = rcon
+        self.supervisor = supervisor
+        self.save_dir = save_dir or Config.SAVE_GAMES_DIR
+        self.catalog = catalog
+        self._jobs: Dict[Optional[str], _SaveJob] = {}
+        self._current: Optional[_SaveJob] = None
+        self._lock = asyncio.Lock()
+
+        # Counters
+        self.saves = 0
+        self.joined = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'saves': self.saves, 'joined': self.joined}
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._jobs)
+
+    # Log lines
+
+    def feed_line(self, line: str, source: str) -> None:
+        """Watch server output for the current save starting and finishing"""
+        job = self._current
+        if job is None or 'Saving' not in line:
+            return
+
+        match = SAVE_START_PATTERN.match(line)
+        if match:
+            target = self._log_target(match.group(2))
+            expected = self.expected_path(job.filename)
+            # Ignore an autosave that happens to start at the same time
+            if expected is None or target.name == expected.name:
+                job.started_sources.add(source)
+                job.log_started = float(match.group(1))
+                job.log_path = target
+            return
+
+        match = SAVE_DONE_PATTERN.match(line)
+        if match and source in job.started_sources and not job.log_done.done():
+            duration = float(match.group(1)) - job.log_started
+            job.log_done.set_result(duration)
+
+    def _log_target(self, target: str) -> Path:
+        path = Path(target)
+        if path.is_absolute():
+            return path
+        return self.save_dir / (target if target.endswith('.zip') else f"{target}.zip")
+
+    # Saving
+
+    def expected_path(self, filename: Optional[str]) -> Optional[Path]:
+        """The file a /save writes to, if known (None: the loaded save of an unsupervised server)"""
+        if filename:
+            return self.save_dir / f"{filename}.zip"
+        return self.supervisor.save_file
+
+    async def save(self, filename: Optional[str] = None) -> SaveResult:
+        """
+        Save the game and wait until the file is written
+        :param filename: Save under this name instead of the loaded save
+        :raises ServerControlError: If the save can't be requested or doesn't finish in time
+        """
+        job = self._jobs.get(filename)
+        if job is None:
+            job = _SaveJob(filename)
+            job.task = asyncio.create_task(self._run(job))
+            self._jobs[filename] = job
+        else:
+            job.joined += 1
+            self.joined += 1
+        # Shield so one caller giving up doesn't cancel the save for everyone
+        return await asyncio.shield(job.task)
+
+    async def _run(self, job: _SaveJob) -> SaveResult:
+        try:
+            # One save at a time; a different file waits for the current one
+            async with self._lock:
+                self._current = job
+                try:
+                    return await self._save(job)
+                finally:
+                    self._current = None
+        finally:
+            if self._jobs.get(job.filename) is job:
+                del self._jobs[job.filename]
+
+    async def _save(self, job: _SaveJob) -> SaveResult:
+        since = time.time()
+        started = time.monotonic()
+        await self.rcon.send_async(RCONCommands.save(job.filename), priority=CommandPriority.ADMIN)
+        self.saves += 1
+
+        settle = asyncio.create_task(self._wait_for_file(self.expected_path(job.filename), since))
+        try:
+            done, _ = await asyncio.wait(
+                {job.log_done, settle},
+                timeout=self.timeout,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            settle.cancel()
+
+        if job.log_done in done:
+            result = SaveResult(job.log_path, job.log_done.result(), 'log', job.joined)
+        elif settle in done:
+            path, mtime = settle.result()
+            result = SaveResult(path, max(0.0, mtime - since), 'file', job.joined)
+        else:
+            raise ServerControlError(f"Save did not finish within {self.timeout:.0f}s")
+
+        logger.info(
+            f"Saved {result.path.name if result.path else 'game'} in {result.duration:.1f}s "
+            f"(confirmed by {result.confirmed_by}, {result.joined} joined, "
+            f"{time.monotonic() - started:.1f}s after the request)"
+        )
+        return result
+
+    async def _wait_for_file(self, path: Optional[Path], since: float) -> tuple[Path, float]:
+        """
+        Wait until a save written after `since` stops changing.
+        Without a path, the newest save in the catalog is watched.
+        :return: (path, final mtime)
+        """
+        previous = None
+        while True:
+            await asyncio.sleep(SETTLE_INTERVAL)
+            if path is None:
+                latest = await self.catalog.get_latest()
+                target = latest.path if latest else None
+            else:
+                target = path
+            try:
+                stat = target.stat() if target else None
+            except FileNotFoundError:
+                stat = None
+            # mtime has whole-second resolution on some filesystems
+            if stat is None or stat.st_mtime < since - 1:
+                previous = None
+                continue
+            current = (target, stat.st_size, stat.st_mtime)
+            if current == previous:
+                return target, stat.st_mtime
+            previous = current
+
+
+# Shared tracker for the configured server
+save_tracker = SaveTracker(Config.SAVE_TIMEOUT)
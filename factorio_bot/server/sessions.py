@@ -0,0 +1,380 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, TypeVar
+from ..config import Config
+from ..constants import BreakerState
+from .models import PlayerTime, ServerStatus
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Sessions are the raw record; the commands only read the aggregate tables,
+# which are updated in the same transaction as the session they summarise.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    server TEXT NOT NULL,
+    player TEXT NOT NULL,
+    joined REAL NOT NULL,
+    left REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_open ON sessions (server, player) WHERE left IS NULL;
+
+CREATE TABLE IF NOT EXISTS player_totals (
+    server TEXT NOT NULL,
+    player TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    sessions INTEGER NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (server, player)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS player_totals_rank ON player_totals (server, seconds DESC);
+
+CREATE TABLE IF NOT EXISTS player_days (
+    server TEXT NOT NULL,
+    day TEXT NOT NULL,
+    player TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (server, day, player)
+) WITHOUT ROWID;
+
+-- Month totals keep long windows cheap: whole months come from here, the rest from player_days
+CREATE TABLE IF NOT EXISTS player_months (
+    server TEXT NOT NULL,
+    month TEXT NOT NULL,
+    player TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (server, month, player)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS daily_peaks (
+    server TEXT NOT NULL,
+    day TEXT NOT NULL,
+    peak INTEGER NOT NULL,
+    peak_at REAL NOT NULL,
+    PRIMARY KEY (server, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_peaks_rank ON daily_peaks (server, peak DESC);
+
+CREATE TABLE IF NOT EXISTS heartbeats (
+    server TEXT PRIMARY KEY,
+    at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def split_by_day(start: float, end: float) -> List[tuple[str, float]]:
+    """Split [start, end) into (local day, seconds) pieces"""
+    pieces = []
+    while start < end:
+        day = date.fromtimestamp(start)
+        midnight = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+        piece_end = min(end, midnight)
+        pieces.append((day.isoformat(), piece_end - start))
+        start = piece_end
+    return pieces
+
+
+class SessionStore:
+    """
+    Player sessions and playtime aggregates in SQLite (WAL mode).
+
+    Trackers queue joins, leaves and peaks in memory; they are written in
+    one transaction per flush interval on a dedicated thread, which also
+    serves the queries, so the event loop never waits on the database.
+    """
+
+    def __init__(self, path: Path, flush_interval: float):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sessions')
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: List[tuple] = []
+        self._heartbeats: Dict[str, float] = {}  # server -> last poll that found it online
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.batches = 0
+        self.writes = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'batches': self.batches, 'writes': self.writes, 'pending': len(self._pending)}
+
+    def queue(self, *op) -> None:
+        self._pending.append(op)
+
+    def heartbeat(self, server: str, at: float) -> None:
+        """Note the server was seen online; written with every flush, so a crash ends sessions here"""
+        self._heartbeats[server] = at
+
+    async def _call(self, fn: Callable[..., T], *args) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # Database thread
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._close_dangling()
+        return self._conn
+
+    def _close_dangling(self) -> None:
+        """End sessions left open by a crash at the server's last heartbeat"""
+        conn = self._conn
+        rows = conn.execute(
+            "SELECT s.server, s.player, s.joined, h.at FROM sessions s "
+            "LEFT JOIN heartbeats h ON h.server = s.server WHERE s.left IS NULL"
+        ).fetchall()
+        with conn:
+            for server, player, joined, heartbeat in rows:
+                self._write_leave(server, player, joined, max(joined, heartbeat or joined))
+        if rows:
+            logger.info(f"Closed {len(rows)} player sessions left open by the last run")
+
+    def _write(self, batch: List[tuple], heartbeats: Dict[str, float]) -> None:
+        conn = self._connect()
+        with conn:
+            for op, server, *args in batch:
+                if op == 'join':
+                    conn.execute(
+                        "INSERT INTO sessions (server, player, joined) VALUES (?, ?, ?)",
+                        (server, *args)
+                    )
+                elif op == 'leave':
+                    self._write_leave(server, *args)
+                elif op == 'peak':
+                    conn.execute(
+                        "INSERT INTO daily_peaks (server, day, peak, peak_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (server, day) DO UPDATE SET peak = excluded.peak, peak_at = excluded.peak_at "
+                        "WHERE excluded.peak > daily_peaks.peak",
+                        (server, *args)
+                    )
+                heartbeats[server] = max(heartbeats.get(server, 0.0), args[-1])
+            conn.executemany(
+                "INSERT INTO heartbeats (server, at) VALUES (?, ?) "
+                "ON CONFLICT (server) DO UPDATE SET at = excluded.at",
+                heartbeats.items()
+            )
+        self.batches += 1
+        self.writes += len(batch)
+
+    def _write_leave(self, server: str, player: str, joined: float, left: float) -> None:
+        conn = self._conn
+        conn.execute(
+            "UPDATE sessions SET left = ? WHERE server = ? AND player = ? AND left IS NULL",
+            (left, server, player)
+        )
+        conn.execute(
+            "INSERT INTO player_totals (server, player, seconds, sessions, last_seen) VALUES (?, ?, ?, 1, ?) "
+            "ON CONFLICT (server, player) DO UPDATE SET seconds = seconds + excluded.seconds, "
+            "sessions = sessions + 1, last_seen = excluded.last_seen",
+            (server, player, left - joined, left)
+        )
+        days = [(server, day, player, seconds) for day, seconds in split_by_day(joined, left)]
+        conn.executemany(
+            "INSERT INTO player_days (server, day, player, seconds) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (server, day, player) DO UPDATE SET seconds = seconds + excluded.seconds",
+            days
+        )
+        conn.executemany(
+            "INSERT INTO player_months (server, month, player, seconds) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (server, month, player) DO UPDATE SET seconds = seconds + excluded.seconds",
+            [(server, day[:7], player, seconds) for server, day, player, seconds in days]
+        )
+
+    def _playtime(self, server: str, player: str) -> Optional[PlayerTime]:
+        row = self._connect().execute(
+            "SELECT player, seconds, sessions, last_seen FROM player_totals "
+            "WHERE server = ? AND player = ? COLLATE NOCASE",
+            (server, player)
+        ).fetchone()
+        return PlayerTime(*row) if row else None
+
+    def _top(self, server: str, since: Optional[str], include: List[str], limit: int) -> Dict[str, float]:
+        conn = self._connect()
+        marks = ", ".join("?" * len(include))
+        if since is None:
+            rows = conn.execute(
+                "SELECT player, seconds FROM player_totals WHERE server = ? ORDER BY seconds DESC LIMIT ?",
+                (server, limit)
+            ).fetchall()
+            rows += conn.execute(
+                f"SELECT player, seconds FROM player_totals WHERE server = ? AND player IN ({marks})",
+                (server, *include)
+            ).fetchall()
+        else:
+            # Days up to the end of the first month, then whole months
+            first_month = since[:7]
+            window = (
+                "SELECT player, seconds FROM player_days WHERE server = ? AND day >= ? AND day < ? "
+                "UNION ALL "
+                "SELECT player, seconds FROM player_months WHERE server = ? AND month > ?"
+            )
+            args = (server, since, f"{first_month}-32", server, first_month)
+            rows = conn.execute(
+                f"SELECT player, SUM(seconds) AS total FROM ({window}) "
+                "GROUP BY player ORDER BY total DESC LIMIT ?",
+                (*args, limit)
+            ).fetchall()
+            rows += conn.execute(
+                f"SELECT player, SUM(seconds) FROM ({window}) WHERE player IN ({marks}) GROUP BY player",
+                (*args, *include)
+            ).fetchall()
+        return dict(rows)
+
+    def _peak(self, server: str, since: Optional[str]) -> Optional[tuple[int, float]]:
+        return self._connect().execute(
+            "SELECT peak, peak_at FROM daily_peaks WHERE server = ? AND day >= ? ORDER BY peak DESC LIMIT 1",
+            (server, since or "")
+        ).fetchone()
+
+    # Event loop side
+
+    async def start(self) -> None:
+        """Open the database (closing sessions a crash left open) and start flushing"""
+        if self._task is not None and not self._task.done():
+            return
+        await self._call(self._connect)
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything queued so far in one transaction"""
+        batch, self._pending = self._pending, []
+        heartbeats, self._heartbeats = self._heartbeats, {}
+        if not batch and not heartbeats:
+            return
+        try:
+            await self._call(self._write, batch, heartbeats)
+        except sqlite3.Error as e:
+            logger.error(f"Could not write {len(batch)} session updates: {e}")
+
+    async def playtime(self, server: str, player: str) -> Optional[PlayerTime]:
+        await self.flush()
+        return await self._call(self._playtime, server, player)
+
+    async def top(self, server: str, days: Optional[int], include: List[str], limit: int) -> Dict[str, float]:
+        """
+        Seconds played per player, all time or over the last `days` days
+        :param include: Players whose totals are wanted even outside the top (those online)
+        """
+        await self.flush()
+        since = (date.today() - timedelta(days=days - 1)).isoformat() if days else None
+        return await self._call(self._top, server, since, include, limit)
+
+    async def peak(self, server: str, days: Optional[int] = None) -> Optional[tuple[int, float]]:
+        """(most players online at once, when), all time or over the last `days` days"""
+        await self.flush()
+        since = (date.today() - timedelta(days=days - 1)).isoformat() if days else None
+        return await self._call(self._peak, server, since)
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+        await self.flush()
+        if self._conn is not None:
+            await self._call(self._conn.close)
+        self._executor.shutdown(wait=True)
+
+
+class SessionTracker:
+    """Derives joins and leaves for one server from successive player lists"""
+
+    def __init__(self, store: SessionStore, server: str = ""):
+        """
+        :param server: Key the server's rows are stored under (fleet name, "" for the configured server)
+        """
+        self.store = store
+        self.server = server
+        self.online: Dict[str, float] = {}  # player -> joined
+        self._day: Optional[str] = None
+        self._peak = 0
+        self._offline_since: Optional[float] = None
+
+    def observe(self, status: ServerStatus) -> None:
+        """Diff the player list against the last one seen"""
+        now = status.last_updated.timestamp()
+        left_at = now
+        if status.online:
+            self._offline_since = None
+            self.store.heartbeat(self.server, now)
+        elif self._offline_since is None:
+            self._offline_since = now
+            # A single failed poll may be an RCON blip: keep sessions open unless the breaker has opened
+            if status.breaker_state is not BreakerState.OPEN:
+                return
+        else:
+            left_at = self._offline_since
+        current = set(status.players) if status.online else set()
+
+        for player in current - self.online.keys():
+            self.online[player] = now
+            self.store.queue('join', self.server, player, now)
+        for player in self.online.keys() - current:
+            joined = self.online.pop(player)
+            self.store.queue('leave', self.server, player, joined, max(joined, left_at))
+
+        day = date.fromtimestamp(now).isoformat()
+        if day != self._day:
+            self._day, self._peak = day, 0
+        if len(current) > self._peak:
+            self._peak = len(current)
+            self.store.queue('peak', self.server, day, self._peak, now)
+
+    def close_all(self) -> None:
+        """End every open session now (bot shutdown)"""
+        now = time.time()
+        for player, joined in self.online.items():
+            self.store.queue('leave', self.server, player, joined, now)
+        self.online.clear()
+
+    def live_seconds(self, player: str, since: float = 0.0) -> float:
+        """Time in the player's current session after `since`, if they are online"""
+        for name, joined in self.online.items():
+            if name.lower() == player.lower():
+                return max(0.0, time.time() - max(joined, since))
+        return 0.0
+
+    async def playtime(self, player: str) -> Optional[PlayerTime]:
+        """All-time playtime including the current session"""
+        stored = await self.store.playtime(self.server, player)
+        live = self.live_seconds(player)
+        if stored is None:
+            if not live:
+                return None
+            name = next(name for name in self.online if name.lower() == player.lower())
+            return PlayerTime(name, live, 1, time.time())
+        stored.seconds += live
+        if live:
+            stored.sessions += 1
+            stored.last_seen = time.time()
+        return stored
+
+    async def top(self, days: Optional[int] = None, limit: int = 10) -> List[tuple[str, float]]:
+        """Players with the most playtime, including current sessions"""
+        totals = await self.store.top(self.server, days, list(self.online), limit)
+        since = datetime.combine(date.today() - timedelta(days=days - 1), datetime.min.time()).timestamp() if days else 0.0
+        for player in self.online:
+            totals[player] = totals.get(player, 0.0) + self.live_seconds(player, since)
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    async def peak(self, days: Optional[int] = None) -> Optional[tuple[int, float]]:
+        return await self.store.peak(self.server, days)
+
+
+# Sessions of every server, stored next to bot_state.db
+session_store = SessionStore(Config.SESSIONS_DB, Config.SESSIONS_FLUSH_INTERVAL)
@@ -0,0 +1,322 @@
+import asyncio
+import logging
+import os
+import platform
+import re
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from ..config import Config, ServerSettings
+from ..exceptions import ServerControlError
+from ..utils.state_store import state_store
+
+logger = logging.getLogger(__name__)
+
+READY_PATTERN = re.compile(r"changing state from\(CreatingGame\) to\(InGame\)")
+
+# A run that lasted this long resets the auto-restart backoff
+STABLE_RUN_SECONDS = 600
+
+# How often an adopted server's PID is checked for having exited
+ADOPTED_POLL_SECONDS = 1.0
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with this PID exists (POSIX only: on Windows os.kill terminates it)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by someone else
+    return True
+
+
+def is_factorio(pid: int) -> bool:
+    """False if the PID now belongs to some other program (checked where /proc tells us)"""
+    try:
+        return b'--start-server' in Path(f'/proc/{pid}/cmdline').read_bytes()
+    except OSError:
+        return pid_alive(pid)
+
+
+class ServerSupervisor:
+    """
+    Runs the Factorio server as a child process and watches its output.
+
+    Listeners can subscribe to:
+    - 'line'  (line: str)           every stdout line
+    - 'ready' ()                    the game finished loading
+    - 'exit'  (code: int, crashed: bool)
+
+    The process is recorded in the state store. A server still running
+    after the bot restarts is adopted: it counts as running (with its
+    original start time) until a background check finds its PID gone, but
+    its output isn't seen and no events are emitted for it.
+    """
+
+    def __init__(self, settings: Optional[ServerSettings] = None):
+        """:param settings: A fleet server's settings (default: the configured server)"""
+        self.settings = settings
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.save_file: Optional[Path] = None
+        self.started_at: Optional[datetime] = None
+        self.ready_at: Optional[datetime] = None
+        self.last_exit_code: Optional[int] = None
+        self.restarts = 0
+        self.adopted_pid: Optional[int] = None
+
+        self._started_monotonic = 0.0
+        self._ready = asyncio.Event()
+        self._expect_exit = False
+        self._watch_task: Optional[asyncio.Task] = None
+        self._listeners: Dict[str, List[Callable[..., None]]] = {
+            'line': [], 'ready': [], 'exit': []
+        }
+
+    # Listeners
+
+    def add_listener(self, event: str, callback: Callable[..., None]) -> None:
+        """Subscribe a callback to 'line', 'ready' or 'exit'"""
+        self._listeners[event].append(callback)
+
+    def _emit(self, event: str, *args) -> None:
+        for callback in self._listeners[event]:
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Supervisor {event} listener failed: {e}", exc_info=True)
+
+    # State
+
+    @property
+    def running(self) -> bool:
+        if self.process is not None:
+            return self.process.returncode is None
+        # Cleared by _watch_adopted once the adopted PID is gone
+        return self.adopted_pid is not None
+
+    @property
+    def ready(self) -> bool:
+        return self.running and self._ready.is_set()
+
+    @property
+    def pid(self) -> Optional[int]:
+        if not self.running:
+            return None
+        return self.process.pid if self.process is not None else self.adopted_pid
+
+    @property
+    def uptime(self) -> Optional[float]:
+        """Seconds since the server process was started"""
+        if not self.running:
+            return None
+        return time.monotonic() - self._started_monotonic
+
+    # Persistence
+
+    @property
+    def state_key(self) -> str:
+        return 'supervisor' if self.settings is None else f'supervisor:{self.settings.name}'
+
+    def _persist(self, state: str) -> None:
+        """:param state: 'starting', 'ready', 'stopped' or 'crashed'"""
+        state_store.set(self.state_key, {
+            'state': state,
+            'pid': self.pid,
+            'started_at': self.started_at.timestamp() if self.started_at else None,
+            'save_file': str(self.save_file) if self.save_file else None,
+            'exit_code': self.last_exit_code,
+            'restarts': self.restarts,
+        })
+
+    def restore(self) -> None:
+        """
+        Take over what the last run recorded (after the state store is loaded,
+        on the event loop), adopting a live server
+        """
+        record = state_store.get(self.state_key)
+        if not record or self.process is not None:
+            return
+        self.save_file = Path(record['save_file']) if record.get('save_file') else None
+        self.last_exit_code = record.get('exit_code')
+        self.restarts = record.get('restarts', 0)
+        pid = record.get('pid')
+        # Windows can't probe a PID without opening the process; start afresh there
+        if record['state'] not in ('starting', 'ready') or not pid or platform.system() == "Windows":
+            return
+        if not is_factorio(pid):
+            logger.info(f"Factorio server (PID {pid}) exited while the bot was down")
+            self._persist('stopped')
+            return
+
+        self.adopted_pid = pid
+        if record.get('started_at'):
+            self.started_at = datetime.fromtimestamp(record['started_at'])
+            self._started_monotonic = time.monotonic() - (time.time() - record['started_at'])
+        if record['state'] == 'ready':
+            self._ready.set()
+        self._watch_task = asyncio.create_task(self._watch_adopted(pid))
+        since = f" since {self.started_at:%Y-%m-%d %H:%M}" if self.started_at else ""
+        logger.info(f"Adopted Factorio server (PID {pid}) running{since}")
+
+    async def _watch_adopted(self, pid: int) -> None:
+        """Check the adopted PID periodically; it isn't our child and can't be waited on"""
+        # A zombie or a PID reused by another program has no Factorio command line
+        while is_factorio(pid):
+            await asyncio.sleep(ADOPTED_POLL_SECONDS)
+        if self.adopted_pid != pid:
+            return
+        logger.info(f"Adopted Factorio server (PID {pid}) has exited")
+        self.adopted_pid = None
+        self._ready.clear()
+        self._persist('stopped')
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the server is in game; False on timeout"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    # Process control
+
+    def build_command(self, save_file: Path) -> List[str]:
+        settings = self.settings
+        if settings is None:
+            return [
+                str(Config.get_factorio_binary()),
+                "--start-server", str(save_file),
+                "--rcon-port", str(Config.RCON_PORT),
+                "--rcon-password", Config.RCON_PASSWORD,
+                "--port", str(Config.GAME_PORT)
+            ]
+        if not settings.local:
+            raise ServerControlError(f"{settings.name} has no server_path, it can't be started from here")
+        command = [
+            str(Config.get_factorio_binary(settings.server_path)),
+            "--start-server", str(save_file),
+            "--rcon-port", str(settings.rcon_port),
+            "--rcon-password", settings.rcon_password
+        ]
+        if settings.game_port:
+            command += ["--port", str(settings.game_port)]
+        return command
+
+    async def start(self, save_file: Path) -> int:
+        """
+        Launch the server with the given save
+        :return: PID of the new process
+        :raises ServerControlError: If a supervised server is already running
+        """
+        if self.running:
+            raise ServerControlError(f"Server is already running (PID {self.pid})")
+
+        self.save_file = save_file
+        self.restarts = 0
+        await self._spawn()
+        return self.process.pid
+
+    async def _spawn(self) -> None:
+        kwargs = {}
+        if platform.system() == "Windows":
+            kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            # Own session so Ctrl+C on the bot doesn't hit the server, and keep
+            # SIGPIPE ignored so the server survives the bot closing the pipe
+            kwargs.update({'start_new_session': True, 'restore_signals': False})
+
+        self.process = await asyncio.create_subprocess_exec(
+            *self.build_command(self.save_file),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            **kwargs
+        )
+        self.started_at = datetime.now()
+        self.ready_at = None
+        self._started_monotonic = time.monotonic()
+        self._ready.clear()
+        self._expect_exit = False
+        self.adopted_pid = None
+        self._watch_task = asyncio.create_task(self._watch(self.process))
+        self._persist('starting')
+        logger.info(f"Factorio server started (PID {self.process.pid}) with {self.save_file.name}")
+
+    def expect_exit(self) -> None:
+        """Mark the next exit as intentional (e.g. after /quit)"""
+        self._expect_exit = True
+
+    async def wait_exit(self, timeout: Optional[float] = None) -> Optional[int]:
+        """Wait for the process to exit; returns the exit code or None on timeout (or if adopted)"""
+        if self.process is None:
+            if self.adopted_pid is not None:
+                await self._wait_adopted_exit(timeout)
+            return self.last_exit_code
+        try:
+            return await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _wait_adopted_exit(self, timeout: Optional[float]) -> None:
+        """Wait for the adopted PID's watcher to see it exit"""
+        if self._watch_task is not None and not self._watch_task.done():
+            await asyncio.wait({self._watch_task}, timeout=timeout)
+
+    async def _watch(self, process: asyncio.subprocess.Process) -> None:
+        """Stream stdout, detect readiness and handle the exit"""
+        async for raw in process.stdout:
+            line = raw.decode('utf-8', errors='replace').rstrip()
+            self._emit('line', line)
+            if not self._ready.is_set() and READY_PATTERN.search(line):
+                self._ready.set()
+                self.ready_at = datetime.now()
+                logger.info(f"Factorio server ready after {self.uptime:.1f}s")
+                self._persist('ready')
+                self._emit('ready')
+
+        code = await process.wait()
+        self.last_exit_code = code
+        run_time = time.monotonic() - self._started_monotonic
+        crashed = not self._expect_exit
+        self._ready.clear()
+        self._persist('crashed' if crashed else 'stopped')
+
+        if crashed:
+            logger.error(f"Factorio server exited unexpectedly with code {code} after {run_time:.0f}s")
+        else:
+            logger.info(f"Factorio server stopped with code {code}")
+        self._emit('exit', code, crashed)
+
+        if crashed and Config.SERVER_AUTO_RESTART:
+            await self._restart_with_backoff(run_time)
+
+    async def _restart_with_backoff(self, run_time: float) -> None:
+        if run_time >= STABLE_RUN_SECONDS:
+            self.restarts = 0
+        if self.restarts >= Config.SERVER_RESTART_MAX:
+            logger.error(f"Giving up after {self.restarts} automatic restarts")
+            return
+
+        delay = min(300, Config.SERVER_RESTART_BACKOFF * 2 ** self.restarts)
+        self.restarts += 1
+        logger.info(f"Restarting Factorio server in {delay:.0f}s (attempt {self.restarts})")
+        await asyncio.sleep(delay)
+        if self.running:
+            return
+        try:
+            await self._spawn()
+        except Exception as e:
+            logger.error(f"Automatic restart failed: {e}")
+
+    def stop(self) -> None:
+        """Stop watching the process (the server itself keeps running)"""
+        if self._watch_task:
+            self._watch_task.cancel()
+
+
+# Shared supervisor for the configured server
+supervisor = ServerSupervisor()
@@ -0,0 +1,95 @@
+import math
+from typing import Optional
+
+# Polls closer together than this reuse the previous estimate (tick jitter dominates)
+MIN_SAMPLE_INTERVAL = 1.0
+
+
+class TickRate:
+    """
+    Smoothed UPS from the game.tick returned by each status probe.
+
+    Every tick is paired with the monotonic time its probe was answered, so
+    the rate between two polls is exact; an exponential moving average with
+    time constant `smoothing` (seconds) evens out RCON jitter whatever the
+    poll interval.
+    """
+
+    def __init__(self, smoothing: float):
+        self.smoothing = smoothing
+        self.ups: Optional[float] = None
+        self._last: Optional[tuple[int, float]] = None
+
+    def reset(self) -> None:
+        self.ups = None
+        self._last = None
+
+    def sample(self, tick: int, at: float, idle_allowed: bool = False) -> Optional[float]:
+        """
+        Add a tick sample
+        :param at: time.monotonic() when the tick was read
+        :param idle_allowed: A tick that didn't move means the game is paused
+            (e.g. auto-pause with nobody online) rather than frozen
+        :return: The smoothed UPS, or None while there is no estimate
+        """
+        if self._last is None or tick < self._last[0]:
+            # First sample, or the map was reloaded
+            self._last = (tick, at)
+            self.ups = None
+            return None
+
+        last_tick, last_at = self._last
+        elapsed = at - last_at
+        if elapsed < MIN_SAMPLE_INTERVAL:
+            return self.ups
+        self._last = (tick, at)
+
+        if tick == last_tick and idle_allowed:
+            self.ups = None
+            return None
+
+        rate = (tick - last_tick) / elapsed
+        if self.ups is None:
+            self.ups = rate
+        else:
+            self.ups += (1 - math.exp(-elapsed / self.smoothing)) * (rate - self.ups)
+        return self.ups
+
+
+class LagAlert:
+    """Fires once when UPS stays below a threshold for `after` seconds, and again on recovery"""
+
+    def __init__(self, threshold: float, after: float):
+        """
+        :param threshold: UPS below which the server counts as lagging (0 disables alerts)
+        """
+        self.threshold = threshold
+        self.after = after
+        self.lagging = False
+        self._below_since: Optional[float] = None
+
+    def update(self, ups: Optional[float], now: float) -> Optional[bool]:
+        """
+        :param now: time.monotonic()
+        :return: True when the alert fires, False when it clears, otherwise None
+        """
+        if not self.threshold:
+            return None
+        if ups is None:
+            # Offline or paused: not lag, but not a recovery worth announcing either
+            self._below_since = None
+            self.lagging = False
+            return None
+        if ups >= self.threshold:
+            self._below_since = None
+            if self.lagging:
+                self.lagging = False
+                return False
+            return None
+
+        if self._below_since is None:
+            self._below_since = now
+        if not self.lagging and now - self._below_since >= self.after:
+            self.lagging = True
+            return True
+        return None
@@ -2,5 +2,9 @@
 Background tasks for the Factorio bot
 """
 from .status_updater import StatusUpdater
+from .panel_editor import PanelEditor
+from .chat_bridge import ChatBridge
+from .loop_lag import LoopLagMonitor
+from .metrics_server import MetricsServer
 
-__all__ = ['StatusUpdater']
\ No newline at end of file
+__all__ = ['StatusUpdater', 'PanelEditor', 'ChatBridge', 'LoopLagMonitor', 'MetricsServer']
\ No newline at end of file
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, List, Optional
+import discord
+from ..config import Config
+from ..exceptions import FactorioBotError
+from ..R_con import RCONCommands
+from ..R_con.commands import lua_quote
+from ..utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Longest RCON command sent per batch, in UTF-8 bytes; Factorio rejects much longer packets
+MAX_COMMAND_LENGTH = 4000
+# Discord's message length limit, and the longest line relayed into the game
+MAX_DISCORD_LENGTH = 2000
+MAX_GAME_LINE = 500
+# Attempts per batch before it is dropped (the far side is down)
+SEND_ATTEMPTS = 3
+WEBHOOK_NAME = "Factorio Chat"
+
+
+class _Relay:
+    """
+    One direction of the bridge: an ordered queue drained in batches.
+    Each send takes a token, so a quiet queue sends at once and a busy one
+    packs everything that arrived meanwhile into the next batch.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        bucket: TokenBucket,
+        pack: Callable[[Deque[str]], List[str]],
+        send: Callable[[List[str]], Awaitable[None]]
+    ):
+        """
+        :param pack: Removes and returns the next batch from the front of the queue
+        :param send: Delivers one batch
+        """
+        self.name = name
+        self.bucket = bucket
+        self.pack = pack
+        self.send = send
+        self.queue: Deque[str] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.queued = 0
+        self.delivered = 0
+        self.batches = 0
+        self.dropped = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            'queued': self.queued,
+            'delivered': self.delivered,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'pending': len(self.queue),
+        }
+
+    def put(self, line: str) -> None:
+        self.queue.append(line)
+        self.queued += 1
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            await self.bucket.acquire()
+            self._wakeup.clear()
+            if not self.queue:
+                continue
+
+            batch = self.pack(self.queue)
+            if self.queue:
+                self._wakeup.set()
+            for attempt in range(SEND_ATTEMPTS):
+                try:
+                    await self.send(batch)
+                    self.delivered += len(batch)
+                    self.batches += 1
+                    break
+                except Exception as e:
+                    if attempt == SEND_ATTEMPTS - 1:
+                        self.dropped += len(batch)
+                        logger.warning(f"Chat to {self.name}: dropped {len(batch)} messages: {e}")
+                    else:
+                        await asyncio.sleep(2 ** attempt)
+
+
+def pack_for_game(queue: Deque[str]) -> List[str]:
+    """As many lines as fit in one game.print command (measured in bytes, as sent)"""
+    batch, length = [], len(RCONCommands.chat([]).encode('utf-8'))
+    while queue:
+        # Each extra line costs its escaped text plus the escaped newline
+        cost = len(lua_quote(queue[0]).encode('utf-8')) - 2 + (4 if batch else 0)
+        if batch and length + cost > MAX_COMMAND_LENGTH:
+            break
+        batch.append(queue.popleft())
+        length += cost
+    return batch
+
+
+def pack_for_discord(queue: Deque[str]) -> List[str]:
+    """As many lines as fit in one Discord message"""
+    batch, length = [], 0
+    while queue:
+        cost = len(queue[0]) + (1 if batch else 0)
+        if batch and length + cost > MAX_DISCORD_LENGTH:
+            break
+        batch.append(queue.popleft())
+        length += cost
+    return batch
+
+
+class ChatBridge:
+    """
+    Relays chat between the game and a Discord channel.
+
+    Discord messages are escaped into Lua strings and sent as one
+    game.print per flush window; in-game chat from the server log is
+    posted through a webhook, several lines per message, within Discord's
+    webhook rate limit. Order is kept in each direction.
+    """
+
+    def __init__(self, bot: discord.Client, rcon: Any, channel_id: int):
+        """:param rcon: Anything with send_async() (RCONClient or an RCONEndpoint)"""
+        self.bot = bot
+        self.rcon = rcon
+        self.channel_id = channel_id
+        self.webhook: Optional[discord.Webhook] = None
+        self.to_game_relay = _Relay(
+            "game",
+            TokenBucket(1, Config.CHAT_FLUSH_INTERVAL),
+            pack_for_game,
+            self._send_to_game
+        )
+        self.to_discord_relay = _Relay(
+            "Discord",
+            TokenBucket(Config.CHAT_WEBHOOK_BURST, Config.CHAT_WEBHOOK_INTERVAL),
+            pack_for_discord,
+            self._send_to_discord
+        )
+
+    @property
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {'to_game': self.to_game_relay.stats, 'to_discord': self.to_discord_relay.stats}
+
+    async def start(self) -> None:
+        self.webhook = await self._get_webhook()
+        self.to_game_relay.start()
+        self.to_discord_relay.start()
+
+    def stop(self) -> None:
+        self.to_game_relay.stop()
+        self.to_discord_relay.stop()
+
+    async def _get_webhook(self) -> Optional[discord.Webhook]:
+        """The configured webhook, or one the bot owns in the chat channel (None: plain messages)"""
+        if Config.CHAT_WEBHOOK_URL:
+            return discord.Webhook.from_url(Config.CHAT_WEBHOOK_URL, client=self.bot)
+        channel = self.bot.get_channel(self.channel_id)
+        if channel is None:
+            logger.error(f"Chat channel {self.channel_id} not found or not visible to the bot")
+            return None
+        try:
+            for webhook in await channel.webhooks():
+                if webhook.name == WEBHOOK_NAME and webhook.user == self.bot.user:
+                    return webhook
+            return await channel.create_webhook(name=WEBHOOK_NAME)
+        except discord.Forbidden:
+            logger.warning("No Manage Webhooks permission in the chat channel, relaying as bot messages")
+            return None
+        except discord.HTTPException as e:
+            logger.warning(f"Could not set up the chat webhook ({e}), relaying as bot messages")
+            return None
+
+    # Discord -> game
+
+    def on_discord_message(self, message: discord.Message) -> None:
+        if message.author.bot or message.webhook_id:
+            return
+        text = message.clean_content
+        if message.attachments:
+            text += " [attachment]"
+        for line in text.splitlines():
+            if line.strip():
+                self.to_game_relay.put(f"[Discord] {message.author.display_name}: {line[:MAX_GAME_LINE]}")
+
+    async def _send_to_game(self, lines: List[str]) -> None:
+        await self.rcon.send_async(RCONCommands.chat(lines))
+
+    # Game -> Discord
+
+    def on_game_chat(self, player: str, text: str) -> None:
+        if player == "<server>":
+            return  # console and RCON messages, not players
+        line = f"**{discord.utils.escape_markdown(player)}**: {discord.utils.escape_markdown(text)}"
+        self.to_discord_relay.put(line[:MAX_DISCORD_LENGTH])
+
+    async def _send_to_discord(self, lines: List[str]) -> None:
+        content = "\n".join(lines)
+        mentions = discord.AllowedMentions.none()
+        if self.webhook is not None:
+            await self.webhook.send(content, username="Factorio", allowed_mentions=mentions)
+            return
+        channel = self.bot.get_channel(self.channel_id)
+        if channel is None:
+            raise FactorioBotError(f"Chat channel {self.channel_id} not found")
+        await channel.send(content, allowed_mentions=mentions)
@@ -0,0 +1,45 @@
+import asyncio
+import logging
+from typing import Optional
+from ..utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Finer than the latency buckets: a healthy loop is late by well under a millisecond
+LAG_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Lag worth a warning in the log (something blocked the loop)
+WARN_LAG = 0.5
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes a sleeping task. Anything that
+    blocks the loop (disk I/O, a slow callback, CPU-heavy code) delays
+    every coroutine by the same amount, and shows up here.
+    """
+
+    def __init__(self, interval: float):
+        """:param interval: Seconds between samples"""
+        self.interval = interval
+        self.histogram = metrics.histogram('event_loop_lag_seconds', "Event loop wake-up delay", LAG_BUCKETS)
+        self.last: Optional[float] = None
+        metrics.gauge('event_loop_lag_last_seconds', "Most recent event loop wake-up delay", lambda: self.last)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last = max(0.0, loop.time() - expected)
+            self.histogram.observe(self.last)
+            if self.last >= WARN_LAG:
+                logger.warning(f"Event loop blocked for {self.last * 1000:.0f} ms")
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from typing import Optional
+from ..utils.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Longest wait for a scraper to send its request
+REQUEST_TIMEOUT = 5.0
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsServer:
+    """Serves the registry as Prometheus text on GET /metrics (plain asyncio, no web framework)"""
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        if self._server is not None:
+            return
+        try:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            logger.info(f"Metrics at http://{self.host}:{self.port}/metrics")
+        except OSError as e:
+            logger.error(f"Could not start the metrics endpoint on {self.host}:{self.port}: {e}")
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), REQUEST_TIMEOUT)
+            method, path, *_ = request.split(b'\r\n', 1)[0].decode('latin-1').split()
+            if method != 'GET':
+                status, body = '405 Method Not Allowed', b''
+            elif path.split('?')[0] != '/metrics':
+                status, body = '404 Not Found', b''
+            else:
+                status, body = '200 OK', self.registry.render().encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from typing import Optional
+import discord
+from ..ui.embeds import PANEL_TITLE, generate_placeholder_embed
+from ..ui.views import ServerControlView
+
+logger = logging.getLogger(__name__)
+
+# How far back to look for old panels when the persisted one is gone
+PANEL_SCAN_LIMIT = 100
+
+
+def is_panel(message: discord.Message, user: discord.abc.User) -> bool:
+    """A control panel (or !status reply) posted by this bot"""
+    return (
+        message.author == user
+        and bool(message.embeds)
+        and (message.embeds[0].title or "").startswith(PANEL_TITLE)
+    )
+
+
+async def bootstrap_panel(
+    channel: discord.abc.Messageable,
+    user: discord.abc.User,
+    panel_id: Optional[int],
+    server_name: Optional[str] = None,
+    purge: bool = True
+) -> discord.Message:
+    """
+    Find the persisted panel with one lookup, or post a new one.
+    A new panel is a placeholder the first status poll fills in, so it
+    appears without waiting for RCON.
+    :param panel_id: Persisted panel message ID, if any
+    :param purge: Delete older panels before posting (when the persisted one is gone)
+    :return: The panel message
+    """
+    if panel_id:
+        try:
+            message = await channel.fetch_message(panel_id)
+            if message.author == user:
+                return message
+        except discord.NotFound:
+            pass
+
+    if purge:
+        await purge_panels(channel, user)
+    return await channel.send(
+        embed=generate_placeholder_embed(server_name),
+        view=ServerControlView(server_name)
+    )
+
+
+async def purge_panels(channel: discord.abc.Messageable, user: discord.abc.User) -> int:
+    """
+    Delete this bot's old panels, in bulk where Discord allows it
+    (one call per 100 messages younger than two weeks)
+    :return: Number of messages deleted
+    """
+    check = lambda message: is_panel(message, user)
+    try:
+        deleted = await channel.purge(limit=PANEL_SCAN_LIMIT, check=check, reason="Old control panels")
+        count = len(deleted)
+    except discord.Forbidden:
+        # Bulk delete needs Manage Messages; the bot may always delete its own, one at a time
+        stale = [message async for message in channel.history(limit=PANEL_SCAN_LIMIT) if check(message)]
+        results = await asyncio.gather(*(message.delete() for message in stale), return_exceptions=True)
+        count = sum(1 for result in results if not isinstance(result, Exception))
+    if count:
+        logger.info(f"Removed {count} old control panels")
+    return count
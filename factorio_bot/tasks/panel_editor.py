@@ -0,0 +1,101 @@
+import asyncio
+import time
+import discord
+import logging
+from typing import Any, Optional
+from ..config import Config
+from ..ui.embeds import embed_fingerprint
+from ..utils.metrics import metrics
+from ..utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+class PanelEditor:
+    """
+    Rate-limited, diff-aware editor for the status panel.
+    Only the newest pending embed is kept, so bursts of updates
+    collapse into a single Discord edit.
+    """
+
+    def __init__(self, panel: Any):
+        """:param panel: Holder of the panel's status_message (a ServerContext)"""
+        self.panel = panel
+        self.bucket = TokenBucket(Config.PANEL_EDIT_BURST, Config.PANEL_EDIT_INTERVAL)
+        self._pending: Optional[tuple[discord.Embed, str]] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._last_fingerprint: Optional[str] = None
+        self._last_edit = 0.0
+        self.timer = metrics.timer('panel_edit', "Discord panel edit", server=getattr(panel, 'name', None) or "default")
+
+        # Counters
+        self.submitted = 0
+        self.edits_sent = 0
+        self.edits_skipped = 0
+        self.edits_coalesced = 0
+        self.edits_failed = 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Edit counters for monitoring"""
+        return {
+            'submitted': self.submitted,
+            'sent': self.edits_sent,
+            'skipped': self.edits_skipped,
+            'coalesced': self.edits_coalesced,
+            'failed': self.edits_failed,
+        }
+
+    def submit(self, embed: discord.Embed) -> bool:
+        """
+        Queue an embed for the panel
+        :return: False if the edit was skipped because nothing changed
+        """
+        self.submitted += 1
+        fingerprint = embed_fingerprint(embed)
+        stale = time.monotonic() - self._last_edit >= Config.PANEL_MAX_STALENESS
+
+        if self._pending is None and fingerprint == self._last_fingerprint and not stale:
+            self.edits_skipped += 1
+            return False
+
+        if self._pending is not None:
+            self.edits_coalesced += 1
+        self._pending = (embed, fingerprint)
+        self._wakeup.set()
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            await self.bucket.acquire()
+            self._wakeup.clear()
+
+            pending, self._pending = self._pending, None
+            message = self.panel.status_message
+            if pending is None or message is None:
+                continue
+
+            embed, fingerprint = pending
+            start = time.perf_counter()
+            try:
+                await message.edit(embed=embed)
+                self._last_fingerprint = fingerprint
+                self._last_edit = time.monotonic()
+                self.edits_sent += 1
+                self.timer.observe(time.perf_counter() - start)
+            except discord.NotFound:
+                self.timer.observe(time.perf_counter() - start, error=True)
+                self.panel.status_message = None
+            except Exception as e:
+                self.timer.observe(time.perf_counter() - start, error=True)
+                self.edits_failed += 1
+                logger.error(f"Panel edit failed: {e}")
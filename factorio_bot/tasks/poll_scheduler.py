@@ -0,0 +1,73 @@
+import random
+from typing import Callable, Optional
+
+
+class PollScheduler:
+    """
+    Decides how long to wait before the next status poll.
+
+    - fast polling after a Start/Stop/Save action until the state settles
+    - steady polling while the server is online
+    - exponential backoff with jitter while it is offline, starting
+      at `offline_base` (default: `steady`)
+    """
+
+    def __init__(
+        self,
+        steady: float,
+        fast: float,
+        offline_max: float,
+        fast_window: float,
+        jitter: float = 0.2,
+        rng: Callable[[], float] = random.random,
+        offline_base: Optional[float] = None
+    ):
+        self.steady = steady
+        self.fast = fast
+        self.offline_base = steady if offline_base is None else offline_base
+        self.offline_max = max(offline_max, self.offline_base)
+        self.fast_window = fast_window
+        self.jitter = jitter
+        self.rng = rng
+
+        self._fast_until = 0.0
+        self._expect_online: Optional[bool] = None
+        self._last_online: Optional[bool] = None
+        self._offline_streak = 0
+
+    @property
+    def fast_mode(self) -> bool:
+        return self._fast_until > 0
+
+    def boost(self, now: float, expect_online: Optional[bool] = None) -> None:
+        """
+        Poll quickly until the server reaches the expected state
+        :param expect_online: State the action should lead to, None if it shouldn't change
+        """
+        self._fast_until = now + self.fast_window
+        self._expect_online = expect_online
+        self._offline_streak = 0
+
+    def record(self, online: bool, now: float) -> None:
+        """Feed the result of a poll"""
+        if self.fast_mode:
+            if self._expect_online is None:
+                settled = online == self._last_online
+            else:
+                settled = online == self._expect_online
+            if settled or now >= self._fast_until:
+                self._fast_until = 0.0
+                self._expect_online = None
+
+        self._offline_streak = 0 if online else self._offline_streak + 1
+        self._last_online = online
+
+    def next_delay(self, now: float) -> float:
+        """Seconds to wait before the next poll"""
+        if self.fast_mode and now < self._fast_until:
+            return self.fast
+        if self._last_online is not False:
+            return self.steady
+
+        backoff = min(self.offline_max, self.offline_base * 2 ** (self._offline_streak - 1))
+        return backoff * (1 - self.jitter * self.rng())
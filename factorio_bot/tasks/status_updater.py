@@ -1,40 +1,114 @@
-from discord.ext import commands, tasks
+from discord.ext import commands
 from typing import Optional
-import discord
+import asyncio
+import time
 import logging
-from ..server.monitor import ServerMonitor
+from ..server.context import ServerContext, default_server
+from ..server.models import ServerStatus
 from ..ui.embeds import generate_status_embed
 from ..config import Config
-from ..exceptions import RCONError
+from ..utils.metrics import metrics
+from .panel_editor import PanelEditor
+from .poll_scheduler import PollScheduler
 
 logger = logging.getLogger(__name__)
 
 class StatusUpdater:
     """Handles periodic status updates"""
-    
-    def __init__(self, bot: commands.Bot):
+
+    def __init__(self, bot: commands.Bot, server: Optional[ServerContext] = None, start_delay: float = 0.0):
+        """
+        :param server: Server whose panel to update (default: the configured server)
+        :param start_delay: Offset for the first poll, to stagger many servers
+        """
         self.bot = bot
-        self.update_status.start()
+        self.server = server or default_server
+        self.start_delay = start_delay
+        self.editor = PanelEditor(self.server)
+        self.scheduler = PollScheduler(
+            steady=Config.STATUS_UPDATE_INTERVAL,
+            fast=Config.STATUS_FAST_INTERVAL,
+            offline_max=Config.STATUS_OFFLINE_MAX_INTERVAL,
+            fast_window=Config.STATUS_FAST_WINDOW,
+            offline_base=Config.STATUS_UPDATE_INTERVAL
+        )
+        self.polls = 0
+        self.timer = metrics.timer('status_update', "Panel status update", server=self.server.name or "default")
+        self._wakeup = asyncio.Event()
+        self._poll_now = False
+        self.editor.start()
+        self._task: Optional[asyncio.Task] = asyncio.create_task(self._run())
+
+    def push_status(self, status: ServerStatus) -> bool:
+        """
+        Render a status and hand it to the panel editor
+        :return: False if the panel already shows this status
+        """
+        return self.editor.submit(generate_status_embed(status, self.server.name))
+
+    def observe(self, status: ServerStatus) -> None:
+        """
+        Use a status fetched elsewhere (e.g. !status) as this round's poll.
+        Updates the panel and restarts the poll timer.
+        """
+        self.scheduler.record(status.online, time.monotonic())
+        if self.server.status_message:
+            self.push_status(status)
+        self._wakeup.set()
+
+    def set_online_interval(self, seconds: float) -> None:
+        """
+        Change how often an online server is polled, e.g. to a slow
+        reconciliation rate while player events stream in from the log
+        """
+        self.scheduler.steady = seconds
+
+    def boost(self, expect_online: Optional[bool] = None) -> None:
+        """Poll now and keep polling fast until the server reaches the expected state"""
+        self.scheduler.boost(time.monotonic(), expect_online)
+        self._poll_now = True
+        self._wakeup.set()
 
-    @tasks.loop(seconds=Config.STATUS_UPDATE_INTERVAL)
     async def update_status(self):
         """Update the existing panel only"""
-        if not self.bot.status_message:
+        if not self.server.status_message:
             return
-            
+
+        start = time.perf_counter()
         try:
-            status = ServerMonitor.get_status()
-            await self.bot.status_message.edit(
-                embed=generate_status_embed(status)
-            )
-        except discord.NotFound:
-            self.bot.status_message = None
+            # Always a fresh query, but shared with any command asking at the same time
+            status = await self.server.monitor.get_status_async(max_age=0)
+            self.polls += 1
+            self.scheduler.record(status.online, time.monotonic())
+            self.push_status(status)
         except Exception as e:
+            self.timer.observe(time.perf_counter() - start, error=True)
             logger.error(f"Update failed: {e}")
+        else:
+            self.timer.observe(time.perf_counter() - start)
 
-    @update_status.before_loop
-    async def before_update_status(self):
+    async def _run(self):
         await self.bot.wait_until_ready()
+        if self.start_delay:
+            await asyncio.sleep(self.start_delay)
+        poll = True
+        while True:
+            if poll:
+                await self.update_status()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    self.scheduler.next_delay(time.monotonic())
+                )
+                # Woken early: either poll right away or just restart the timer
+                poll = self._poll_now
+            except asyncio.TimeoutError:
+                poll = True
+            self._poll_now = False
 
     def stop(self):
-        self.update_status.cancel()
\ No newline at end of file
+        if self._task:
+            self._task.cancel()
+        self.editor.stop()
+        logger.info(f"Panel edit stats: {self.editor.stats}")
@@ -2,6 +2,6 @@
 Discord UI components for Factorio bot
 """
 from .views import ServerControlView
-from .embeds import generate_status_embed
+from .embeds import generate_status_embed, generate_placeholder_embed, embed_fingerprint
 
-__all__ = ['ServerControlView', 'generate_status_embed']
\ No newline at end of file
+__all__ = ['ServerControlView', 'generate_status_embed', 'generate_placeholder_embed', 'embed_fingerprint']
\ No newline at end of file
@@ -1,17 +1,94 @@
 import discord
+import hashlib
+import json
+import re
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from ..server.models import ServerStatus
-from ..constants import StatusEmoji
+from ..server.history import DAY, HOUR, WEEK, StatusHistory
+from ..constants import StatusEmoji, BreakerState
 
-def generate_status_embed(status: ServerStatus) -> discord.Embed:
+SPARK_BLOCKS = "▁▂▃▄▅▆▇█"
+PANEL_TITLE = "Factorio Server Control Panel"
+
+def _round_numbers(value: str, step: float) -> str:
+    """Round every number in a field value to a multiple of step (a full server sits at 60 UPS, not on a boundary)"""
+    return re.sub(r"\d+(?:\.\d+)?", lambda m: f"{round(float(m[0]) / step) * step:g}", value)
+
+# Fields that drift on every poll while the server runs. They are hashed at a coarse
+# resolution so drift alone doesn't cost an edit; the exact value goes out with the next one.
+COARSE_FIELDS = {
+    'Playtime': lambda value: value.split(' ')[0],  # whole hours
+    'Evolution': lambda value: _round_numbers(value, 1),  # whole percent
+    'UPS': lambda value: _round_numbers(value, 5),  # the lag marker still counts
+    'Research': lambda value: re.sub(r"\((\d+)%\)", lambda m: f"({int(m[1]) // 10 * 10}%)", value),
+}
+
+def embed_fingerprint(embed: discord.Embed) -> str:
+    """
+    Hash the meaningful content of an embed.
+    The timestamp is left out and COARSE_FIELDS are rounded, so a panel
+    whose server is merely running along hashes the same every poll.
+    """
+    data = embed.to_dict()
+    data.pop('timestamp', None)
+    for field in data.get('fields', []):
+        coarse = COARSE_FIELDS.get(field['name'])
+        if coarse:
+            field['value'] = coarse(field['value'])
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+def sparkline(points: List[Optional[float]], low: Optional[float] = None) -> str:
+    """
+    Render values as a line of block characters, gaps as spaces
+    :param low: Bottom of the scale (default: the smallest value)
+    """
+    values = [p for p in points if p is not None]
+    if not values:
+        return " " * len(points)
+    low = min(values) if low is None else low
+    span = max(values) - low
+    top = len(SPARK_BLOCKS) - 1
+    return "".join(
+        " " if p is None else SPARK_BLOCKS[round((p - low) / span * top) if span else 0]
+        for p in points
+    )
+
+def format_duration(seconds: float) -> str:
+    """Hours and minutes, e.g. 12h 05m"""
+    hours, remainder = divmod(int(seconds), 3600)
+    return f"{hours}h {remainder // 60:02d}m"
+
+def format_rtt(seconds: float) -> str:
+    """
+    Round trip in coarse steps (10 ms below 100 ms, then 100 ms),
+    so ordinary jitter doesn't change the panel and cost an edit
+    """
+    ms = seconds * 1000
+    step = 10 if ms < 100 else 100
+    return f"{max(step, round(ms / step) * step):.0f} ms"
+
+def panel_title(server_name: Optional[str] = None) -> str:
+    return PANEL_TITLE + (f" · {server_name}" if server_name else "")
+
+def generate_placeholder_embed(server_name: Optional[str] = None) -> discord.Embed:
+    """Panel posted at startup, before the first status arrives"""
+    return discord.Embed(
+        title=panel_title(server_name),
+        description="⏳ Checking server status...",
+        timestamp=datetime.now(),
+        color=discord.Color.light_grey()
+    )
+
+def generate_status_embed(status: ServerStatus, server_name: Optional[str] = None) -> discord.Embed:
     """
     Generate a Discord embed showing server status
     :param status: Current ServerStatus object
+    :param server_name: Fleet server name for the title
     :return: Formatted discord.Embed
     """
     embed = discord.Embed(
-        title="Factorio Server Control Panel",
+        title=panel_title(server_name),
         timestamp=status.last_updated,
         color=discord.Color.green() if status.online else discord.Color.red()
     )
@@ -30,6 +107,77 @@ def generate_status_embed(status: ServerStatus) -> discord.Embed:
         inline=True
     )
     
+    # RCON circuit breaker
+    if status.breaker_state is not None:
+        link = {
+            BreakerState.CLOSED: "Connected",
+            BreakerState.HALF_OPEN: "Reconnecting",
+            BreakerState.OPEN: "Unreachable",
+        }[status.breaker_state]
+        if status.breaker_changed is not None:
+            link += f" since <t:{int(status.breaker_changed.timestamp())}:R>"
+        embed.add_field(
+            name="RCON",
+            value=link,
+            inline=True
+        )
+    
+    # Process uptime (only for servers started by the bot), counted by the Discord client
+    if status.online and status.uptime is not None:
+        started = round((status.last_updated.timestamp() - status.uptime) / 60) * 60
+        embed.add_field(
+            name="Uptime",
+            value=f"since <t:{started}:R>",
+            inline=True
+        )
+    
+    # Game details (only available from the status probe)
+    if status.online and status.game_tick is not None:
+        if status.playtime is not None:
+            embed.add_field(
+                name="Playtime",
+                value=format_duration(status.playtime),
+                inline=True
+            )
+        if status.evolution_factor is not None:
+            embed.add_field(
+                name="Evolution",
+                value=f"{status.evolution_factor:.1%}",
+                inline=True
+            )
+        if status.ups is not None:
+            target = 60 * (status.game_speed or 1)
+            embed.add_field(
+                name="UPS",
+                value=f"{'🐢 ' if status.ups < 0.9 * target else ''}{status.ups:.0f} / {target:.0f}",
+                inline=True
+            )
+        research = status.current_research or "None"
+        if status.research_progress is not None:
+            research += f" ({status.research_progress:.0%})"
+        embed.add_field(
+            name="Research",
+            value=research,
+            inline=True
+        )
+    
+    # Player count over the last day
+    if status.player_trend is not None:
+        peak = max((p for p in status.player_trend if p is not None), default=0)
+        embed.add_field(
+            name=f"Players (24h, peak {peak:.0f})",
+            value=f"`{sparkline(status.player_trend, low=0)}`",
+            inline=False
+        )
+    
+    # RCON responsiveness
+    if status.online and status.rcon_rtt is not None:
+        embed.add_field(
+            name="Response",
+            value=format_rtt(status.rcon_rtt),
+            inline=True
+        )
+    
     # Players field
     player_list = "\n".join(status.players) if status.players else "No players connected"
     embed.add_field(
@@ -41,4 +189,49 @@ def generate_status_embed(status: ServerStatus) -> discord.Embed:
     # Footer with timestamp
     embed.set_footer(text="Last updated")
     
-    return embed
\ No newline at end of file
+    return embed
+
+def generate_history_embed(history: StatusHistory, server_name: Optional[str] = None) -> discord.Embed:
+    """
+    Generate a Discord embed with player count and availability trends
+    :param history: The server's StatusHistory
+    :param server_name: Fleet server name for the title
+    :return: Formatted discord.Embed
+    """
+    embed = discord.Embed(
+        title="Server Statistics" + (f" · {server_name}" if server_name else ""),
+        timestamp=datetime.now(),
+        color=discord.Color.blue()
+    )
+
+    # 24 hourly and 42 four-hourly buckets, read from the rollups only
+    for label, span, step in (("24h", DAY, HOUR), ("7d", WEEK, 4 * HOUR)):
+        players = history['players']
+        summary = players.summary(span)
+        if summary is None:
+            value = "No data yet"
+        else:
+            low, mean, high = summary
+            value = (
+                f"`{sparkline(players.points(span, step), low=0)}`\n"
+                f"min {low:.0f} · avg {mean:.1f} · max {high:.0f}"
+            )
+        embed.add_field(name=f"Players ({label})", value=value, inline=False)
+
+        ups = history['ups'].summary(span)
+        if ups is not None:
+            embed.add_field(
+                name=f"UPS ({label})",
+                value=f"`{sparkline(history['ups'].points(span, step))}`\nmin {ups[0]:.0f} · avg {ups[1]:.0f}",
+                inline=False
+            )
+
+        online = history['online'].summary(span)
+        embed.add_field(
+            name=f"Online ({label})",
+            value=f"{online[1]:.1%}" if online else "No data yet",
+            inline=True
+        )
+
+    embed.set_footer(text="Sampled on every status update")
+    return embed
@@ -1,37 +1,139 @@
 import discord
-from discord.ui import View, Select, Button
+from discord.ui import View, Select, Button, Modal, TextInput
+import time
 from typing import Optional
 from pathlib import Path
-from ..config import Config
 from ..server.controller import ServerController
+from ..server.context import ServerContext
 from ..constants import ButtonIDs
+from ..utils.save_catalog import SaveEntry
+from ..utils.save_metadata import save_metadata
 from ..utils.logging_utils import logger
+from ..utils.metrics import metrics
+
+# Button handling time, from click to the handler finishing (includes waiting for a save pick)
+button_timers = {
+    button.value: metrics.timer('button', "Panel button handler", action=button.name.lower())
+    for button in ButtonIDs
+}
+
+class SaveSearchModal(Modal, title="Search saves"):
+    query = TextInput(
+        label="Save name contains",
+        placeholder="Leave empty to show all saves",
+        required=False,
+        max_length=100
+    )
+
+    def __init__(self, picker: 'SaveSelectView'):
+        super().__init__()
+        self.picker = picker
+        self.query.default = picker.query
+
+    async def on_submit(self, interaction: discord.Interaction):
+        self.picker.apply_filter(str(self.query.value))
+        await self.picker.refresh(interaction)
+
 
 class SaveSelectView(View):
-    def __init__(self, saves: list[tuple[Path, str]]):
+    """
+    Paginated, searchable save picker.
+    Pages are sliced lazily from the catalog's pre-sorted list, so opening
+    it costs the same for 30 saves or 3,000.
+    """
+
+    PAGE_SIZE = 25  # Discord's option limit
+
+    def __init__(self, entries: list[SaveEntry]):
         super().__init__()
-        options = [
-            discord.SelectOption(
-                label=name,
-                value=str(i)  # Store index
-            ) for i, (_, name) in enumerate(saves)
-        ]
-        
-        self.select = Select(
-            placeholder="Choose a save file...",
-            options=options[:25]  # Discord limits to 25 options
-        )
+        self.entries = entries  # Newest first, shared with the catalog
+        self.filtered = entries
+        self.query = ""
+        self.page = 0
+
+        self.select = Select(placeholder="Choose a save file...", row=0)
         self.select.callback = self.on_select
-        self.add_item(self.select)
-        
+        self.prev_button = Button(label="◀ Prev", style=discord.ButtonStyle.secondary, row=1)
+        self.prev_button.callback = self.on_prev
+        self.next_button = Button(label="Next ▶", style=discord.ButtonStyle.secondary, row=1)
+        self.next_button.callback = self.on_next
+        self.search_button = Button(label="Search", emoji="🔍", style=discord.ButtonStyle.primary, row=1)
+        self.search_button.callback = self.on_search
+        for item in (self.select, self.prev_button, self.next_button, self.search_button):
+            self.add_item(item)
+
         self.selected_save: Optional[Path] = None
         self.selected_save_name: Optional[str] = None
-        self.saves = saves
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.filtered) // self.PAGE_SIZE))
+
+    @property
+    def page_entries(self) -> list[SaveEntry]:
+        start = self.page * self.PAGE_SIZE
+        return self.filtered[start:start + self.PAGE_SIZE]
+
+    @property
+    def header(self) -> str:
+        text = f"Select a save file to load (page {self.page + 1}/{self.page_count}, {len(self.filtered)} saves"
+        if self.query:
+            text += f" matching `{self.query}`"
+        return text + "):"
+
+    def apply_filter(self, query: str) -> None:
+        self.query = query.strip()
+        needle = self.query.lower()
+        self.filtered = [e for e in self.entries if needle in e.name.lower()] if needle else self.entries
+        self.page = 0
+
+    async def build_page(self) -> None:
+        """Fill the select with the current page only"""
+        entries = self.page_entries
+        metadata = await save_metadata.get_many(entries, present=self.entries)
+        if entries:
+            self.select.options = [
+                discord.SelectOption(
+                    label=entry.display[:100],
+                    value=str(i),  # Index into the current page
+                    description=(
+                        f"{metadata[entry.path].world_name} · {metadata[entry.path].summary}"[:100]
+                        if entry.path in metadata else None
+                    )
+                ) for i, entry in enumerate(entries)
+            ]
+            self.select.disabled = False
+        else:
+            self.select.options = [discord.SelectOption(label="No matching saves", value="-1")]
+            self.select.disabled = True
+        self.prev_button.disabled = self.page == 0
+        self.next_button.disabled = self.page >= self.page_count - 1
+
+    async def refresh(self, interaction: discord.Interaction) -> None:
+        # Acknowledge first: building the page may read save metadata from disk
+        await interaction.response.defer()
+        await self.build_page()
+        await interaction.edit_original_response(content=self.header, view=self)
+
+    async def on_prev(self, interaction: discord.Interaction):
+        self.page = max(0, self.page - 1)
+        await self.refresh(interaction)
+
+    async def on_next(self, interaction: discord.Interaction):
+        self.page = min(self.page_count - 1, self.page + 1)
+        await self.refresh(interaction)
+
+    async def on_search(self, interaction: discord.Interaction):
+        await interaction.response.send_modal(SaveSearchModal(self))
 
     async def on_select(self, interaction: discord.Interaction):
         selected_index = int(self.select.values[0])
-        self.selected_save = self.saves[selected_index][0]
-        self.selected_save_name = self.saves[selected_index][1]  # Store display name
+        if selected_index < 0:
+            await interaction.response.defer()
+            return
+        entry = self.page_entries[selected_index]
+        self.selected_save = entry.path
+        self.selected_save_name = entry.display  # Store display name
         await interaction.response.defer()
         self.stop()
 
@@ -39,9 +141,14 @@ class SaveSelectView(View):
 class ServerControlView(View):
     """Persistent server control buttons"""
     
-    def __init__(self):
+    def __init__(self, server_name: Optional[str] = None):
+        """:param server_name: Fleet server the buttons act on; it is appended to the custom IDs"""
         super().__init__(timeout=None)
+        self.server_name = server_name
         self._setup_buttons()
+
+    def _custom_id(self, button: ButtonIDs) -> str:
+        return f"{button.value}:{self.server_name}" if self.server_name else button.value
     
     def _setup_buttons(self) -> None:
         # Start Button
@@ -49,7 +156,7 @@ class ServerControlView(View):
             style=discord.ButtonStyle.green,
             label="Start Server",
             emoji="🟢",
-            custom_id=ButtonIDs.START_SERVER.value,
+            custom_id=self._custom_id(ButtonIDs.START_SERVER),
             row=0
         ))
         
@@ -58,7 +165,7 @@ class ServerControlView(View):
             style=discord.ButtonStyle.blurple,
             label="Save Game",
             emoji="💾",
-            custom_id=ButtonIDs.MANUAL_SAVE.value,
+            custom_id=self._custom_id(ButtonIDs.MANUAL_SAVE),
             row=0
         ))
         
@@ -67,7 +174,7 @@ class ServerControlView(View):
             style=discord.ButtonStyle.red,
             label="Stop Server",
             emoji="🛑",
-            custom_id=ButtonIDs.STOP_SERVER.value,
+            custom_id=self._custom_id(ButtonIDs.STOP_SERVER),
             row=0
         ))
     
@@ -86,32 +193,55 @@ class ServerControlView(View):
         custom_id = interaction.data.get('custom_id')
         if not custom_id:
             return
+        action, _, server_name = custom_id.partition(':')
+        server = interaction.client.get_server(server_name or None)
+        if server is None or action not in button_timers:
+            return
 
+        timer = button_timers[action]
+        start = time.perf_counter()
         try:
-            if custom_id == ButtonIDs.START_SERVER.value:
-                await self._handle_start(interaction)
-            elif custom_id == ButtonIDs.MANUAL_SAVE.value:
-                await self._handle_save(interaction)
-            elif custom_id == ButtonIDs.STOP_SERVER.value:
-                await self._handle_stop(interaction)
+            if action == ButtonIDs.START_SERVER.value:
+                await self._handle_start(interaction, server)
+            elif action == ButtonIDs.MANUAL_SAVE.value:
+                await self._handle_save(interaction, server)
+            elif action == ButtonIDs.STOP_SERVER.value:
+                await self._handle_stop(interaction, server)
+            timer.observe(time.perf_counter() - start)
         except Exception as e:
+            timer.observe(time.perf_counter() - start, error=True)
             await interaction.followup.send(
                 f"⚠️ Error: {str(e)}",
                 ephemeral=True
             )
 
-    async def _handle_start(self, interaction: discord.Interaction):
-        saves = Config.get_all_saves()
-        if not saves:
+    @staticmethod
+    def _boost_polling(server: ServerContext, expect_online: Optional[bool] = None) -> None:
+        """Ask the status updater to poll fast until the action takes effect"""
+        if server.status_updater:
+            server.status_updater.boost(expect_online)
+
+    async def _handle_start(self, interaction: discord.Interaction, server: ServerContext):
+        if server.catalog is None:
             await interaction.response.send_message(
+                "❌ This server is remote and can't be started from here.",
+                ephemeral=True
+            )
+            return
+        # Scanning saves and reading their metadata can outlast Discord's 3 s interaction deadline
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        entries = await server.catalog.get_entries()
+        if not entries:
+            await interaction.followup.send(
                 "❌ No save files found!", 
                 ephemeral=True
             )
             return
 
-        view = SaveSelectView(saves)
-        await interaction.response.send_message(
-            "Select a save file to load:",
+        view = SaveSelectView(entries)
+        await view.build_page()
+        await interaction.followup.send(
+            view.header,
             view=view,
             ephemeral=True
         )
@@ -119,22 +249,25 @@ class ServerControlView(View):
         # Wait for selection
         await view.wait()
         if view.selected_save:
-            Config.CURRENT_WORLD_NAME = view.selected_save_name
+            server.world_name = view.selected_save_name
             await interaction.followup.send(
                 f"🚀 Starting server with {view.selected_save.name}...",
                 ephemeral=True
             )
-            ServerController.start_server(view.selected_save)
+            await ServerController.start_server(view.selected_save, server)
+            self._boost_polling(server, expect_online=True)
 
 
-    async def _handle_save(self, interaction: discord.Interaction) -> None:
+    async def _handle_save(self, interaction: discord.Interaction, server: ServerContext) -> None:
         """Manual save button handler"""
         await interaction.response.defer(ephemeral=True, thinking=True)
-        result = ServerController.save_game()
-        await interaction.followup.send(f"💾 {result or 'Game saved successfully!'}")
+        result = await ServerController.save_game(server=server)
+        self._boost_polling(server)
+        await interaction.followup.send(f"💾 Game saved in {result.duration:.1f}s")
 
-    async def _handle_stop(self, interaction: discord.Interaction) -> None:
+    async def _handle_stop(self, interaction: discord.Interaction, server: ServerContext) -> None:
         """Stop server button handler"""
         await interaction.response.defer(ephemeral=True, thinking=True)
-        ServerController.stop_server()
+        await ServerController.stop_server(server)
+        self._boost_polling(server, expect_online=False)
         await interaction.followup.send("🛑 Server shutdown initiated.")
\ No newline at end of file
@@ -4,11 +4,21 @@ Utility functions and helpers for Factorio bot
 from .file_utils import validate_save_file, list_save_files
 from .logging_utils import setup_logger, logger  # Added logger export
 from .decorators import requires_admin
+from .save_catalog import SaveCatalog
+from .save_metadata import SaveMetadataCache
+from .backup import BackupStore
+from .metrics import MetricsRegistry
+from .state_store import StateStore
 
 __all__ = [
     'validate_save_file', 
     'list_save_files', 
     'setup_logger',
     'logger',  # Added this
-    'requires_admin'
+    'requires_admin',
+    'SaveCatalog',
+    'SaveMetadataCache',
+    'BackupStore',
+    'MetricsRegistry',
+    'StateStore'
 ]
\ No newline at end of file
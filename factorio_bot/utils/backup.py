@@ -0,0 +1,488 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Dict, Iterator, List, Optional, Set
+from ..config import Config
+from ..exceptions import BackupError
+from .save_catalog import SaveCatalog, save_catalog
+
+logger = logging.getLogger(__name__)
+
+# Content-defined chunking: a boundary follows ANCHOR_RUN consecutive bytes
+# from a fixed set of 16 values, i.e. roughly every 16**4 = 64 KiB of
+# compressed (high entropy) save data. Boundaries depend only on nearby
+# content, so an edit only changes the chunks around it.
+CHUNK_MIN = 16 * 1024
+CHUNK_MAX = 1024 * 1024
+ANCHOR_RUN = 4
+_ANCHOR_TABLE = bytes(1 if 0x80 <= b < 0x90 else 0 for b in range(256))
+_ANCHOR = b'\x01' * ANCHOR_RUN
+
+READ_BLOCK = 8 * 1024 * 1024
+# Chunk ranges handed to one worker call
+BATCH_BYTES = 8 * 1024 * 1024
+
+# Chunk file header: stored as-is or zlib compressed
+_RAW = b'\x00'
+_ZLIB = b'\x01'
+COMPRESSION_LEVEL = 6
+# Chunks whose first SAMPLE_SIZE bytes don't shrink below this ratio are stored raw
+SAMPLE_SIZE = 8 * 1024
+SAMPLE_RATIO = 0.9
+
+
+def chunk_lengths(stream: BinaryIO) -> Iterator[int]:
+    """Split a stream into content-defined chunks, yielding their lengths"""
+    buf = b''
+    eof = False
+    while True:
+        while not eof and len(buf) < READ_BLOCK:
+            block = stream.read(READ_BLOCK)
+            if block:
+                buf += block
+            else:
+                eof = True
+        # Both the byte mapping and the anchor search run in C
+        marks = buf.translate(_ANCHOR_TABLE)
+        start = 0
+        while start < len(buf):
+            if not eof and len(buf) - start < CHUNK_MAX:
+                break  # the boundary may lie in the next block
+            pos = marks.find(_ANCHOR, start + CHUNK_MIN, start + CHUNK_MAX)
+            end = pos + ANCHOR_RUN if pos != -1 else min(len(buf), start + CHUNK_MAX)
+            yield end - start
+            start = end
+        buf = buf[start:]
+        if eof:
+            return
+
+
+def _chunk_path(chunk_dir: Path, digest: str) -> Path:
+    return chunk_dir / digest[:2] / digest
+
+
+def _pack(data: bytes) -> bytes:
+    """Compress a chunk unless it is already compressed data"""
+    # Saves are mostly deflate streams; a quick sample avoids compressing them again
+    sample = data[:SAMPLE_SIZE]
+    if len(zlib.compress(sample, 1)) > len(sample) * SAMPLE_RATIO:
+        return _RAW + data
+    packed = zlib.compress(data, COMPRESSION_LEVEL)
+    return _ZLIB + packed if len(packed) < len(data) else _RAW + data
+
+
+def _store_chunks(path: str, chunk_dir: str, ranges: List[tuple[int, int]]) -> List[tuple[str, int, int]]:
+    """
+    Hash a run of chunks and write the ones the store doesn't have yet.
+    Runs in a worker process.
+    :return: (digest, length, bytes written) per chunk
+    """
+    results = []
+    with open(path, 'rb') as f:
+        f.seek(ranges[0][0])
+        for offset, length in ranges:
+            data = f.read(length)
+            if len(data) != length:
+                raise BackupError(f"{path} changed during backup")
+            digest = hashlib.sha256(data).hexdigest()
+            target = _chunk_path(Path(chunk_dir), digest)
+            written = 0
+            if not target.exists():
+                payload = _pack(data)
+                target.parent.mkdir(exist_ok=True)
+                tmp = target.with_name(f"{digest}.{os.getpid()}.tmp")
+                with open(tmp, 'wb') as out:
+                    out.write(payload)
+                os.replace(tmp, target)
+                written = len(payload)
+            results.append((digest, length, written))
+    return results
+
+
+def _plain_name(name: str, what: str) -> str:
+    """
+    Check a user-supplied file name stays inside the directory it is joined to
+    :raises BackupError: If it is empty, hidden, or has a path in it
+    """
+    if not name or name.startswith('.') or '/' in name or '\\' in name or Path(name).name != name:
+        raise BackupError(f"Invalid {what}: {name!r}")
+    return name
+
+
+def _read_chunk(chunk_dir: Path, digest: str) -> bytes:
+    payload = _chunk_path(chunk_dir, digest).read_bytes()
+    data = zlib.decompress(payload[1:]) if payload[:1] == _ZLIB else payload[1:]
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise BackupError(f"Chunk {digest[:12]} is corrupt")
+    return data
+
+
+@dataclass
+class BackupResult:
+    """Outcome of one snapshot"""
+    snapshot: str
+    size: int
+    chunks: int
+    new_chunks: int
+    new_bytes: int  # unique chunk bytes not already in the store
+    stored_bytes: int  # what those took on disk after compression
+    seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """MB/s of save data processed"""
+        return self.size / 1024 ** 2 / max(self.seconds, 1e-9)
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Save size per byte of new data written"""
+        return self.size / max(self.stored_bytes, 1)
+
+
+@dataclass
+class RestoreResult:
+    path: Path
+    size: int
+    seconds: float
+
+
+@dataclass
+class StoreStats:
+    snapshots: int
+    chunks: int
+    logical_bytes: int  # total size of every snapshot
+    stored_bytes: int  # chunk files on disk
+
+    @property
+    def dedup_ratio(self) -> float:
+        return self.logical_bytes / max(self.stored_bytes, 1)
+
+
+class BackupStore:
+    """
+    Content-addressed snapshot store for save files.
+
+    Layout:
+    - chunks/ab/<sha256>    chunk data (1 byte codec header + payload)
+    - snapshots/<id>.json   save name, size, mtime and the ordered chunk list
+
+    Snapshots of the same map share every unchanged chunk. Hashing and
+    compression run in a process pool; pruning and garbage collection
+    run after each backup.
+    """
+
+    # One worker pool, shared by every store (fleet mode has one per server)
+    _executor: Optional[ProcessPoolExecutor] = None
+
+    def __init__(self, directory: Path, workers: int, keep_last: int, keep_daily: int,
+                 save_dir: Path, catalog: SaveCatalog):
+        """
+        :param save_dir: The server's saves folder, where restores are written
+        :param catalog: Index of that folder, for backing up the newest save
+        """
+        self.directory = directory
+        self.save_dir = save_dir
+        self.catalog = catalog
+        self.chunk_dir = directory / "chunks"
+        self.snapshot_dir = directory / "snapshots"
+        self.workers = max(1, workers)
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        # Backups, restores and GC never overlap, so GC can't drop chunks in use
+        self._lock = asyncio.Lock()
+        self._pending: Set[asyncio.Task] = set()
+
+    # Snapshots
+
+    def _load_manifest(self, snapshot: str) -> dict:
+        path = self.snapshot_dir / f"{_plain_name(snapshot, 'snapshot')}.json"
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise BackupError(f"Snapshot not found: {snapshot}")
+
+    def list_snapshots(self) -> List[dict]:
+        """Snapshot summaries (without chunk lists), newest first"""
+        snapshots = []
+        if not self.snapshot_dir.exists():
+            return snapshots
+        for path in self.snapshot_dir.glob("*.json"):
+            try:
+                with open(path, 'r') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable snapshot {path.name}: {e}")
+                continue
+            manifest.pop('chunks', None)
+            manifest['id'] = path.stem
+            snapshots.append(manifest)
+        snapshots.sort(key=lambda m: m['created'], reverse=True)
+        return snapshots
+
+    def stats(self) -> StoreStats:
+        """Totals over the whole store (blocking)"""
+        snapshots = self.list_snapshots()
+        chunks = stored = 0
+        if self.chunk_dir.exists():
+            for sub in os.scandir(self.chunk_dir):
+                for entry in os.scandir(sub.path):
+                    chunks += 1
+                    stored += entry.stat().st_size
+        return StoreStats(
+            snapshots=len(snapshots),
+            chunks=chunks,
+            logical_bytes=sum(s['size'] for s in snapshots),
+            stored_bytes=stored
+        )
+
+    # Backup
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if BackupStore._executor is None:
+            BackupStore._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return BackupStore._executor
+
+    def _plan(self, path: Path) -> List[List[tuple[int, int]]]:
+        """Chunk the file and group the ranges into worker batches (blocking)"""
+        batches, batch, batch_bytes, offset = [], [], 0, 0
+        with open(path, 'rb') as f:
+            for length in chunk_lengths(f):
+                batch.append((offset, length))
+                offset += length
+                batch_bytes += length
+                if batch_bytes >= BATCH_BYTES:
+                    batches.append(batch)
+                    batch, batch_bytes = [], 0
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def backup(self, path: Path) -> Optional[BackupResult]:
+        """
+        Snapshot a save file
+        :return: None if the newest snapshot already has this exact file
+        :raises BackupError: If the file is missing or changes while it is read
+        """
+        async with self._lock:
+            started = time.perf_counter()
+            try:
+                before = path.stat()
+            except FileNotFoundError:
+                raise BackupError(f"Save file not found: {path.name}")
+
+            latest = next((s for s in await asyncio.to_thread(self.list_snapshots)
+                           if s['save'] == path.name), None)
+            if latest and latest['size'] == before.st_size and latest['mtime'] == before.st_mtime:
+                return None
+
+            self.chunk_dir.mkdir(parents=True, exist_ok=True)
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            batches = await asyncio.to_thread(self._plan, path)
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            results = await asyncio.gather(*(
+                loop.run_in_executor(executor, _store_chunks, str(path), str(self.chunk_dir), batch)
+                for batch in batches
+            ))
+
+            after = path.stat()
+            if (after.st_size, after.st_mtime) != (before.st_size, before.st_mtime):
+                # Chunks already written are left for GC
+                raise BackupError(f"{path.name} changed during backup")
+
+            chunks = [(digest, length) for batch in results for digest, length, _ in batch]
+            new: Dict[str, tuple[int, int]] = {}
+            for batch in results:
+                for digest, length, written in batch:
+                    if written:
+                        new[digest] = (length, written)
+
+            created = datetime.now()
+            snapshot = f"{created:%Y%m%d-%H%M%S}-{path.name.split('.zip')[0]}"
+            manifest = {
+                'save': path.name,
+                'size': before.st_size,
+                'mtime': before.st_mtime,
+                'created': created.isoformat(timespec='seconds'),
+                'chunks': chunks
+            }
+            await asyncio.to_thread(self._write_manifest, snapshot, manifest)
+
+            result = BackupResult(
+                snapshot=snapshot,
+                size=before.st_size,
+                chunks=len(chunks),
+                new_chunks=len(new),
+                new_bytes=sum(length for length, _ in new.values()),
+                stored_bytes=sum(written for _, written in new.values()),
+                seconds=time.perf_counter() - started
+            )
+            logger.info(
+                f"Backed up {path.name} as {snapshot}: {result.size / 1024 ** 2:.1f} MB in "
+                f"{result.seconds:.2f}s ({result.throughput:.0f} MB/s), "
+                f"{result.new_chunks}/{result.chunks} new chunks, dedup {result.dedup_ratio:.1f}x"
+            )
+            await asyncio.to_thread(self._prune_and_collect)
+            return result
+
+    def _write_manifest(self, snapshot: str, manifest: dict) -> None:
+        target = self.snapshot_dir / f"{snapshot}.json"
+        tmp = target.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, target)
+
+    # Restore
+
+    def _restore(self, snapshot: str, target: Path) -> int:
+        manifest = self._load_manifest(snapshot)
+        tmp = target.with_name(f".{target.name}.restore")
+        try:
+            with open(tmp, 'wb') as f:
+                for digest, _ in manifest['chunks']:
+                    f.write(_read_chunk(self.chunk_dir, digest))
+            size = tmp.stat().st_size
+            if size != manifest['size']:
+                raise BackupError(f"Restored {size} bytes, expected {manifest['size']}")
+            os.utime(tmp, (manifest['mtime'], manifest['mtime']))
+            os.replace(tmp, target)
+        except (OSError, zlib.error) as e:
+            raise BackupError(f"Restore of {snapshot} failed: {e}") from e
+        finally:
+            tmp.unlink(missing_ok=True)
+        return size
+
+    async def restore(self, snapshot: str, name: Optional[str] = None,
+                      overwrite: bool = False) -> RestoreResult:
+        """
+        Rebuild a snapshot into the server's saves folder
+        :param name: File name to restore as (defaults to the original save name)
+        :param overwrite: Replace an existing save with that name
+        :raises BackupError: If the snapshot is missing or corrupt, or the target exists
+        """
+        async with self._lock:
+            started = time.perf_counter()
+            manifest = await asyncio.to_thread(self._load_manifest, snapshot)
+            target = self.save_dir / _plain_name(name or manifest['save'], 'save name')
+            if target.exists() and not overwrite:
+                raise BackupError(f"{target.name} already exists")
+            size = await asyncio.to_thread(self._restore, snapshot, target)
+            result = RestoreResult(target, size, time.perf_counter() - started)
+            logger.info(f"Restored {snapshot} to {target.name} in {result.seconds:.2f}s")
+            return result
+
+    # Retention
+
+    def select_expired(self, snapshots: List[dict], now: datetime) -> List[str]:
+        """
+        Snapshots outside the retention policy: per save, keep the newest
+        `keep_last` plus the newest one of each of the last `keep_daily` days
+        """
+        expired = []
+        by_save: Dict[str, List[dict]] = {}
+        for snapshot in snapshots:  # newest first
+            by_save.setdefault(snapshot['save'], []).append(snapshot)
+        oldest_day = (now - timedelta(days=self.keep_daily)).date()
+
+        for saves in by_save.values():
+            days_kept = set()
+            for index, snapshot in enumerate(saves):
+                day = datetime.fromisoformat(snapshot['created']).date()
+                if index < self.keep_last:
+                    days_kept.add(day)
+                elif day > oldest_day and day not in days_kept:
+                    days_kept.add(day)
+                else:
+                    expired.append(snapshot['id'])
+        return expired
+
+    def collect_garbage(self) -> tuple[int, int]:
+        """
+        Delete chunks no snapshot references, and leftover temp files (blocking)
+        :return: (chunks removed, bytes freed)
+        """
+        referenced: Set[str] = set()
+        for path in self.snapshot_dir.glob("*.json"):
+            with open(path, 'r') as f:
+                referenced.update(digest for digest, _ in json.load(f)['chunks'])
+
+        removed = freed = 0
+        if not self.chunk_dir.exists():
+            return removed, freed
+        for sub in os.scandir(self.chunk_dir):
+            for entry in os.scandir(sub.path):
+                if entry.name not in referenced:
+                    freed += entry.stat().st_size
+                    os.unlink(entry.path)
+                    removed += 1
+        return removed, freed
+
+    def _prune_and_collect(self) -> None:
+        expired = self.select_expired(self.list_snapshots(), datetime.now())
+        for snapshot in expired:
+            (self.snapshot_dir / f"{snapshot}.json").unlink(missing_ok=True)
+        removed, freed = self.collect_garbage()
+        if expired or removed:
+            logger.info(
+                f"Pruned {len(expired)} snapshots, removed {removed} chunks "
+                f"({freed / 1024 ** 2:.1f} MB)"
+            )
+
+    async def prune(self) -> None:
+        """Apply the retention policy and collect unreferenced chunks"""
+        async with self._lock:
+            await asyncio.to_thread(self._prune_and_collect)
+
+    # Hooks
+
+    async def _backup_later(self, path: Optional[Path], after: Optional[Awaitable]) -> None:
+        try:
+            if after is not None:
+                await after
+            if path is None:
+                latest = await self.catalog.get_latest()
+                if latest is None:
+                    return
+                path = latest.path
+            await self.backup(path)
+        except BackupError as e:
+            logger.warning(f"Backup skipped: {e}")
+        except Exception as e:
+            logger.error(f"Backup failed: {e}", exc_info=True)
+
+    def schedule(self, path: Optional[Path], after: Optional[Awaitable] = None) -> None:
+        """
+        Back up a finished save in the background
+        :param path: The save file (None: the newest save)
+        :param after: Wait for this first, e.g. the server exiting
+        """
+        task = asyncio.create_task(self._backup_later(path, after))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def close(self) -> None:
+        for task in self._pending:
+            task.cancel()
+        if BackupStore._executor is not None:
+            BackupStore._executor.shutdown(wait=False, cancel_futures=True)
+            BackupStore._executor = None
+
+
+# Shared store for the configured server's backups
+backup_store = BackupStore(
+    Config.BACKUP_DIR,
+    Config.BACKUP_WORKERS,
+    Config.BACKUP_KEEP_LAST,
+    Config.BACKUP_KEEP_DAILY,
+    Config.SAVE_GAMES_DIR,
+    save_catalog
+)
@@ -2,6 +2,7 @@ from pathlib import Path
 from typing import List, Optional
 from ..config import Config
 from ..exceptions import FactorioBotError
+from .save_catalog import save_catalog
 
 def validate_save_file(filename: str) -> Path:
     """
@@ -20,13 +21,13 @@ def validate_save_file(filename: str) -> Path:
 def list_save_files() -> List[str]:
     """List all valid save files in the saves directory"""
     return [
-        f.name for f in Config.SAVE_GAMES_DIR.glob('*.zip') 
-        if f.is_file()
+        entry.name for entry in save_catalog.entries()
+        if entry.name.endswith('.zip')
     ]
 
 def get_latest_save() -> Optional[Path]:
     """Get the most recently modified save file"""
-    saves = list(Config.SAVE_GAMES_DIR.glob('*.zip'))
-    if not saves:
-        return None
-    return max(saves, key=lambda f: f.stat().st_mtime)
\ No newline at end of file
+    for entry in save_catalog.entries():  # Newest first
+        if entry.name.endswith('.zip'):
+            return entry.path
+    return None
\ No newline at end of file
@@ -1,41 +1,166 @@
+import atexit
+import gzip
+import json
 import logging
-from logging.handlers import RotatingFileHandler
-from pathlib import Path
+import os
+import queue
+import shutil
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
 from ..config import Config
 
-def setup_logger(name: str = 'factorio_bot') -> logging.Logger:
+# Rotate the log file at 5MB, keeping this many old files
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including fields passed with extra={...}"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(QueueHandler):
     """
-    Configure application logging
-    :param name: Logger name
-    :return: Configured logger instance
+    Hands records to the writer thread. Only the message is rendered on the
+    calling thread; tracebacks (which read source files) are formatted by
+    the writer, and extra fields reach the JSON formatter untouched.
     """
-    # Ensure logs directory exists
-    logs_dir = Path('logs')
-    logs_dir.mkdir(exist_ok=True)
-    
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    # File handler (rotates at 5MB)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class _CompressingRotator:
+    """Rotated files are gzipped on a worker thread so the writer thread isn't held up"""
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self.closing = False
+
+    @staticmethod
+    def namer(name: str) -> str:
+        return name + '.gz'
+
+    def __call__(self, source: str, dest: str) -> None:
+        # dest is bot.log.1.gz; the uncompressed file waits next to it until gzip is done
+        plain = dest[:-len('.gz')]
+        # One at a time, and before the replace: the previous gzip may still be reading this same path
+        if self._thread is not None:
+            self._thread.join()
+        os.replace(source, plain)
+        if self.closing:
+            # Interpreter shutdown: no new threads
+            self._compress(plain, dest)
+            return
+        self._thread = threading.Thread(target=self._compress, args=(plain, dest), name='log-gzip')
+        self._thread.start()
+
+    @staticmethod
+    def _compress(plain: str, dest: str) -> None:
+        tmp = dest + '.tmp'
+        try:
+            with open(plain, 'rb') as f_in, gzip.open(tmp, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            os.replace(tmp, dest)
+            os.remove(plain)
+        except OSError as e:
+            # Keep the uncompressed file rather than lose it
+            logging.getLogger(__name__).error(f"Could not compress {plain}: {e}")
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._thread.join()
+
+
+_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def _start_listener() -> QueueHandler:
+    """Create the file and console handlers behind one queue, written by a background thread"""
+    global _handler, _listener
+    Config.LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+    json_lines = Config.LOG_FORMAT == 'json'
     file_handler = RotatingFileHandler(
-        logs_dir / 'bot.log',
-        maxBytes=5*1024*1024,  # 5MB
-        backupCount=3
+        Config.LOG_DIR / ('bot.jsonl' if json_lines else 'bot.log'),
+        maxBytes=MAX_BYTES,
+        backupCount=BACKUP_COUNT,
+        encoding='utf-8'
     )
-    file_handler.setFormatter(logging.Formatter(
+    file_handler.setFormatter(JsonFormatter() if json_lines else logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     ))
-    
-    # Console handler
+    rotator = None
+    if Config.LOG_COMPRESS:
+        rotator = _CompressingRotator()
+        file_handler.namer = rotator.namer
+        file_handler.rotator = rotator
+
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(logging.Formatter(
         '%(levelname)s - %(message)s'
     ))
-    
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+
+    _handler = _QueueHandler(queue.SimpleQueue())
+    _listener = QueueListener(_handler.queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+
+    def shutdown() -> None:
+        # Drain the queue, then wait for a pending compression
+        if rotator:
+            rotator.closing = True
+        _listener.stop()
+        file_handler.close()
+        if rotator:
+            rotator.close()
+    atexit.register(shutdown)
+    return _handler
+
+
+def setup_logger(name: str = 'factorio_bot', level: Optional[str] = None) -> logging.Logger:
+    """
+    Configure application logging. Records are queued and written to the log
+    file and console by a background thread, so logging never waits on disk.
+    Safe to call more than once and for several loggers: each gets the
+    shared queue handler once.
+    :param name: Logger name
+    :param level: Level name (default: LOG_LEVEL)
+    :return: Configured logger instance
+    """
+    handler = _handler or _start_listener()
+
+    logger = logging.getLogger(name)
+    logger.setLevel(level or Config.LOG_LEVEL)
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
+    # Records are written here; a root handler (e.g. discord.py's) would print them again
+    logger.propagate = False
+
     return logger
 
 # Create default logger instance
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
@@ -0,0 +1,181 @@
+import itertools
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+# Upper bounds (seconds) of latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Prefix of every exported metric name
+NAMESPACE = 'factorio_bot'
+
+
+class Counter:
+    """Monotonic count"""
+
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+
+class Histogram:
+    """Counts of observations per bucket, Prometheus style"""
+
+    __slots__ = ('buckets', 'counts', 'total', 'max')
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (inf for the open bucket)"""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip((*self.buckets, float('inf')), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def as_dict(self) -> dict:
+        return {
+            'buckets': dict(zip((*(str(b) for b in self.buckets), '+Inf'), itertools.accumulate(self.counts))),
+            'count': self.count,
+            'sum': self.total,
+        }
+
+
+class Timer:
+    """Duration histogram plus ok/error counts for one operation"""
+
+    __slots__ = ('seconds', 'ok', 'errors')
+
+    def __init__(self, seconds: Histogram, ok: Counter, errors: Counter):
+        self.seconds = seconds
+        self.ok = ok
+        self.errors = errors
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        self.seconds.observe(seconds)
+        (self.errors if error else self.ok).value += 1
+
+
+def timed(timer: Timer):
+    """
+    Time every call of a coroutine function. Raising counts as an error;
+    a cancelled call isn't recorded.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception:
+                timer.observe(time.perf_counter() - start, error=True)
+                raise
+            timer.observe(time.perf_counter() - start)
+            return result
+        return wrapper
+    return decorator
+
+
+class MetricsRegistry:
+    """
+    Named metric families, each holding one metric per label set.
+    Hot paths keep a reference to their metric and only touch it;
+    names, labels and text are only dealt with when scraped.
+    """
+
+    def __init__(self, namespace: str = NAMESPACE):
+        self.namespace = namespace
+        # name -> (type, help, {label pairs: metric})
+        self._families: Dict[str, tuple[str, str, Dict[tuple, object]]] = {}
+
+    def _register(self, kind: str, name: str, help: str, metric: object, labels: dict) -> object:
+        family = self._families.setdefault(f"{self.namespace}_{name}", (kind, help, {}))
+        family[2][tuple(sorted(labels.items()))] = metric
+        return metric
+
+    def counter(self, name: str, help: str, **labels) -> Counter:
+        return self._register('counter', name, help, Counter(), labels)
+
+    def histogram(self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS, **labels) -> Histogram:
+        return self._register('histogram', name, help, Histogram(buckets), labels)
+
+    def add_histogram(self, name: str, help: str, histogram: Histogram, **labels) -> Histogram:
+        """Export a histogram owned elsewhere (replaces one with the same labels)"""
+        return self._register('histogram', name, help, histogram, labels)
+
+    def gauge(self, name: str, help: str, read: Callable[[], Optional[float]], **labels) -> None:
+        """:param read: Called on every scrape; None leaves the sample out"""
+        self._register('gauge', name, help, read, labels)
+
+    def timer(self, name: str, help: str, **labels) -> Timer:
+        """`name`_seconds histogram and `name`_total{outcome} counter"""
+        return Timer(
+            self.histogram(f"{name}_seconds", f"{help} duration", **labels),
+            self.counter(f"{name}_total", f"{help} count by outcome", outcome='ok', **labels),
+            self.counter(f"{name}_total", f"{help} count by outcome", outcome='error', **labels)
+        )
+
+    def histograms(self) -> List[tuple[str, dict, Histogram]]:
+        """(name, labels, histogram) for every histogram, for summaries"""
+        return [
+            (name, dict(labels), metric)
+            for name, (kind, _, metrics) in self._families.items() if kind == 'histogram'
+            for labels, metric in metrics.items()
+        ]
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, (kind, help, metrics) in self._families.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in metrics.items():
+                if kind == 'counter':
+                    lines.append(f"{name}{_labels(labels)} {metric.value}")
+                elif kind == 'gauge':
+                    value = metric()
+                    if value is not None:
+                        lines.append(f"{name}{_labels(labels)} {value}")
+                else:
+                    cumulative = itertools.accumulate(metric.counts)
+                    for bound, count in zip((*metric.buckets, '+Inf'), cumulative):
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {metric.total}")
+                    lines.append(f"{name}_count{_labels(labels)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs: tuple) -> str:
+    if not pairs:
+        return ""
+    escaped = (
+        (key, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+# Metrics of the whole bot, served by MetricsServer and summarised by !metrics
+metrics = MetricsRegistry()
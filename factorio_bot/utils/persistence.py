@@ -1,17 +1,46 @@
 import json
+import logging
 from pathlib import Path
 from ..config import Config
+from .state_store import state_store
 
+logger = logging.getLogger(__name__)
+
+# Written by earlier versions; imported while the state store is still empty
 CONFIG_FILE = Path('bot_state.json')
 
+PANEL_KEY = 'panel'
+FLEET_PANEL_PREFIX = 'panel:'
+
 def save_state():
-    """Save persistent state to file"""
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump({'panel_message_id': Config.PANEL_MESSAGE_ID}, f)
+    """Queue the panel message IDs for the state store"""
+    state_store.set(PANEL_KEY, Config.PANEL_MESSAGE_ID)
+    for key, _ in state_store.items(FLEET_PANEL_PREFIX):
+        if key[len(FLEET_PANEL_PREFIX):] not in Config.FLEET_PANEL_IDS:
+            state_store.delete(key)
+    for name, message_id in Config.FLEET_PANEL_IDS.items():
+        state_store.set(FLEET_PANEL_PREFIX + name, message_id)
 
 def load_state():
-    """Load persistent state from file"""
-    if CONFIG_FILE.exists():
+    """Load persistent state from the state store"""
+    state_store.load()
+    if CONFIG_FILE.exists() and not state_store.stored:
+        _import_legacy()
+    Config.PANEL_MESSAGE_ID = state_store.get(PANEL_KEY)
+    Config.FLEET_PANEL_IDS = {
+        key[len(FLEET_PANEL_PREFIX):]: message_id
+        for key, message_id in state_store.items(FLEET_PANEL_PREFIX)
+    }
+
+def _import_legacy():
+    """Copy bot_state.json into the state store (the file is left as it is)"""
+    try:
         with open(CONFIG_FILE, 'r') as f:
             data = json.load(f)
-            Config.PANEL_MESSAGE_ID = data.get('panel_message_id')
\ No newline at end of file
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable {CONFIG_FILE}: {e}")
+        return
+    Config.PANEL_MESSAGE_ID = data.get('panel_message_id')
+    Config.FLEET_PANEL_IDS = data.get('fleet_panels', {})
+    save_state()
+    logger.info(f"Imported {CONFIG_FILE} into {state_store.path}")
@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Simple token bucket rate limiter
+    :param capacity: Maximum burst size
+    :param refill_interval: Seconds needed to regain one token
+    """
+
+    def __init__(self, capacity: int, refill_interval: float):
+        self.capacity = max(1, capacity)
+        self.refill_interval = refill_interval
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.refill_interval > 0:
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated) / self.refill_interval
+            )
+        else:
+            self._tokens = float(self.capacity)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available"""
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it"""
+        while not self.try_acquire():
+            await asyncio.sleep((1 - self._tokens) * self.refill_interval)
@@ -0,0 +1,252 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import platform
+import struct
+from dataclasses import dataclass
+from functools import cached_property
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# Collect bursts of filesystem events before re-statting
+DEBOUNCE_SECONDS = 0.25
+
+
+@dataclass(frozen=True)
+class SaveEntry:
+    """A save file with the stat data the bot needs"""
+    path: Path
+    size: int
+    mtime: float
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    @cached_property
+    def display(self) -> str:
+        return f"{self.path.stem} ({datetime.fromtimestamp(self.mtime):%Y-%m-%d %H:%M})"
+
+
+def is_save_name(name: str) -> bool:
+    """Matches *.zip* (includes .zip.autosave style names)"""
+    return '.zip' in name and not name.startswith('.')
+
+
+class _Inotify:
+    """Minimal Linux inotify binding via ctypes"""
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+
+    _EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def read(self) -> tuple[Set[str], bool]:
+        """
+        Drain pending events
+        :return: (changed file names, whether the directory itself went away)
+        """
+        names: Set[str] = set()
+        gone = False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names, gone
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', errors='replace')
+            offset += length
+            if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                gone = True
+            elif name:
+                names.add(name)
+        return names, gone
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class SaveCatalog:
+    """
+    In-memory index of the save directory.
+
+    Built with one os.scandir pass and one stat per file, then kept up to
+    date from inotify events on Linux. Elsewhere (or if inotify is not
+    available) the directory mtime is polled and the index rebuilt when it
+    changes.
+    """
+
+    def __init__(self, directory: Path, poll_interval: float):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self._entries: Dict[str, SaveEntry] = {}
+        self._sorted: Optional[List[SaveEntry]] = None
+        self._loaded = False
+        self._dir_mtime: Optional[float] = None
+        self._inotify: Optional[_Inotify] = None
+        self._changed: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._scan_lock = asyncio.Lock()
+
+    # Index
+
+    def scan(self) -> None:
+        """Rebuild the index from scratch (blocking)"""
+        entries: Dict[str, SaveEntry] = {}
+        try:
+            dir_mtime = os.stat(self.directory).st_mtime
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not is_save_name(entry.name):
+                        continue
+                    try:
+                        stat = entry.stat()
+                        if entry.is_file():
+                            entries[entry.name] = SaveEntry(Path(entry.path), stat.st_size, stat.st_mtime)
+                    except FileNotFoundError:
+                        continue
+        except FileNotFoundError:
+            dir_mtime = None
+        self._entries = entries
+        self._sorted = None
+        self._dir_mtime = dir_mtime
+        self._loaded = True
+
+    def _update(self, names: Set[str]) -> None:
+        """Re-stat only the given files (blocking)"""
+        # Work on a copy so readers on the event loop never see a dict mid-update
+        entries = dict(self._entries)
+        for name in names:
+            path = self.directory / name
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                entries.pop(name, None)
+                continue
+            entries[name] = SaveEntry(path, stat.st_size, stat.st_mtime)
+        self._entries = entries
+        self._sorted = None
+        # These changes are accounted for, so the poller needn't rescan for them
+        try:
+            self._dir_mtime = os.stat(self.directory).st_mtime
+        except FileNotFoundError:
+            pass
+
+    def entries(self) -> List[SaveEntry]:
+        """All saves, newest first (scans on this thread if needed: use get_entries() on the event loop)"""
+        if not self._loaded:
+            self.scan()
+        if self._sorted is None:
+            self._sorted = sorted(self._entries.values(), key=lambda e: e.mtime, reverse=True)
+        return self._sorted
+
+    async def get_entries(self) -> List[SaveEntry]:
+        """All saves, newest first, scanning off the event loop if needed"""
+        if not self._loaded:
+            async with self._scan_lock:
+                if not self._loaded:
+                    await asyncio.to_thread(self.scan)
+        return self.entries()
+
+    def latest(self) -> Optional[SaveEntry]:
+        entries = self.entries()
+        return entries[0] if entries else None
+
+    async def get_latest(self) -> Optional[SaveEntry]:
+        """The newest save, scanning off the event loop if needed"""
+        entries = await self.get_entries()
+        return entries[0] if entries else None
+
+    def get_all_saves(self) -> list[tuple[Path, str]]:
+        """Saves with display strings, newest first"""
+        return [(entry.path, entry.display) for entry in self.entries()]
+
+    # Watching
+
+    async def start(self) -> None:
+        """Load the index and start watching for changes"""
+        if self._poll_task is not None and not self._poll_task.done():
+            return
+        await asyncio.to_thread(self.scan)
+        if platform.system() == "Linux":
+            try:
+                self._inotify = _Inotify(self.directory)
+                asyncio.get_running_loop().add_reader(self._inotify.fd, self._on_inotify)
+                logger.info(f"Watching {self.directory} with inotify")
+            except OSError as e:
+                logger.info(f"inotify unavailable ({e}), polling {self.directory} instead")
+                self._inotify = None
+        # Polling also covers changes inotify can't see (e.g. other NFS clients)
+        self._poll_task = asyncio.create_task(self._poll())
+
+    def _on_inotify(self) -> None:
+        names, gone = self._inotify.read()
+        if gone:
+            logger.warning(f"Save directory {self.directory} was moved or deleted")
+            asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+            self._loaded = False
+            return
+        self._changed.update(n for n in names if is_save_name(n))
+        if self._changed and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        # Events that arrive during an update don't start a new flush; pick them up here
+        while self._changed:
+            await asyncio.sleep(DEBOUNCE_SECONDS)
+            names, self._changed = self._changed, set()
+            await asyncio.to_thread(self._update, names)
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                dir_mtime = (await asyncio.to_thread(os.stat, self.directory)).st_mtime
+            except FileNotFoundError:
+                dir_mtime = None
+            if dir_mtime != self._dir_mtime or not self._loaded:
+                await asyncio.to_thread(self.scan)
+
+    def stop(self) -> None:
+        if self._inotify is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            except RuntimeError:
+                pass
+            self._inotify.close()
+            self._inotify = None
+        for task in (self._poll_task, self._flush_task):
+            if task:
+                task.cancel()
+
+
+# Shared catalog for the configured save directory
+save_catalog = SaveCatalog(Config.SAVE_GAMES_DIR, Config.SAVE_CATALOG_POLL_INTERVAL)
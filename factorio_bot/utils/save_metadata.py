@@ -0,0 +1,245 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from ..config import Config
+from .save_catalog import SaveEntry
+
+logger = logging.getLogger(__name__)
+
+# Never read more than this much of a header entry
+HEADER_READ_LIMIT = 64 * 1024
+
+
+@dataclass
+class SaveMetadata:
+    """Summary of a save file, read without decompressing the map"""
+    world_name: str
+    size: int  # bytes on disk
+    uncompressed_size: int
+    file_count: int
+    map_version: Optional[str] = None
+    scenario: Optional[str] = None
+    mods: Optional[List[str]] = None
+
+    @property
+    def summary(self) -> str:
+        """Short one-line description for the save picker"""
+        parts = []
+        if self.map_version:
+            parts.append(f"v{self.map_version}")
+        if self.mods is not None:
+            parts.append(f"{len(self.mods)} mods")
+        parts.append(f"{self.size / 1024 ** 2:.0f} MB")
+        return " · ".join(parts)
+
+
+class _HeaderReader:
+    """Reader for Factorio's binary map header (space-optimised ints and strings)"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def take(self, fmt: str):
+        value = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return value if len(value) > 1 else value[0]
+
+    def opt_u16(self) -> int:
+        value = self.take('<B')
+        return self.take('<H') if value == 0xFF else value
+
+    def opt_u32(self) -> int:
+        value = self.take('<B')
+        return self.take('<I') if value == 0xFF else value
+
+    def string(self) -> str:
+        length = self.opt_u32()
+        if length > 1024:
+            raise ValueError("Implausible string length")
+        raw = self.data[self.pos:self.pos + length]
+        self.pos += length
+        return raw.decode('utf-8')
+
+
+def parse_level_header(data: bytes) -> tuple[str, Optional[List[str]]]:
+    """
+    Parse the version and (best effort) mod list from level-init.dat
+    :return: (map version, mod names or None if the layout wasn't recognised)
+    """
+    reader = _HeaderReader(data)
+    major, minor, patch, build = reader.take('<HHHH')
+    version = f"{major}.{minor}.{patch}"
+
+    try:
+        reader.take('<B')                       # unused flag
+        reader.string()                         # campaign
+        reader.string()                         # level name
+        reader.string()                         # base mod
+        reader.take('<BBB')                     # difficulty, finished, player won
+        reader.string()                         # next level
+        reader.take('<BBBB')                    # can continue, finished but continuing, saving replay, debug options
+        reader.take('<BHHH')                    # loaded from version
+        reader.take('<H')                       # loaded from build
+        reader.take('<B')                       # allowed commands
+        mods = []
+        for _ in range(reader.opt_u32()):
+            name = reader.string()
+            reader.opt_u16(), reader.opt_u16(), reader.opt_u16()
+            reader.take('<I')                   # CRC
+            if not name.isprintable():
+                raise ValueError("Implausible mod name")
+            mods.append(name)
+        if 'base' not in mods:
+            raise ValueError("Mod list without base")
+        return version, mods
+    except (struct.error, UnicodeDecodeError, ValueError):
+        return version, None
+
+
+def read_metadata(path: Path) -> SaveMetadata:
+    """
+    Read save metadata from the zip central directory and the small
+    level-init.dat/control.lua entries only (blocking)
+    """
+    with zipfile.ZipFile(path) as archive:
+        infos = archive.infolist()
+        names = {info.filename: info for info in infos}
+        # Saves hold a single top-level folder named after the world
+        top_level = {name.split('/', 1)[0] for name in names if '/' in name}
+        if len(top_level) == 1:
+            world_name = top_level.pop()
+            prefix = f"{world_name}/"
+        else:
+            world_name, prefix = path.stem, ""
+
+        metadata = SaveMetadata(
+            world_name=world_name,
+            size=path.stat().st_size,
+            uncompressed_size=sum(info.file_size for info in infos),
+            file_count=len(infos)
+        )
+
+        init_name = f"{prefix}level-init.dat"
+        if init_name in names:
+            with archive.open(init_name) as f:
+                header = f.read(HEADER_READ_LIMIT)
+            try:
+                metadata.map_version, metadata.mods = parse_level_header(header)
+            except struct.error:
+                pass
+
+        control_name = f"{prefix}control.lua"
+        if control_name in names and names[control_name].file_size <= HEADER_READ_LIMIT:
+            first_line = archive.read(control_name).decode('utf-8', errors='replace').lstrip().split('\n', 1)[0]
+            if first_line.startswith('--'):
+                metadata.scenario = first_line.lstrip('- ').strip()[:100] or None
+
+    return metadata
+
+
+class SaveMetadataCache:
+    """
+    Persistent metadata cache keyed by (path, size, mtime).
+    Lookups are a dict access; misses are read in a worker thread.
+    Entries for saves that left their folder are dropped, so rotating
+    autosave names don't grow the file.
+    """
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        # path -> (size, mtime, metadata); a changed size/mtime is a miss
+        self._entries: Dict[str, tuple[int, float, SaveMetadata]] = {}
+        self._loaded = False
+        self._dirty = False
+        self._lock = asyncio.Lock()
+
+    def load(self) -> None:
+        """Load the cache file (blocking)"""
+        self._loaded = True
+        if not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r') as f:
+                raw = json.load(f)
+            self._entries = {
+                path: (value['size'], value['mtime'], SaveMetadata(**value['metadata']))
+                for path, value in raw.items()
+            }
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable save metadata cache: {e}")
+
+    def flush(self) -> None:
+        """Write the cache atomically (blocking)"""
+        data = {
+            path: {'size': size, 'mtime': mtime, 'metadata': asdict(metadata)}
+            for path, (size, mtime, metadata) in self._entries.items()
+        }
+        tmp = self.cache_file.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, self.cache_file)
+        self._dirty = False
+
+    def get(self, entry: SaveEntry) -> Optional[SaveMetadata]:
+        """Cached metadata for an entry, if it is still current"""
+        cached = self._entries.get(str(entry.path))
+        if cached is None or cached[0] != entry.size or cached[1] != entry.mtime:
+            return None
+        return cached[2]
+
+    def _read_missing(self, entries: List[SaveEntry]) -> None:
+        for entry in entries:
+            try:
+                metadata = read_metadata(entry.path)
+            except (OSError, zipfile.BadZipFile) as e:
+                logger.warning(f"Could not read metadata from {entry.name}: {e}")
+                continue
+            self._entries[str(entry.path)] = (entry.size, entry.mtime, metadata)
+            self._dirty = True
+
+    def _drop_missing(self, present: List[SaveEntry]) -> None:
+        """Forget saves no longer in the folders `present` lists (other servers' folders are kept)"""
+        folders = {str(entry.path.parent) for entry in present}
+        paths = {str(entry.path) for entry in present}
+        stale = [
+            path for path in self._entries
+            if path not in paths and str(Path(path).parent) in folders
+        ]
+        for path in stale:
+            del self._entries[path]
+        self._dirty = self._dirty or bool(stale)
+
+    async def get_many(self, entries: List[SaveEntry],
+                       present: Optional[List[SaveEntry]] = None) -> Dict[Path, SaveMetadata]:
+        """
+        Metadata for the given saves, reading only uncached ones off the event loop
+        :param present: Every save currently in the folder (the catalog); others from it are dropped
+        """
+        async with self._lock:
+            if not self._loaded:
+                await asyncio.to_thread(self.load)
+            if present is not None:
+                self._drop_missing(present)
+            missing = [entry for entry in entries if self.get(entry) is None]
+            if missing:
+                await asyncio.to_thread(self._read_missing, missing)
+            if self._dirty:
+                await asyncio.to_thread(self.flush)
+
+        result = {}
+        for entry in entries:
+            metadata = self.get(entry)
+            if metadata is not None:
+                result[entry.path] = metadata
+        return result
+
+
+# Shared cache for every server's saves (entries are keyed by full path)
+save_metadata = SaveMetadataCache(Config.SAVE_METADATA_CACHE)
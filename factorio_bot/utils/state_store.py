@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class StateStore:
+    """
+    Small key/value store for what the bot must remember across restarts
+    (panel messages, world names, the server process), in SQLite (WAL mode).
+
+    Everything is read into memory once at startup; reads after that never
+    touch the disk. Changes are coalesced per key and written in one
+    transaction `flush_delay` seconds after the first of them, on a
+    dedicated thread. A transaction either lands completely or not at all,
+    so a crash can lose at most the last `flush_delay` seconds of changes.
+    """
+
+    def __init__(self, path: Path, flush_delay: float):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='state')
+        self._conn: Optional[sqlite3.Connection] = None
+        self._values: Dict[str, Any] = {}
+        self._pending: Dict[str, Any] = {}  # key -> value, None deletes
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.batches = 0
+        self.writes = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'batches': self.batches, 'writes': self.writes, 'pending': len(self._pending)}
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Read the whole store (blocking, once at startup: a few rows take about a millisecond)
+        :return: The stored values by key
+        """
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            rows = conn.execute("SELECT key, value FROM state").fetchall()
+        finally:
+            conn.close()
+        self._values = {key: json.loads(value) for key, value in rows}
+        return dict(self._values)
+
+    @property
+    def stored(self) -> int:
+        """Number of keys with a value"""
+        return len(self._values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values.get(key, default)
+
+    def items(self, prefix: str = '') -> Iterator[Tuple[str, Any]]:
+        """Stored (key, value) pairs whose key starts with prefix"""
+        return ((key, value) for key, value in list(self._values.items()) if key.startswith(prefix))
+
+    def set(self, key: str, value: Any) -> None:
+        """Remember a JSON-serialisable value (None deletes the key); written shortly after"""
+        if self._values.get(key) == value:
+            return
+        if value is None:
+            self._values.pop(key, None)
+        else:
+            self._values[key] = value
+        self._pending[key] = value
+        self._schedule()
+
+    def delete(self, key: str) -> None:
+        self.set(key, None)
+
+    def _schedule(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop yet: written with the next change or on close()
+        self._task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def _call(self, fn: Callable[..., T], *args) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # Database thread
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # Writes are rare and off the event loop: sync every commit, so they survive a power cut too
+            self._conn.execute("PRAGMA synchronous=FULL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _write(self, batch: Dict[str, Any]) -> None:
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO state (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                [(key, json.dumps(value)) for key, value in batch.items() if value is not None]
+            )
+            conn.executemany(
+                "DELETE FROM state WHERE key = ?",
+                [(key,) for key, value in batch.items() if value is None]
+            )
+
+    # Event loop
+
+    async def flush(self) -> None:
+        """Write pending changes now"""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        try:
+            await self._call(self._write, batch)
+        except Exception as e:
+            logger.error(f"Failed to write bot state: {e}")
+            # Retried with the next change, unless that key changed again meanwhile
+            self._pending = {**batch, **self._pending}
+            return
+        self.batches += 1
+        self.writes += len(batch)
+
+    async def close(self) -> None:
+        if self._task and self._task is not asyncio.current_task():
+            self._task.cancel()
+        await self.flush()
+        if self._conn is not None:
+            await self._call(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+
+state_store = StateStore(Config.STATE_DB, Config.STATE_FLUSH_DELAY)
@@ -0,0 +1,13 @@
+import os
+import tempfile
+
+# Everything the bot writes goes to a scratch directory; set before the bot's modules read it
+_scratch = tempfile.mkdtemp(prefix='factorio_bot_tests_')
+os.environ.update({
+    'HISTORY_DIR': os.path.join(_scratch, 'history'),
+    'SESSIONS_DB': os.path.join(_scratch, 'sessions.db'),
+    'STATE_DB': os.path.join(_scratch, 'bot_state.db'),
+    'SAVE_METADATA_CACHE': os.path.join(_scratch, 'save_metadata.json'),
+    'BACKUP_DIR': os.path.join(_scratch, 'backups'),
+    'LOG_DIR': os.path.join(_scratch, 'logs'),
+})
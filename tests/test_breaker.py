@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+from benchmarks.fake_rcon import FakeRCONServer
+from factorio_bot.config import Config
+from factorio_bot.constants import BreakerState
+from factorio_bot.exceptions import RCONError
+from factorio_bot.R_con import RCONEndpoint
+from factorio_bot.R_con.breaker import CircuitBreaker
+
+THRESHOLD = 3
+
+
+def _breaker(port: int) -> CircuitBreaker:
+    # No wait between probes, so the tests don't sleep
+    return CircuitBreaker('127.0.0.1', port, THRESHOLD, probe_interval=0, probe_timeout=0.5)
+
+
+async def _open_breaker_with_server_back():
+    """An open breaker whose server is reachable again"""
+    fake = FakeRCONServer()
+    breaker = _breaker(await fake.start())
+    for _ in range(THRESHOLD):
+        breaker.record_failure()
+    return fake, breaker
+
+
+async def _gate(breaker: CircuitBreaker) -> bool:
+    try:
+        await breaker.before_call()
+    except RCONError:
+        return False
+    return True
+
+
+def test_opens_after_threshold_and_fails_fast():
+    async def scenario():
+        breaker = CircuitBreaker('127.0.0.1', 1, THRESHOLD, probe_interval=60, probe_timeout=0.5)
+        for _ in range(THRESHOLD - 1):
+            breaker.record_failure()
+        assert breaker.state is BreakerState.CLOSED
+        breaker.record_failure()
+        assert breaker.state is BreakerState.OPEN
+        # Within the probe interval: rejected without touching the network
+        assert not await _gate(breaker)
+
+    asyncio.run(scenario())
+
+
+def test_half_open_admits_a_single_trial():
+    async def scenario():
+        fake, breaker = await _open_breaker_with_server_back()
+        admitted = await asyncio.gather(*(_gate(breaker) for _ in range(5)))
+        state = breaker.state
+        breaker.record_success()
+        after = await asyncio.gather(*(_gate(breaker) for _ in range(5)))
+        await fake.stop()
+        return admitted, state, after, breaker.state
+
+    admitted, state, after, closed = asyncio.run(scenario())
+    assert admitted.count(True) == 1
+    assert state is BreakerState.HALF_OPEN
+    assert all(after) and closed is BreakerState.CLOSED
+
+
+def test_failed_trial_reopens():
+    async def scenario():
+        fake, breaker = await _open_breaker_with_server_back()
+        assert await _gate(breaker)
+        breaker.record_failure()
+        await fake.stop()
+        return breaker.state
+
+    assert asyncio.run(scenario()) is BreakerState.OPEN
+
+
+def test_abandoned_trial_lets_the_next_call_try():
+    async def scenario():
+        fake, breaker = await _open_breaker_with_server_back()
+        assert await _gate(breaker)
+        assert not await _gate(breaker)
+        breaker.abandon_trial()
+        next_call = await _gate(breaker)
+        await fake.stop()
+        return next_call, breaker.state
+
+    assert asyncio.run(scenario()) == (True, BreakerState.HALF_OPEN)
+
+
+def test_endpoint_recovers_through_one_trial(monkeypatch):
+    monkeypatch.setattr(Config, 'RCON_PROBE_INTERVAL', 0)
+    monkeypatch.setattr(Config, 'RCON_BREAKER_THRESHOLD', THRESHOLD)
+
+    async def scenario():
+        fake = FakeRCONServer(latency=0.05)
+        port = await fake.start()
+        await fake.stop()
+        endpoint = RCONEndpoint('127.0.0.1', port, fake.password, pool_size=2)
+        for _ in range(THRESHOLD):
+            with pytest.raises(RCONError):
+                await endpoint.send_async('/players', timeout=1)
+        assert endpoint.get_breaker().state is BreakerState.OPEN
+
+        await fake.start()
+        results = await asyncio.gather(
+            *(endpoint.send_async('/players', timeout=1) for _ in range(4)),
+            return_exceptions=True
+        )
+        sent_during_trial = fake.total_commands
+        await endpoint.send_async('/players', timeout=1)
+        state = endpoint.get_breaker().state
+        await endpoint.close()
+        await fake.stop()
+        return results, sent_during_trial, state
+
+    results, sent_during_trial, state = asyncio.run(scenario())
+    # Only the trial reached the server; the others failed fast instead of piling on
+    assert sent_during_trial == 1
+    assert sum(not isinstance(result, Exception) for result in results) == 1
+    assert state is BreakerState.CLOSED
@@ -0,0 +1,42 @@
+from factorio_bot.server.history import DAY, HOUR, HOUR_CAPACITY, MINUTE_CAPACITY, MetricHistory, RollupRing
+
+POLL_INTERVAL = 25
+MONTH = 30 * DAY
+# Start on an hour boundary so the month is exactly 720 hours
+START = 1_700_000_000 - 1_700_000_000 % HOUR
+
+
+def _fill_month(directory):
+    """A month of samples at the poll rate, flushed hourly like the bot's flush loop"""
+    metric = MetricHistory('players')
+    for timestamp in range(START, START + MONTH, POLL_INTERVAL):
+        metric.add(timestamp, float(timestamp % 7))
+        if timestamp % HOUR == 0:
+            metric.flush(directory)
+    metric.flush(directory)
+    return metric
+
+
+def test_month_of_samples_stays_within_fixed_sizes(tmp_path):
+    empty = MetricHistory('players').nbytes
+    metric = _fill_month(tmp_path)
+
+    # Memory is fixed by the ring capacities, however many samples went in
+    assert metric.nbytes == empty == (MINUTE_CAPACITY + HOUR_CAPACITY) * RollupRing.ROW.size
+    assert len(metric.minutes) == MINUTE_CAPACITY
+    assert len(metric.hours) == MONTH // HOUR - 1  # the last hour is still open
+
+    # A month adds one row per hour to disk; minutes are trimmed back to at most twice the ring
+    hours_file = (tmp_path / 'players.1h').stat().st_size
+    minutes_file = (tmp_path / 'players.1m').stat().st_size
+    assert hours_file == len(metric.hours) * RollupRing.ROW.size
+    assert MINUTE_CAPACITY * RollupRing.ROW.size <= minutes_file <= 2 * MINUTE_CAPACITY * RollupRing.ROW.size
+
+
+def test_month_of_samples_reloads(tmp_path):
+    metric = _fill_month(tmp_path)
+    reloaded = MetricHistory('players')
+    reloaded.load(tmp_path)
+
+    assert reloaded.minutes.rows_since(0) == metric.minutes.rows_since(0)
+    assert reloaded.hours.rows_since(0) == metric.hours.rows_since(0)
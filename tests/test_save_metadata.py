@@ -0,0 +1,32 @@
+import asyncio
+import json
+import zipfile
+from factorio_bot.utils.save_catalog import SaveEntry
+from factorio_bot.utils.save_metadata import SaveMetadataCache
+
+
+def _save(path) -> SaveEntry:
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr(f"{path.stem}/level.dat0", b"map")
+    stat = path.stat()
+    return SaveEntry(path, stat.st_size, stat.st_mtime)
+
+
+def test_cache_forgets_saves_that_left_the_folder(tmp_path):
+    saves, other = tmp_path / 'saves', tmp_path / 'other'
+    saves.mkdir()
+    other.mkdir()
+    old, kept, elsewhere = _save(saves / 'old.zip'), _save(saves / 'kept.zip'), _save(other / 'x.zip')
+    cache = SaveMetadataCache(tmp_path / 'cache.json')
+
+    async def scenario() -> None:
+        await cache.get_many([old, kept, elsewhere])
+        old.path.unlink()
+        # The picker passes the whole catalog of one folder
+        found = await cache.get_many([kept], present=[kept])
+        assert list(found) == [kept.path]
+
+    asyncio.run(scenario())
+    stored = json.loads((tmp_path / 'cache.json').read_text())
+    # Another server's folder isn't touched
+    assert sorted(stored) == sorted([str(kept.path), str(elsewhere.path)])
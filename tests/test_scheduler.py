@@ -0,0 +1,137 @@
+import asyncio
+import time
+import pytest
+from factorio_bot.constants import CommandPriority
+from factorio_bot.exceptions import RCONError
+from factorio_bot.R_con.scheduler import RCONScheduler, _Job
+
+USER, BACKGROUND = CommandPriority.USER, CommandPriority.BACKGROUND
+
+
+class Gate:
+    """execute() stand-in that records commands and holds each one until released"""
+
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+
+    async def execute(self, command: str, timeout: float) -> str:
+        self.sent.append(command)
+        await self.release.wait()
+        return f"answer to {command}"
+
+
+async def _queue(scheduler: RCONScheduler, *jobs) -> list:
+    """Submit jobs in order (each a submit() kwargs dict) and let them reach the queue"""
+    tasks = [asyncio.create_task(scheduler.submit(**job)) for job in jobs]
+    await asyncio.sleep(0)
+    return tasks
+
+
+def test_more_urgent_commands_are_sent_first():
+    async def scenario():
+        gate = Gate()
+        scheduler = RCONScheduler(gate.execute, max_in_flight=1)
+        tasks = await _queue(
+            scheduler,
+            dict(command='blocker', timeout=5, priority=USER),
+            dict(command='poll', timeout=5, priority=BACKGROUND),
+            dict(command='click', timeout=5, priority=USER),
+        )
+        gate.release.set()
+        await asyncio.gather(*tasks)
+        return gate.sent
+
+    assert asyncio.run(scenario()) == ['blocker', 'click', 'poll']
+
+
+def test_queued_command_fails_at_its_deadline_without_being_sent():
+    async def scenario():
+        gate = Gate()
+        scheduler = RCONScheduler(gate.execute, max_in_flight=1)
+        blocker, late = await _queue(
+            scheduler,
+            dict(command='blocker', timeout=5),
+            dict(command='late', timeout=5, deadline=0.05),
+        )
+        with pytest.raises(RCONError, match='deadline'):
+            await late
+        gate.release.set()
+        await blocker
+        return gate.sent, scheduler.expired
+
+    assert asyncio.run(scenario()) == (['blocker'], 1)
+
+
+def test_command_reaching_the_front_on_its_deadline_is_not_sent():
+    async def scenario():
+        gate = Gate()
+        gate.release.set()
+        scheduler = RCONScheduler(gate.execute, max_in_flight=1)
+        # As if the deadline timer hadn't fired yet when the job was started
+        job = _Job('late', 5, USER, time.monotonic() - 0.01, None)
+        scheduler.in_flight += 1
+        await scheduler._run(job, 0.0)
+        return gate.sent, job.future.exception(), scheduler.in_flight
+
+    sent, error, in_flight = asyncio.run(scenario())
+    assert sent == [] and isinstance(error, RCONError) and in_flight == 0
+
+
+def test_newer_keyed_poll_supersedes_a_queued_one():
+    async def scenario():
+        gate = Gate()
+        scheduler = RCONScheduler(gate.execute, max_in_flight=1)
+        tasks = await _queue(
+            scheduler,
+            dict(command='blocker', timeout=5),
+            dict(command='poll 1', timeout=5, priority=BACKGROUND, key='status'),
+            dict(command='poll 2', timeout=5, priority=BACKGROUND, key='status'),
+        )
+        gate.release.set()
+        answers = await asyncio.gather(*tasks)
+        return gate.sent, answers, scheduler.superseded
+
+    sent, answers, superseded = asyncio.run(scenario())
+    assert sent == ['blocker', 'poll 2']
+    # The superseded caller gets the newer poll's answer
+    assert answers[1] == answers[2] == 'answer to poll 2'
+    assert superseded == 1
+
+
+def test_promote_moves_a_queued_poll_ahead():
+    async def scenario():
+        gate = Gate()
+        scheduler = RCONScheduler(gate.execute, max_in_flight=1)
+        tasks = await _queue(
+            scheduler,
+            dict(command='blocker', timeout=5),
+            dict(command='click', timeout=5, priority=USER),
+            dict(command='poll', timeout=5, priority=BACKGROUND, key='status'),
+        )
+        # Someone at ADMIN priority is waiting for the poll's answer
+        scheduler.promote('status', CommandPriority.ADMIN)
+        gate.release.set()
+        await asyncio.gather(*tasks)
+        return gate.sent
+
+    assert asyncio.run(scenario()) == ['blocker', 'poll', 'click']
+
+
+def test_timed_results_belong_to_each_job():
+    """Two probes with one key in flight together each get their own round trip"""
+    async def scenario():
+        async def execute(command: str, timeout: float) -> str:
+            await asyncio.sleep(0.2 if command == 'slow' else 0.05)
+            return command
+
+        scheduler = RCONScheduler(execute, max_in_flight=2)
+        return await asyncio.gather(
+            scheduler.submit('slow', 5, USER, key='status', timed=True),
+            scheduler.submit('fast', 5, BACKGROUND, key='status', timed=True),
+        )
+
+    (slow, slow_sent, slow_answered), (fast, fast_sent, fast_answered) = asyncio.run(scenario())
+    assert (slow, fast) == ('slow', 'fast')
+    assert slow_answered - slow_sent == pytest.approx(0.2, abs=0.05)
+    assert fast_answered - fast_sent == pytest.approx(0.05, abs=0.04)
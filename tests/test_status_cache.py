@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime
+import pytest
+from benchmarks.fake_rcon import FakeRCONServer
+from factorio_bot.config import ServerSettings
+from factorio_bot.server.context import ServerContext
+from factorio_bot.server.models import ServerStatus
+from factorio_bot.server.monitor import StatusCache
+
+
+class Fetcher:
+    """Counts fetches; each returns a status with its number as the world name"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self) -> ServerStatus:
+        self.calls += 1
+        number = self.calls
+        await asyncio.sleep(self.delay)
+        return ServerStatus(online=True, world_name=str(number), players=[], last_updated=datetime.now())
+
+
+def test_concurrent_callers_share_one_query():
+    async def scenario():
+        cache, fetch = StatusCache(ttl=60), Fetcher()
+        statuses = await asyncio.gather(*(cache.get(fetch) for _ in range(10)))
+        again = await cache.get(fetch)
+        return fetch.calls, statuses, again, cache.stats
+
+    calls, statuses, again, stats = asyncio.run(scenario())
+    assert calls == 1
+    assert all(status is statuses[0] for status in statuses)
+    assert again is statuses[0]
+    assert stats == {'hits': 1, 'misses': 1, 'shared': 9, 'invalidations': 0}
+
+
+def test_max_age_zero_always_queries():
+    async def scenario():
+        cache, fetch = StatusCache(ttl=60), Fetcher(delay=0)
+        await cache.get(fetch)
+        await cache.get(fetch, max_age=0)
+        return fetch.calls
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_result_started_before_an_invalidation_is_not_cached():
+    async def scenario():
+        cache, fetch = StatusCache(ttl=60), Fetcher()
+        stale = asyncio.create_task(cache.get(fetch))
+        await asyncio.sleep(0)
+        # e.g. the server just exited while the query was in flight
+        cache.invalidate()
+        fresh = await cache.get(fetch)
+        old = await stale
+        cached = await cache.get(fetch)
+        return old, fresh, cached, fetch.calls
+
+    old, fresh, cached, calls = asyncio.run(scenario())
+    assert (old.world_name, fresh.world_name) == ('1', '2')
+    assert cached is fresh
+    assert calls == 2
+
+
+def test_one_caller_giving_up_does_not_cancel_the_others():
+    async def scenario():
+        cache, fetch = StatusCache(ttl=60), Fetcher(delay=0.1)
+        impatient = asyncio.create_task(cache.get(fetch))
+        patient = asyncio.create_task(cache.get(fetch))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient, fetch.calls
+
+    status, calls = asyncio.run(scenario())
+    assert status.online and calls == 1
+
+
+def test_failed_query_is_not_cached():
+    async def scenario():
+        cache = StatusCache(ttl=60)
+
+        async def broken() -> ServerStatus:
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await asyncio.gather(cache.get(broken), cache.get(broken))
+        fetch = Fetcher(delay=0)
+        return await cache.get(fetch), fetch.calls
+
+    status, calls = asyncio.run(scenario())
+    assert status.online and calls == 1
+
+
+def test_status_commands_share_one_probe_on_the_wire():
+    async def scenario():
+        fake = FakeRCONServer(latency=0.05, players=3)
+        port = await fake.start()
+        server = ServerContext(ServerSettings('shared', '127.0.0.1', port, fake.password, channel_id=1))
+        try:
+            statuses = await asyncio.gather(*(server.monitor.get_status_async() for _ in range(20)))
+        finally:
+            await server.close()
+            await fake.stop()
+        return statuses, fake.commands
+
+    statuses, commands = asyncio.run(scenario())
+    assert all(status.online for status in statuses)
+    assert commands == {'/silent-command': 1}
@@ -0,0 +1,39 @@
+import asyncio
+from benchmarks.fake_rcon import FakeRCONServer
+from factorio_bot.config import ServerSettings
+from factorio_bot.server.context import ServerContext
+
+
+async def _poll(count: int, server: ServerContext) -> list:
+    return [await server.monitor.get_status_async(max_age=0) for _ in range(count)]
+
+
+async def _probe_unsupported():
+    fake = FakeRCONServer(latency=0, players=2, probe_supported=False)
+    port = await fake.start()
+    server = ServerContext(ServerSettings('old', '127.0.0.1', port, fake.password, channel_id=1))
+    try:
+        statuses = await _poll(5, server)
+        before_restart = dict(fake.commands)
+
+        # Offline in between: the server may come back as a newer version
+        await fake.stop()
+        offline = await server.monitor.get_status_async(max_age=0)
+        fake.probe_supported = True
+        await fake.start()
+        online = await server.monitor.get_status_async(max_age=0)
+    finally:
+        await server.close()
+        await fake.stop()
+    return statuses, before_restart, offline, online
+
+
+def test_unsupported_probe_is_sent_once_until_the_server_reconnects():
+    statuses, commands, offline, online = asyncio.run(_probe_unsupported())
+
+    assert all(status.online for status in statuses)
+    # One failed probe, then one command per poll
+    assert commands == {'/silent-command': 1, '/players': 5}
+    assert not offline.online
+    # Tried again after the outage, and the new server supports it
+    assert online.online and online.game_tick is not None
@@ -0,0 +1,56 @@
+import asyncio
+import time
+from factorio_bot.R_con import client
+from factorio_bot.config import ServerSettings
+from factorio_bot.server.context import ServerContext
+
+# Short RCON timeout so the test doesn't wait the full 10 s
+HANG_TIMEOUT = 1.0
+TICK = 0.01
+MAX_LAG = 0.05
+
+
+async def _query_hung_server():
+    """Status query against a listener that accepts and never answers, with a ticker running"""
+    connections = []
+
+    async def accept(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connections.append(writer)  # keep it open, answer nothing
+
+    listener = await asyncio.start_server(accept, '127.0.0.1', 0)
+    port = listener.sockets[0].getsockname()[1]
+    server = ServerContext(ServerSettings('hung', '127.0.0.1', port, 'password', channel_id=1))
+
+    lags = []
+
+    async def ticker() -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + TICK
+            await asyncio.sleep(TICK)
+            lags.append(loop.time() - expected)
+
+    ticks = asyncio.create_task(ticker())
+    start = time.monotonic()
+    status = await server.monitor.get_status_async(max_age=0)
+    elapsed = time.monotonic() - start
+    ticks.cancel()
+
+    await server.close()
+    for writer in connections:
+        writer.close()
+    listener.close()
+    return status, elapsed, lags, connections
+
+
+def test_loop_stays_responsive_while_rcon_hangs(monkeypatch):
+    monkeypatch.setattr(client, 'RCON_TIMEOUT', HANG_TIMEOUT)
+    status, elapsed, lags, connections = asyncio.run(_query_hung_server())
+
+    assert connections, "the query never reached the listener"
+    assert not status.online
+    # It really waited on the hung server...
+    assert elapsed >= HANG_TIMEOUT * 0.9
+    # ...while the ticker kept running on time
+    assert len(lags) >= elapsed / TICK * 0.5
+    assert max(lags) < MAX_LAG